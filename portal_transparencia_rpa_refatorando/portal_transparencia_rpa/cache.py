@@ -0,0 +1,190 @@
+"""
+Cache persistente (SQLite) das respostas JSON de parcelas.
+
+A chave é a URL normalizada (parâmetros ordenados). Cada benefício tem sua
+validade (`CACHE_TTL`); vencida a validade, a resposta é revalidada com
+`If-None-Match`/`If-Modified-Since` quando o servidor mandou ETag ou
+Last-Modified (304 = reaproveita o corpo guardado). O arquivo é limitado a
+`max_bytes`: ao passar disso as entradas menos usadas recentemente saem.
+"""
+
+import logging, sqlite3, threading, time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlencode
+
+from . import metricas
+from .constants import CACHE_MAX_BYTES, CACHE_TTL, CACHE_TTL_PADRAO
+
+logger = logging.getLogger("rpa")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    chave         TEXT PRIMARY KEY,
+    corpo         BLOB NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    gravado       REAL NOT NULL,
+    acessado      REAL NOT NULL,
+    bytes         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS respostas_acessado ON respostas (acessado);
+"""
+
+
+def chave(url: str, params: Optional[dict] = None) -> str:
+    """URL + query string com os parâmetros em ordem alfabética."""
+    if not params:
+        return url
+    return url + "?" + urlencode(sorted((k, str(v)) for k, v in params.items()))
+
+
+def ttl(segmento: str) -> Optional[float]:
+    """Validade (s) das respostas do `segmento`; None = não expira."""
+    return CACHE_TTL.get(segmento, CACHE_TTL_PADRAO)
+
+
+class Entrada:
+    __slots__ = ("chave", "corpo", "etag", "last_modified", "gravado")
+
+    def __init__(self, chave, corpo, etag, last_modified, gravado):
+        self.chave = chave
+        self.corpo = corpo
+        self.etag = etag
+        self.last_modified = last_modified
+        self.gravado = gravado
+
+    def fresca(self, validade: Optional[float]) -> bool:
+        return validade is None or time.time() - self.gravado < validade
+
+    def validadores(self) -> dict:
+        """Cabeçalhos para uma requisição condicional (vazio se não houver)."""
+        h = {}
+        if self.etag:
+            h["If-None-Match"] = self.etag
+        if self.last_modified:
+            h["If-Modified-Since"] = self.last_modified
+        return h
+
+
+class Cache:
+    """Uma conexão SQLite compartilhada entre threads (acesso serializado)."""
+
+    def __init__(self, path: Path, max_bytes: int = CACHE_MAX_BYTES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_ESQUEMA)
+        self.total = self.db.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM respostas"
+        ).fetchone()[0]
+        self.acertos = self.falhas = self.revalidados = self.removidos = 0
+
+    def busca(self, k: str) -> Optional[Entrada]:
+        with self.lock:
+            linha = self.db.execute(
+                "SELECT chave, corpo, etag, last_modified, gravado "
+                "FROM respostas WHERE chave = ?",
+                (k,),
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                metricas.conta("rpa_cache_total", resultado="falta")
+                return None
+            self.db.execute(
+                "UPDATE respostas SET acessado = ? WHERE chave = ?", (time.time(), k)
+            )
+            self.db.commit()
+        return Entrada(*linha)
+
+    def acerto(self, revalidado: bool = False):
+        with self.lock:
+            self.acertos += 1
+            self.revalidados += revalidado
+        resultado = "revalidado" if revalidado else "acerto"
+        metricas.conta("rpa_cache_total", resultado=resultado)
+
+    def expirada(self):
+        """Entrada encontrada mas vencida e sem como revalidar."""
+        with self.lock:
+            self.falhas += 1
+        metricas.conta("rpa_cache_total", resultado="expirada")
+
+    def renova(self, k: str):
+        """Servidor respondeu 304: a entrada vale por mais um TTL."""
+        with self.lock:
+            agora = time.time()
+            self.db.execute(
+                "UPDATE respostas SET gravado = ?, acessado = ? WHERE chave = ?",
+                (agora, agora, k),
+            )
+            self.db.commit()
+
+    def grava(
+        self,
+        k: str,
+        corpo: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        agora = time.time()
+        with self.lock:
+            antigo = self.db.execute(
+                "SELECT bytes FROM respostas WHERE chave = ?", (k,)
+            ).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (k, corpo, etag, last_modified, agora, agora, len(corpo)),
+            )
+            self.total += len(corpo) - (antigo[0] if antigo else 0)
+            if self.total > self.max_bytes:
+                self._despeja()
+            self.db.commit()
+
+    def _despeja(self):
+        """LRU: remove as menos acessadas até ficar em 90% do limite."""
+        alvo = self.max_bytes * 0.9
+        cur = self.db.execute("SELECT chave, bytes FROM respostas ORDER BY acessado")
+        remover = []
+        for k, n in cur:
+            if self.total <= alvo:
+                break
+            remover.append((k,))
+            self.total -= n
+        self.db.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+        self.removidos += len(remover)
+
+    def resumo(self) -> str:
+        consultas = self.acertos + self.falhas
+        taxa = 100 * self.acertos / consultas if consultas else 0
+        return (
+            f"cache HTTP: {self.acertos} acertos ({self.revalidados} revalidados), "
+            f"{self.falhas} falhas, {taxa:.0f}% de acerto, "
+            f"{self.removidos} removidos, {self.total / 1e6:.1f} MB"
+        )
+
+    def fecha(self):
+        with self.lock:
+            self.db.close()
+
+
+CACHE: Cache | None = None
+
+
+def configura(path: Optional[Path], max_bytes: int = CACHE_MAX_BYTES):
+    """Abre o cache em `path` (None desliga)."""
+    global CACHE
+    fecha()
+    CACHE = Cache(path, max_bytes) if path else None
+
+
+def fecha():
+    """Registra os contadores no log e fecha o cache aberto."""
+    global CACHE
+    if CACHE is not None:
+        logger.info(CACHE.resumo())
+        CACHE.fecha()
+        CACHE = None
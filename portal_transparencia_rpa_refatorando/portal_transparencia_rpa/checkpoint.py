@@ -0,0 +1,64 @@
+"""
+Journal de checkpoint da execução (`<run_dir>/journal.ndjson`).
+
+A 1ª linha guarda os parâmetros da execução; cada linha seguinte confirma
+um beneficiário já gravado na saída (url, id da pessoa, offset e tamanho em
+bytes). A linha só é escrita depois do registro estar no arquivo de saída,
+então `--resume <run_dir>` pode truncar a saída no último registro
+confirmado, pular as pessoas já coletadas e continuar de onde parou.
+"""
+
+import json, logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("rpa")
+
+NOME = "journal.ndjson"
+
+
+class Journal:
+    """Append-only, com flush a cada linha."""
+
+    def __init__(self, run_dir: Path, parametros: Optional[dict] = None):
+        self.path = run_dir / NOME
+        novo = not self.path.exists() or self.path.stat().st_size == 0
+        self._f = self.path.open("a", encoding="utf-8")
+        if novo:
+            self._linha({"parametros": parametros or {}})
+
+    def _linha(self, obj: dict):
+        self._f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def registra(self, pessoa: str, entrada: dict):
+        """Confirma um beneficiário gravado (`entrada` vem do escritor)."""
+        self._linha({"pessoa": pessoa, **entrada})
+
+    def fecha(self):
+        self._f.close()
+
+
+def le_journal(run_dir: Path) -> Tuple[dict, List[dict]]:
+    """
+    Lê (parâmetros, entradas) do journal. Linhas truncadas por uma queda no
+    meio da escrita são ignoradas.
+    """
+    path = run_dir / NOME
+    if not path.exists():
+        raise FileNotFoundError(f"Journal não encontrado em {run_dir}")
+
+    parametros: dict = {}
+    entradas: List[dict] = []
+    with path.open(encoding="utf-8") as f:
+        for n, linha in enumerate(f, 1):
+            try:
+                obj = json.loads(linha)
+            except ValueError:
+                logger.warning("Linha %d do journal ignorada (incompleta)", n)
+                continue
+            if "parametros" in obj:
+                parametros = obj["parametros"]
+            else:
+                entradas.append(obj)
+    return parametros, entradas
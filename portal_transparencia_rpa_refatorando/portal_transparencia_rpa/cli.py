@@ -1,21 +1,54 @@
-import argparse, json, logging, sys, traceback
+import argparse, logging, sys, time, traceback
+from contextlib import nullcontext
 from pathlib import Path
 from typing import List
 
+from . import cache, evidencias, gerente, metricas, ratelimit, waits
+from .constants import (
+    CACHE_MAX_BYTES,
+    CACHE_PATH,
+    DRIVER_MAX_PAGINAS,
+    DRIVER_MAX_RSS_MB,
+    EVIDENCIA_MAX_BYTES,
+    HTTP_TAXA_POR_HOST,
+    PARCELAS_CONCORRENCIA,
+    SESSAO_ARQUIVO,
+    TAMANHO_PAGINA_LISTA,
+    TAMANHO_PAGINA_PARCELAS,
+)
 from .utils import (
     get_run_dir,
 )
 
 
-from .pipeline import run
+from .checkpoint import Journal, le_journal
+from .colunar import FORMATOS as TABELA_FORMATOS, abre_tabela
+from .images import FORMATOS as IMAGEM_FORMATOS
+from .output import FORMATOS, abre_saida, le_registros
+from .consultas import le_consultas
+from .pipeline import coleta_lote
+from .scraper import pessoa_id
+
+# parâmetros gravados no journal e restaurados pelo --resume
+RETOMAVEIS = (
+    "query",
+    "queries",
+    "out",
+    "format",
+    "parcels",
+    "max_results",
+    "page_size",
+)
 
 
-def setup_logger(debug: bool = False, logfile: Path | None = None) -> logging.Logger:
+def setup_logger(
+    debug: bool = False, logfile: Path | None = None, append: bool = False
+) -> logging.Logger:
     fmt = "%(asctime)s - %(levelname)s - %(message)s"
 
     # ⬇️ declare o tipo como Handler genérico
     handlers: List[logging.Handler] = [
-        logging.FileHandler(logfile or "rpa.log", "w", "utf-8"),
+        logging.FileHandler(logfile or "rpa.log", "a" if append else "w", "utf-8"),
     ]
     if debug:
         handlers.append(logging.StreamHandler(sys.stdout))
@@ -31,25 +64,246 @@ def setup_logger(debug: bool = False, logfile: Path | None = None) -> logging.Lo
 def main():
     ap = argparse.ArgumentParser(description="Scraper Portal da Transparência")
     ap.add_argument("--query", help="Nome, CPF ou NIS")
-    ap.add_argument("--out", default="beneficiarios.json")
+    ap.add_argument(
+        "--queries-file",
+        metavar="ARQ",
+        help="Arquivo com várias consultas (.txt, .csv, .ndjson; - para stdin)",
+    )
+    ap.add_argument("--out", help="Arquivo de saída (padrão: beneficiarios.<formato>)")
+    ap.add_argument(
+        "--format",
+        choices=FORMATOS,
+        default="json",
+        help="json (documento único) ou ndjson (um beneficiário por linha)",
+    )
+    ap.add_argument(
+        "--parcels",
+        choices=TABELA_FORMATOS,
+        help="Exporta também as parcelas numa tabela tipada (json/parcelas.<formato>)",
+    )
     ap.add_argument("--visible", action="store_true")
     ap.add_argument("--debug", action="store_true")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Quantidade de ChromeDrivers em paralelo (padrão: 1)",
+    )
+    ap.add_argument(
+        "--engine",
+        choices=("selenium", "http"),
+        default="selenium",
+        help="Motor de coleta: Chrome (selenium) ou HTTP puro (http)",
+    )
+    ap.add_argument(
+        "--benefit-workers",
+        type=int,
+        default=PARCELAS_CONCORRENCIA,
+        help="Benefícios buscados em paralelo por beneficiário",
+    )
+    ap.add_argument(
+        "--max-results",
+        type=int,
+        default=10,
+        help="Máximo de beneficiários a coletar (0 = todos os resultados)",
+    )
+    ap.add_argument(
+        "--page-size",
+        type=int,
+        default=TAMANHO_PAGINA_LISTA,
+        help="Resultados por página na busca",
+    )
+    ap.add_argument(
+        "--parcel-page-size",
+        type=int,
+        default=TAMANHO_PAGINA_PARCELAS,
+        help="Linhas por página ao buscar parcelas (offset é paginado)",
+    )
+    ap.add_argument(
+        "--screenshot",
+        choices=IMAGEM_FORMATOS,
+        default="base64",
+        help="base64 embutido no JSON ou arquivo png/jpeg/webp em <run>/png",
+    )
+    ap.add_argument(
+        "--no-screenshot",
+        action="store_true",
+        help="Não captura screenshot das fichas",
+    )
+    ap.add_argument(
+        "--rate",
+        type=float,
+        default=HTTP_TAXA_POR_HOST,
+        help="Máximo de requisições por segundo por host (0 desliga)",
+    )
+    ap.add_argument(
+        "--fixed-rate",
+        action="store_true",
+        help="Mantém o --rate fixo, sem recuar quando o portal estrangula",
+    )
+    ap.add_argument(
+        "--evidence-max-mb",
+        type=int,
+        default=EVIDENCIA_MAX_BYTES // 2**20,
+        help="Teto de evidências (HTML/PNG) por execução; acima disso descarta",
+    )
+    ap.add_argument(
+        "--lean",
+        action="store_true",
+        help="Chrome sem imagens, fontes e scripts de terceiros (carga 'eager')",
+    )
+    ap.add_argument(
+        "--block",
+        action="append",
+        metavar="PADRAO",
+        help="URL a bloquear no modo --lean (curinga *; repetível, substitui a lista padrão)",
+    )
+    ap.add_argument(
+        "--recycle-after",
+        type=int,
+        default=DRIVER_MAX_PAGINAS,
+        metavar="N",
+        help="Troca cada Chrome por um novo após N fichas (0 desliga)",
+    )
+    ap.add_argument(
+        "--recycle-rss-mb",
+        type=int,
+        default=DRIVER_MAX_RSS_MB,
+        metavar="MB",
+        help="Troca o Chrome quando seus processos passam de MB de RSS (0 desliga)",
+    )
+    ap.add_argument(
+        "--cache",
+        type=Path,
+        default=CACHE_PATH,
+        help=f"Cache SQLite das parcelas entre execuções (padrão: {CACHE_PATH})",
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Sempre consulta o portal, sem ler nem gravar o cache (nem cookies)",
+    )
+    ap.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=CACHE_MAX_BYTES // 2**20,
+        help="Tamanho máximo do cache; acima disso remove as menos usadas",
+    )
+    ap.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        help="Também grava as métricas (formato Prometheus) neste arquivo, "
+        "ex.: no diretório do textfile collector do node_exporter",
+    )
+    ap.add_argument(
+        "--resume",
+        metavar="RUN_DIR",
+        type=Path,
+        help="Retoma uma execução interrompida a partir do journal do RUN_DIR",
+    )
     args = ap.parse_args()
+    if args.query and args.queries_file:
+        ap.error("use --query ou --queries-file, não os dois")
 
-    run_dir = get_run_dir()
-    setup_logger(args.debug, logfile=run_dir / "rpa.log")
+    feitos: list = []
+    args.queries = le_consultas(args.queries_file) if args.queries_file else None
+    if args.resume:
+        run_dir = args.resume
+        parametros, feitos = le_journal(run_dir)
+        # a retomada usa a mesma consulta/paginação/saída da execução original
+        for k, v in parametros.items():
+            setattr(args, k, v)
+    else:
+        run_dir = get_run_dir()
+    setup_logger(args.debug, logfile=run_dir / "rpa.log", append=bool(args.resume))
+    ratelimit.configura(args.rate, adaptativo=not args.fixed_rate)
+    gerente.configura(args.recycle_after, args.recycle_rss_mb)
+    if feitos:
+        logging.getLogger("rpa").info(
+            "Retomando %s: %d beneficiários já coletados", run_dir, len(feitos)
+        )
     try:
-        json_out = run_dir / "json" / args.out
+        evidencias.configura(max_bytes=args.evidence_max_mb * 2**20)
+        cache.configura(None if args.no_cache else args.cache, args.cache_max_mb * 2**20)
+        json_out = run_dir / "json" / (args.out or f"beneficiarios.{args.format}")
+        sessao = None if args.no_cache else args.cache.with_name(SESSAO_ARQUIVO)
 
-        data = run(args.query, args.visible, base_dir=run_dir)
-        json_out.write_text(
-            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+        # em lote cada registro leva a consulta que o encontrou
+        consultas = args.queries or [args.query]
+        registros = coleta_lote(
+            consultas,
+            args.visible,
+            base_dir=run_dir,
+            workers=args.workers,
+            engine=args.engine,
+            benefit_workers=args.benefit_workers,
+            max_results=args.max_results or None,
+            page_size=args.page_size,
+            parcel_page_size=args.parcel_page_size,
+            screenshot=None if args.no_screenshot else args.screenshot,
+            pular={e["pessoa"] for e in feitos},
+            lean=args.lean,
+            block=args.block,
+            session_cache=sessao,
         )
+        # grava cada beneficiário assim que fica pronto (memória constante) e
+        # só depois confirma no journal
+        journal = Journal(run_dir, {k: getattr(args, k) for k in RETOMAVEIS})
+        inicio, total = time.monotonic(), 0
+        try:
+            with abre_saida(
+                json_out, args.format, args.queries or args.query, feitos
+            ) as saida, (
+                # na retomada a tabela é refeita com o que a saída confirmou
+                abre_tabela(
+                    run_dir / "json" / "parcelas",
+                    args.parcels,
+                    le_registros(json_out, feitos),
+                )
+                if args.parcels
+                else nullcontext()
+            ) as tabela:
+                for consulta, url, registro in registros:
+                    if args.queries:
+                        registro.consulta = consulta
+                    if tabela is not None:
+                        tabela.escreve(registro, url)
+                    journal.registra(pessoa_id(url), saida.escreve(registro, url))
+                    total += 1
+        finally:
+            journal.fecha()
         print(f"Salvo em {json_out}")
+        if args.queries:
+            minutos = max((time.monotonic() - inicio) / 60, 1e-9)
+            vazao = (
+                f"{len(consultas)} consultas, {total} beneficiários em "
+                f"{minutos:.1f} min ({len(consultas) / minutos:.1f} consultas/min)"
+            )
+            logging.getLogger("rpa").info("Lote: %s", vazao)
+            print(vazao)
     except Exception as e:
         logging.getLogger("rpa").exception("Falha geral")
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        evidencias.encerra()
+        cache.fecha()
+        logging.getLogger("rpa").info(waits.resumo())
+        _exporta_metricas(run_dir, args)
+
+
+def _exporta_metricas(run_dir: Path, args):
+    """`<run_dir>/metrics.json` + `metrics.prom` (e o `--metrics-textfile`)."""
+    try:
+        metricas.exporta(
+            run_dir,
+            args.metrics_textfile,
+            consulta=args.queries or args.query,
+            engine=args.engine,
+        )
+    except OSError as e:
+        logging.getLogger("rpa").warning("Não foi possível exportar métricas: %s", e)
+    logging.getLogger("rpa").info(metricas.resumo())
 
 
 if __name__ == "__main__":
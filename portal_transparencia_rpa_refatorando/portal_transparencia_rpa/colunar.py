@@ -0,0 +1,251 @@
+"""
+Exportação das parcelas numa tabela tipada e colunar (`--parcels`).
+
+Uma linha por parcela, com o id da pessoa e o segmento, competência como
+data (1º dia do mês), valor em centavos (inteiro) e UF/município como
+colunas de dicionário. As linhas são acumuladas em lotes de
+`LINHAS_POR_GRUPO` e gravadas a cada lote cheio (um row group no Parquet,
+um record batch no Arrow IPC), então a memória não cresce com a coleta.
+
+Parquet e Arrow só ficam legíveis com o rodapé gravado em `fecha()`, e o
+último lote só vai para o disco ali; por isso o `--resume` não aproveita a
+tabela da execução interrompida: ela é refeita a partir dos registros já
+confirmados na saída JSON/NDJSON (`recuperados`), que é a fonte da verdade.
+
+Parquet/Arrow dependem do `pyarrow`; sem ele a exportação cai para CSV.
+"""
+
+import csv, logging, re
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # opcional
+    pa = pq = None
+
+from .modelos import Beneficiario
+from .selectors import beneficio_rx
+from .scraper import pessoa_id
+
+logger = logging.getLogger("rpa")
+
+FORMATOS = ("parquet", "arrow", "csv")
+LINHAS_POR_GRUPO = 64 * 1024
+
+# (coluna, tipo) na ordem da tabela; "dict" = string codificada em dicionário
+COLUNAS = (
+    ("pessoa_id", "string"),
+    ("segmento", "dict"),
+    ("nis", "string"),
+    ("competencia", "date"),
+    ("mes_folha", "date"),
+    ("parcela", "int"),
+    ("valor_centavos", "int"),
+    ("uf", "dict"),
+    ("municipio", "dict"),
+    ("qtd_dependentes", "int"),
+)
+
+_MES_RX = re.compile(r"(\d{1,2})/(\d{4})")
+
+
+# --------------------------------------------------------------------------- #
+# Conversões                                                                  #
+# --------------------------------------------------------------------------- #
+
+
+def competencia(texto: Optional[str]) -> Optional[date]:
+    """Converte "12/2020" em date(2020, 12, 1)."""
+    m = _MES_RX.search(texto or "")
+    if not m or not 1 <= int(m.group(1)) <= 12:
+        return None
+    return date(int(m.group(2)), int(m.group(1)), 1)
+
+
+def centavos(texto: Optional[str]) -> Optional[int]:
+    """Converte "R$ 1.300,00" em 130000 (sem passar por float)."""
+    limpo = re.sub(r"[^\d,-]", "", texto or "")
+    if not any(c.isdigit() for c in limpo):
+        return None
+    negativo = limpo.startswith("-")
+    inteiro, _, fracao = limpo.replace("-", "").partition(",")
+    valor = int(inteiro or 0) * 100 + int((fracao + "00")[:2])
+    return -valor if negativo else valor
+
+
+def _inteiro(texto: Optional[str]) -> Optional[int]:
+    digitos = re.sub(r"\D", "", texto or "")
+    return int(digitos) if digitos else None
+
+
+def linhas(registro: Beneficiario, url: str) -> Iterator[dict]:
+    """Linhas da tabela de parcelas de um beneficiário."""
+    pessoa = pessoa_id(url)
+    for beneficio in registro.get("beneficios") or []:
+        m = beneficio_rx.search(beneficio.get("href") or "")
+        segmento = m.group(1) if m else ""
+        for p in beneficio.get("parcelas") or []:
+            pagamento = p.get("mes_folha") or p.get("mes_disponibilizacao")
+            yield dict(
+                pessoa_id=pessoa,
+                segmento=segmento,
+                nis=beneficio.get("nis", ""),
+                competencia=competencia(p.get("mes_ref") or pagamento),
+                mes_folha=competencia(pagamento),
+                parcela=_inteiro(p.get("parcela")),
+                valor_centavos=centavos(p.get("valor")),
+                uf=p.get("uf") or None,
+                municipio=p.get("municipio") or None,
+                qtd_dependentes=_inteiro(p.get("qtd_dependentes")),
+            )
+
+
+# --------------------------------------------------------------------------- #
+# Escritores                                                                  #
+# --------------------------------------------------------------------------- #
+
+
+class _Tabela:
+    """Acumula linhas e descarrega a cada `LINHAS_POR_GRUPO`."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.buffer: List[dict] = []
+        self.total = 0
+
+    def escreve(self, registro: Beneficiario, url: str):
+        for linha in linhas(registro, url):
+            self.buffer.append(linha)
+            if len(self.buffer) >= LINHAS_POR_GRUPO:
+                self._descarrega()
+
+    def _descarrega(self):
+        self.total += len(self.buffer)
+        self._grava(self.buffer)
+        self.buffer = []
+
+    def _grava(self, lote: List[dict]):
+        raise NotImplementedError
+
+    def fecha(self):
+        if self.buffer:
+            self._descarrega()
+
+
+class TabelaCsv(_Tabela):
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._f = path.open("w", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._f, [nome for nome, _ in COLUNAS])
+        self._csv.writeheader()
+
+    def _grava(self, lote: List[dict]):
+        self._csv.writerows(lote)
+        self._f.flush()
+
+    def fecha(self):
+        super().fecha()
+        self._f.close()
+
+
+class TabelaArrow(_Tabela):
+    """
+    Parquet (row groups, zstd) ou Arrow IPC (record batches). Os dicionários
+    de UF/município/segmento só crescem, então cada lote reaproveita os
+    índices dos anteriores (deltas no IPC).
+    """
+
+    _TIPOS = dict(
+        string=lambda: pa.string(),
+        dict=lambda: pa.dictionary(pa.int32(), pa.string()),
+        date=lambda: pa.date32(),
+        int=lambda: pa.int64(),
+    )
+
+    def __init__(self, path: Path, formato: str):
+        super().__init__(path)
+        self.schema = pa.schema(
+            [(nome, self._TIPOS[tipo]()) for nome, tipo in COLUNAS]
+        )
+        self.dicionarios = {nome: {} for nome, tipo in COLUNAS if tipo == "dict"}
+        if formato == "parquet":
+            self._w = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        else:
+            self._w = pa.ipc.new_file(
+                str(path),
+                self.schema,
+                options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+            )
+        self.formato = formato
+
+    def _coluna(self, nome: str, tipo, valores: list):
+        if nome not in self.dicionarios:
+            return pa.array(valores, tipo)
+        d = self.dicionarios[nome]
+        indices = [None if v is None else d.setdefault(v, len(d)) for v in valores]
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, pa.int32()), pa.array(list(d), pa.string())
+        )
+
+    def _grava(self, lote: List[dict]):
+        batch = pa.record_batch(
+            [
+                self._coluna(campo.name, campo.type, [l[campo.name] for l in lote])
+                for campo in self.schema
+            ],
+            schema=self.schema,
+        )
+        if self.formato == "parquet":
+            self._w.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._w.write_batch(batch)
+
+    def fecha(self):
+        super().fecha()
+        self._w.close()
+
+
+def _descarta_anterior(path: Path):
+    """
+    Remove a tabela `path` de uma execução anterior, em qualquer formato (sem
+    `pyarrow` ela pode ter saído em CSV).
+    """
+    for formato in FORMATOS:
+        path.with_suffix("." + formato).unlink(missing_ok=True)
+
+
+@contextmanager
+def abre_tabela(
+    path: Path, formato: str, recuperados: Iterable[Tuple[dict, str]] = ()
+):
+    """
+    Abre a tabela de parcelas em `path` (a extensão segue o formato). Sem
+    `pyarrow`, parquet/arrow viram CSV. Numa retomada `recuperados` são os
+    (registro, url) já confirmados na saída: a tabela anterior (que pode ter
+    ficado sem rodapé ou sem o último lote) é descartada e eles são regravados
+    antes das linhas novas, sem perder nem duplicar parcelas.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    if formato != "csv" and pa is None:
+        logger.warning("pyarrow não instalado, exportando parcelas em CSV")
+        formato = "csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _descarta_anterior(path)
+    path = path.with_suffix("." + formato)
+    tabela = TabelaCsv(path) if formato == "csv" else TabelaArrow(path, formato)
+    try:
+        n = 0
+        for registro, url in recuperados:
+            tabela.escreve(registro, url)
+            n += 1
+        if n:
+            logger.info("Tabela de parcelas refeita com %d beneficiários", n)
+        yield tabela
+    finally:
+        tabela.fecha()
+        logger.info("Tabela de parcelas: %d linhas em %s", tabela.total, path)
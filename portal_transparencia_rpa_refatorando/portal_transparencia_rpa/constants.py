@@ -10,6 +10,87 @@ load_dotenv(BASE_DIR / ".env")
 BASE_URL = os.getenv("BASE_URL", "https://portaldatransparencia.gov.br")
 BASE = BASE_URL
 LIST_ENDPOINT = f"{BASE_URL}/pessoa-fisica/busca/lista"
+TAMANHO_PAGINA_LISTA = 10
+
+# User-Agent usado tanto no Chrome quanto nas sessões HTTP
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120 Safari/537.36"
+)
+
+# Evidências (HTML + screenshot) gravadas em segundo plano
+EVIDENCIA_FILA = 32
+EVIDENCIA_MAX_BYTES = 200 * 1024 * 1024
+EVIDENCIA_GZIP = True
+
+# Janela do Chrome; a menor vale para o perfil leve sem screenshot
+JANELA = "1920,1080"
+JANELA_LEVE = "1024,768"
+# Bloqueados no perfil leve (CDP Network.setBlockedURLs, aceita curinga *)
+URLS_BLOQUEADAS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.webp",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*hotjar.com*",
+    "*barra.sistema.gov.br*",
+    "*vlibras.gov.br*",
+]
+
+# Pool de conexões HTTP (keep-alive) por sessão
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+HTTP_TIMEOUT = 30
+# Retry com backoff exponencial para 429/5xx
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+# Limite por host (req/s) e quantos benefícios buscar em paralelo por pessoa
+HTTP_TAXA_POR_HOST = 8.0
+HTTP_RAJADA_POR_HOST = 8
+PARCELAS_CONCORRENCIA = 4
+# Controle adaptativo (AIMD) do limite: piso da taxa (req/s), corte a cada sinal
+# de estrangulamento, latência média acima de N× a base conta como sinal e
+# quantas vezes repetir uma página de parcelas estrangulada antes de desistir
+HTTP_TAXA_MINIMA = 0.5
+HTTP_RECUO = 0.5
+HTTP_LATENCIA_FATOR = 3.0
+HTTP_REPETICOES_ESTRANGULADO = 3
+# Ciclo de vida do Chrome (ver `gerente`): recicla após N fichas ou acima de
+# N MB de RSS (chromedriver + Chrome + renderers), 0 desliga; timeout (s) da
+# sonda de vida, da carga de uma página e do `quit()` de um Chrome antigo
+# (depois disso a árvore de processos é morta)
+DRIVER_MAX_PAGINAS = 200
+DRIVER_MAX_RSS_MB = 1500
+DRIVER_SONDA_TIMEOUT = 5
+DRIVER_TIMEOUT_PAGINA = 60
+DRIVER_TIMEOUT_ENCERRA = 30
+# Linhas por página nos endpoints de parcelas (offset += tamanho)
+TAMANHO_PAGINA_PARCELAS = 1000
+
+# Cache em disco das respostas de parcelas (compartilhado entre execuções)
+CACHE_PATH = Path(os.getenv("RPA_CACHE", "test_data/cache/http.sqlite3"))
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Cookies do bootstrap (Chrome) reaproveitados entre execuções, ao lado do cache
+SESSAO_ARQUIVO = "sessao.json"
+SESSAO_TTL = 6 * 3600
+# Validade (s) por benefício; None = não expira (benefícios encerrados)
+CACHE_TTL_PADRAO = 24 * 3600
+CACHE_TTL = {
+    "auxilio-emergencial": None,
+    "auxilio-brasil": None,
+    "bolsa-familia": None,
+    "novo-bolsa-familia": 24 * 3600,
+    "safra": 7 * 24 * 3600,
+}
 
 # Colunas por benefício
 COLUNAS = {
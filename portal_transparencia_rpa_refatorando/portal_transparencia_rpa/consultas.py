@@ -0,0 +1,75 @@
+"""
+Leitura do arquivo de consultas do modo em lote (`--queries-file`).
+
+- `.txt` (ou stdin, `-`): uma consulta por linha; linhas vazias e `#` são
+  ignoradas.
+- `.csv`: a coluna `query`/`consulta`/`cpf`/`nis`/`nome` do cabeçalho, ou a
+  primeira coluna se nenhuma delas existir.
+- `.ndjson`/`.jsonl`: um objeto por linha com `query` ou `consulta` (ou uma
+  string JSON pura).
+
+Consultas repetidas são descartadas, mantendo a ordem do arquivo.
+"""
+
+import csv, io, json, sys
+from pathlib import Path
+from typing import Iterable, List
+
+COLUNAS = ("query", "consulta", "cpf", "nis", "nome")
+
+
+def _txt(linhas: Iterable[str]) -> Iterable[str]:
+    for linha in linhas:
+        linha = linha.strip()
+        if linha and not linha.startswith("#"):
+            yield linha
+
+
+def _csv(texto: str) -> Iterable[str]:
+    linhas = list(csv.reader(io.StringIO(texto)))
+    cabecalho = [c.strip().lower() for c in linhas[0]] if linhas else []
+    for nome in COLUNAS:
+        if nome in cabecalho:
+            coluna, linhas = cabecalho.index(nome), linhas[1:]
+            break
+    else:
+        # sem cabeçalho conhecido: 1ª coluna de todas as linhas
+        coluna = 0
+    for linha in linhas:
+        if len(linha) > coluna:
+            yield linha[coluna]
+
+
+def _ndjson(linhas: Iterable[str]) -> Iterable[str]:
+    for n, linha in enumerate(linhas, 1):
+        if not linha.strip():
+            continue
+        obj = json.loads(linha)
+        if isinstance(obj, dict):
+            obj = obj.get("query", obj.get("consulta"))
+        if not isinstance(obj, str):
+            raise ValueError(f"Linha {n}: esperado 'query' ou 'consulta'")
+        yield obj
+
+
+def le_consultas(origem: str) -> List[str]:
+    """Consultas de `origem` (caminho ou `-` para stdin), sem repetições."""
+    if origem == "-":
+        texto, sufixo = sys.stdin.read(), ".txt"
+    else:
+        path = Path(origem)
+        texto, sufixo = path.read_text(encoding="utf-8-sig"), path.suffix.lower()
+
+    if sufixo == ".csv":
+        brutas = _csv(texto)
+    elif sufixo in (".ndjson", ".jsonl"):
+        brutas = _ndjson(texto.splitlines())
+    else:
+        brutas = _txt(texto.splitlines())
+
+    vistas: dict = {}
+    for consulta in brutas:
+        consulta = consulta.strip()
+        if consulta:
+            vistas.setdefault(consulta, None)
+    return list(vistas)
@@ -1,17 +1,66 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from typing import Iterable, Optional
+
+from .constants import JANELA, JANELA_LEVE, URLS_BLOQUEADAS, USER_AGENT
+
+# Perfil "leve" (ver `configura`): sem imagens, fontes e scripts de terceiros,
+# e `driver.get` volta no DOMContentLoaded (pageLoadStrategy="eager").
+LEVE = False
+BLOQUEIOS: list = list(URLS_BLOQUEADAS)
+TAMANHO_JANELA = JANELA
+
+
+def configura(
+    leve: bool, bloqueios: Optional[Iterable[str]] = None, screenshot: bool = True
+):
+    """
+    Define o perfil dos próximos `build`. No perfil leve, sem screenshot, a
+    janela também encolhe (`JANELA_LEVE`): menos área para layout e pintura.
+    """
+    global LEVE, BLOQUEIOS, TAMANHO_JANELA
+    LEVE = leve
+    BLOQUEIOS = list(URLS_BLOQUEADAS if bloqueios is None else bloqueios)
+    TAMANHO_JANELA = JANELA_LEVE if leve and not screenshot else JANELA
 
 
 def build(visible: bool = False) -> webdriver.Chrome:
     opts = Options()
     if not visible:
         opts.add_argument("--headless=new")
-    opts.add_argument("--window-size=1920,1080")
+    opts.add_argument(f"--window-size={TAMANHO_JANELA}")
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/120 Safari/537.36"
+    opts.add_argument(f"--user-agent={USER_AGENT}")
+    if LEVE:
+        opts.page_load_strategy = "eager"
+        opts.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+    driver = webdriver.Chrome(options=opts)
+    if LEVE and BLOQUEIOS:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOQUEIOS})
+    return driver
+
+
+def metricas_carga(driver) -> dict:
+    """
+    Tempo de carga (ms) e bytes transferidos da página atual, pela
+    Navigation/Resource Timing API do próprio Chrome.
+    """
+    return driver.execute_script(
+        """
+        const nav = performance.getEntriesByType('navigation')[0] || {};
+        const recursos = performance.getEntriesByType('resource');
+        let bytes = nav.transferSize || 0;
+        for (const r of recursos) bytes += r.transferSize || 0;
+        return {
+            ms: Math.round(nav.domContentLoadedEventEnd || 0),
+            ms_load: Math.round(nav.loadEventEnd || 0),
+            bytes: bytes,
+            recursos: recursos.length,
+        };
+        """
     )
-    return webdriver.Chrome(options=opts)
@@ -0,0 +1,70 @@
+"""
+Registro declarativo dos benefícios: como as linhas de parcelas (JSON do
+endpoint ou células da tabela HTML) viram o formato de saída.
+
+Cada esquema é derivado de `constants.COLUNAS`: a ordem das colunas pedidas
+à API é a mesma das células da tabela HTML, e `CAMPOS_SAIDA` dá o nome de
+cada coluna na saída. As linhas viram `modelos.Parcela`, que compartilham a
+tupla `campos` do esquema. Um benefício novo é uma entrada em `COLUNAS` (e, se
+trouxer coluna inédita, uma em `CAMPOS_SAIDA`).
+"""
+
+from operator import itemgetter
+from typing import Dict, List, Sequence
+
+from .constants import COLUNAS
+from .modelos import Parcela
+
+# coluna da API -> campo na saída
+CAMPOS_SAIDA = {
+    "mesDisponibilizacao": "mes_disponibilizacao",
+    "numeroParcela": "parcela",
+    "mesFolha": "mes_folha",
+    "mesReferencia": "mes_ref",
+    "uf": "uf",
+    "municipio": "municipio",
+    "enquadramento": "enquadramento",
+    "quantidadeDependentes": "qtd_dependentes",
+    "valor": "valor",
+    "observacao": "observacao",
+}
+
+
+class Esquema:
+    """Colunas de um benefício e a conversão de páginas inteiras de linhas."""
+
+    __slots__ = ("segmento", "colunas", "campos", "_pega")
+
+    def __init__(self, segmento: str, colunas: Sequence[str]):
+        self.segmento = segmento
+        self.colunas = tuple(colunas)
+        self.campos = tuple(CAMPOS_SAIDA[c] for c in self.colunas)
+        pega = itemgetter(*self.colunas)
+        # com uma coluna só o itemgetter devolve o valor, não uma tupla
+        self._pega = pega if len(self.colunas) > 1 else lambda row: (pega(row),)
+
+    def de_json(self, data: List[Dict]) -> List[Parcela]:
+        """Linhas do endpoint JSON -> parcelas (KeyError se faltar coluna)."""
+        campos, pega, nova = self.campos, self._pega, Parcela.de_textos
+        return [nova(campos, pega(row)) for row in data]
+
+    def de_html(self, linhas: List[List[str]]) -> List[Parcela]:
+        """Células da tabela HTML -> parcelas; linhas curtas são ignoradas."""
+        campos, n, nova = self.campos, len(self.campos), Parcela.de_textos
+        return [nova(campos, tds[:n]) for tds in linhas if len(tds) >= n]
+
+
+ESQUEMAS: Dict[str, Esquema] = {
+    segmento: Esquema(segmento, colunas.split(","))
+    for segmento, colunas in COLUNAS.items()
+}
+
+
+def normaliza_json(segmento: str, data: List[Dict]) -> List[Parcela]:
+    esquema = ESQUEMAS.get(segmento)
+    return esquema.de_json(data) if esquema else []
+
+
+def normaliza_html(segmento: str, linhas: List[List[str]]) -> List[Parcela]:
+    esquema = ESQUEMAS.get(segmento)
+    return esquema.de_html(linhas) if esquema else []
@@ -0,0 +1,182 @@
+"""
+Gravação de evidências (HTML + screenshot) fora da thread de coleta.
+
+A thread que raspa só copia `page_source` e os bytes do screenshot para a
+memória e enfileira; uma thread escritora comprime o HTML (gzip) e grava os
+arquivos em `html/` e `png/`. A fila é limitada: cheia, a evidência nova é
+descartada (a coleta nunca espera pelo disco). Há também um teto de bytes
+por execução; passado o teto, nem a captura é feita.
+"""
+
+import atexit, gzip, logging, queue, threading, uuid
+from pathlib import Path
+from typing import Optional
+
+from . import metricas
+from .constants import EVIDENCIA_FILA, EVIDENCIA_GZIP, EVIDENCIA_MAX_BYTES
+
+logger = logging.getLogger("rpa")
+
+
+class Escritor:
+    """Thread única que consome a fila de evidências."""
+
+    def __init__(self, tamanho_fila: int, max_bytes: int, comprime: bool):
+        self.fila: "queue.Queue" = queue.Queue(maxsize=tamanho_fila)
+        self.max_bytes = max_bytes
+        self.comprime = comprime
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.gravadas = self.descartadas = 0
+        self._avisou_teto = False
+        self.thread = threading.Thread(
+            target=self._laco, name="evidencias", daemon=True
+        )
+        self.thread.start()
+
+    def cabe(self) -> bool:
+        """Ainda há espaço no teto da execução?"""
+        with self.lock:
+            if self.bytes < self.max_bytes:
+                return True
+            if not self._avisou_teto:
+                self._avisou_teto = True
+                logger.warning(
+                    "Teto de evidências (%d MB) atingido, novas serão descartadas",
+                    self.max_bytes // 2**20,
+                )
+            self.descartadas += 1
+        metricas.conta("rpa_evidencias_total", resultado="teto")
+        return False
+
+    def enfileira(
+        self, base: Path, nome: str, html: Optional[str], png: Optional[bytes]
+    ) -> bool:
+        dados = html.encode("utf-8") if html is not None else None
+        with self.lock:
+            # reserva já na captura, para o teto valer mesmo com a fila cheia
+            self.bytes += len(dados or b"") + len(png or b"")
+        try:
+            self.fila.put_nowait((base, nome, dados, png))
+        except queue.Full:
+            with self.lock:
+                self.descartadas += 1
+                self.bytes -= len(dados or b"") + len(png or b"")
+            metricas.conta("rpa_evidencias_total", resultado="fila_cheia")
+            logger.warning("Fila de evidências cheia, descartando %s", nome)
+            return False
+        return True
+
+    def _laco(self):
+        while True:
+            item = self.fila.get()
+            try:
+                if item is None:
+                    return
+                with metricas.span("evidencia"):
+                    n = self._grava(*item)
+                metricas.conta("rpa_evidencias_total", resultado="gravada")
+                metricas.conta("rpa_evidencias_bytes_total", n)
+            except Exception as e:
+                logger.error("Erro ao gravar evidência: %s", e)
+            finally:
+                self.fila.task_done()
+
+    def _grava(
+        self, base: Path, nome: str, html: Optional[bytes], png: Optional[bytes]
+    ) -> int:
+        """Grava HTML e PNG; devolve os bytes escritos."""
+        n = 0
+        if html is not None:
+            if self.comprime:
+                html_path = base / "html" / f"{nome}.html.gz"
+                html = gzip.compress(html, compresslevel=6)
+            else:
+                html_path = base / "html" / f"{nome}.html"
+            html_path.parent.mkdir(parents=True, exist_ok=True)
+            n += html_path.write_bytes(html)
+        if png is not None:
+            png_path = base / "png" / f"{nome}.png"
+            png_path.parent.mkdir(parents=True, exist_ok=True)
+            n += png_path.write_bytes(png)
+        with self.lock:
+            self.gravadas += 1
+        logger.info("Evidência salva: %s", nome)
+        return n
+
+    def encerra(self):
+        """Espera a fila esvaziar e para a thread."""
+        self.fila.put(None)
+        self.thread.join()
+        if self.descartadas:
+            logger.warning(
+                "Evidências: %d gravadas, %d descartadas",
+                self.gravadas,
+                self.descartadas,
+            )
+
+
+_escritor: Escritor | None = None
+_lock = threading.Lock()
+_config = dict(
+    tamanho_fila=EVIDENCIA_FILA, max_bytes=EVIDENCIA_MAX_BYTES, comprime=EVIDENCIA_GZIP
+)
+
+
+def configura(
+    tamanho_fila: int = EVIDENCIA_FILA,
+    max_bytes: int = EVIDENCIA_MAX_BYTES,
+    comprime: bool = EVIDENCIA_GZIP,
+):
+    """Parâmetros do próximo escritor (vale a partir da próxima evidência)."""
+    encerra()
+    _config.update(tamanho_fila=tamanho_fila, max_bytes=max_bytes, comprime=comprime)
+
+
+def escritor() -> Escritor:
+    global _escritor
+    with _lock:
+        if _escritor is None:
+            _escritor = Escritor(**_config)
+            atexit.register(encerra)
+        return _escritor
+
+
+def encerra():
+    """Grava o que ainda estiver na fila e encerra o escritor (fim da execução)."""
+    global _escritor
+    with _lock:
+        e, _escritor = _escritor, None
+    if e is not None:
+        e.encerra()
+
+
+def salva(
+    base: Path,
+    prefixo: str,
+    html: Optional[str] = None,
+    png: Optional[bytes] = None,
+) -> Optional[str]:
+    """Enfileira uma evidência já capturada; devolve o nome ou None se descartada."""
+    esc = escritor()
+    if not esc.cabe():
+        return None
+    return _enfileira(esc, base, prefixo, html, png)
+
+
+def _enfileira(esc: Escritor, base: Path, prefixo: str, html, png) -> Optional[str]:
+    nome = f"{prefixo}_{uuid.uuid4().hex[:8]}"
+    return nome if esc.enfileira(base, nome, html, png) else None
+
+
+def captura(driver, prefixo: str, base: Path) -> Optional[str]:
+    """
+    Copia HTML e screenshot do `driver` para a memória e enfileira. Não faz
+    nenhuma chamada ao navegador se o teto da execução já foi atingido.
+    """
+    esc = escritor()
+    if not esc.cabe():
+        return None
+    return _enfileira(
+        esc, base, prefixo, driver.page_source, driver.get_screenshot_as_png()
+    )
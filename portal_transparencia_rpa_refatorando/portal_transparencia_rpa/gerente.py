@@ -0,0 +1,317 @@
+"""
+Ciclo de vida dos ChromeDrivers: reciclagem, sonda de vida e recuperação.
+
+`ChromeGerenciado` se comporta como o `webdriver.Chrome` que ele envolve
+(atributos e métodos são repassados ao Chrome atual), então pode ser
+entregue a `scraper` sem mudança nenhuma. Entre um beneficiário e outro
+(`usado`) ele troca o Chrome por um novo depois de `max_paginas` fichas ou
+quando a árvore de processos do Chrome passa de `max_rss_mb`; o substituto
+sobe em segundo plano um pouco antes (`PREAQUECE`), então a troca é
+instantânea. O antigo é encerrado numa thread própria, com prazo
+(`DRIVER_TIMEOUT_ENCERRA`, depois disso a árvore de processos é morta): um
+`quit()` travado não atrasa o próximo pré-aquecimento, e o `quit()` do
+gerente espera esses encerramentos antes de voltar, então nenhum Chrome fica
+órfão quando o processo termina. `vivo` é uma sonda barata
+(processo do chromedriver + `return 1` com timeout) para distinguir um erro
+da página de uma sessão morta ou travada; `renova` troca o Chrome na hora.
+"""
+
+import logging, os, signal, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from . import metricas
+from .constants import (
+    DRIVER_MAX_PAGINAS,
+    DRIVER_MAX_RSS_MB,
+    DRIVER_SONDA_TIMEOUT,
+    DRIVER_TIMEOUT_ENCERRA,
+    DRIVER_TIMEOUT_PAGINA,
+)
+from .driver import build
+
+logger = logging.getLogger("rpa")
+
+# fração do limite (fichas ou RSS) a partir da qual o substituto já sobe
+PREAQUECE = 0.9
+
+MAX_PAGINAS = DRIVER_MAX_PAGINAS
+MAX_RSS_MB = DRIVER_MAX_RSS_MB
+
+# pré-aquecimentos em segundo plano, compartilhado (os encerramentos têm
+# threads próprias, ver `ChromeGerenciado._encerra_em_fundo`)
+_fundo: ThreadPoolExecutor | None = None
+_fundo_lock = threading.Lock()
+
+
+def configura(
+    max_paginas: int = DRIVER_MAX_PAGINAS, max_rss_mb: int = DRIVER_MAX_RSS_MB
+):
+    """Limites dos próximos `ChromeGerenciado` (0 desliga cada um)."""
+    global MAX_PAGINAS, MAX_RSS_MB
+    MAX_PAGINAS = max_paginas
+    MAX_RSS_MB = max_rss_mb
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _fundo
+    with _fundo_lock:
+        if _fundo is None:
+            _fundo = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chrome")
+        return _fundo
+
+
+# --------------------------------------------------------------------------- #
+# Memória da árvore de processos                                              #
+# --------------------------------------------------------------------------- #
+
+
+def _filhos() -> dict:
+    """pid -> [pids filhos], lido de /proc (vazio fora do Linux)."""
+    filhos: dict = {}
+    try:
+        pids = [p for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return filhos
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                # o nome (2º campo) pode ter espaços: o ppid vem depois do ")"
+                ppid = int(f.read().rsplit(b")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        filhos.setdefault(ppid, []).append(int(pid))
+    return filhos
+
+
+def rss_arvore(pid: int) -> Optional[float]:
+    """
+    RSS somado (MB) do processo `pid` e de todos os descendentes (o
+    chromedriver, o Chrome e seus renderers). None se não der para medir.
+    """
+    filhos = _filhos()
+    if not filhos:
+        return None
+    pagina = os.sysconf("SC_PAGE_SIZE")
+    total, pilha = 0, [pid]
+    while pilha:
+        atual = pilha.pop()
+        try:
+            with open(f"/proc/{atual}/statm", "rb") as f:
+                total += int(f.read().split()[1]) * pagina
+        except (OSError, ValueError, IndexError):
+            continue
+        pilha.extend(filhos.get(atual, ()))
+    return total / 2**20
+
+
+def _processo(driver):
+    """`Popen` do chromedriver, se o driver for local."""
+    return getattr(getattr(driver, "service", None), "process", None)
+
+
+# --------------------------------------------------------------------------- #
+# Chrome gerenciado                                                           #
+# --------------------------------------------------------------------------- #
+
+
+class ChromeGerenciado:
+    """
+    Chrome com reciclagem e recuperação. Uso por uma thread de cada vez (como
+    qualquer WebDriver); `usado()` ao fim de cada beneficiário e `renova()`
+    quando `vivo()` disser que a sessão morreu.
+    """
+
+    def __init__(
+        self,
+        visible: bool = False,
+        nome: str = "chrome",
+        fabrica: Callable[[bool], object] = build,
+        max_paginas: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+    ):
+        self.visible = visible
+        self.nome = nome
+        self.fabrica = fabrica
+        self.max_paginas = MAX_PAGINAS if max_paginas is None else max_paginas
+        self.max_rss_mb = MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self.paginas = 0
+        self.reciclagens = 0
+        self._reserva: Optional[Future] = None
+        self._encerrando: List[threading.Thread] = []
+        self.atual = self._novo()
+
+    def __getattr__(self, nome: str):
+        # só chega aqui o que não é do gerente: vai para o WebDriver atual
+        if nome == "atual":
+            raise AttributeError(nome)
+        return getattr(self.atual, nome)
+
+    def __repr__(self):
+        return f"<ChromeGerenciado {self.nome} paginas={self.paginas}>"
+
+    def _novo(self):
+        with metricas.span("chrome_inicio"):
+            driver = self.fabrica(self.visible)
+        try:
+            # página travada vira TimeoutException em vez de prender o worker
+            driver.set_page_load_timeout(DRIVER_TIMEOUT_PAGINA)
+        except Exception as e:
+            logger.debug("Sem timeout de carga no driver %s: %s", self.nome, e)
+        return driver
+
+    # ---- saúde ------------------------------------------------------------
+
+    def vivo(self, timeout: float = DRIVER_SONDA_TIMEOUT) -> bool:
+        """
+        Sonda de vida: o chromedriver ainda roda e o Chrome responde a um
+        `return 1` em até `timeout` s (uma sessão travada não responde).
+        """
+        processo = _processo(self.atual)
+        if processo is not None and processo.poll() is not None:
+            return False
+        resposta: list = []
+
+        def sonda():
+            try:
+                resposta.append(self.atual.execute_script("return 1;") == 1)
+            except Exception:
+                resposta.append(False)
+
+        t = threading.Thread(target=sonda, name=f"sonda-{self.nome}", daemon=True)
+        t.start()
+        t.join(timeout)
+        return bool(resposta and resposta[0])
+
+    def rss_mb(self) -> Optional[float]:
+        processo = _processo(self.atual)
+        return rss_arvore(processo.pid) if processo is not None else None
+
+    # ---- reciclagem -------------------------------------------------------
+
+    def usado(self):
+        """
+        Conta uma ficha; perto dos limites sobe o substituto em segundo plano
+        e, ao atingi-los, troca o Chrome.
+        """
+        self.paginas += 1
+        rss = self.rss_mb() if self.max_rss_mb else None
+        motivo = None
+        if self.max_paginas and self.paginas >= self.max_paginas:
+            motivo = "paginas"
+        elif rss is not None and rss >= self.max_rss_mb:
+            motivo = "memoria"
+        if motivo:
+            logger.info(
+                "Reciclando %s após %d fichas (%s MB)",
+                self.nome,
+                self.paginas,
+                f"{rss:.0f}" if rss is not None else "?",
+            )
+            self.renova(motivo)
+        elif (
+            self.max_paginas
+            and self.paginas >= min(self.max_paginas * PREAQUECE, self.max_paginas - 1)
+        ) or (rss is not None and rss >= self.max_rss_mb * PREAQUECE):
+            self._preaquece()
+
+    def _preaquece(self):
+        if self._reserva is None:
+            logger.debug("Pré-aquecendo substituto de %s", self.nome)
+            self._reserva = _executor().submit(self._novo)
+
+    def renova(self, motivo: str = "morto"):
+        """
+        Troca o Chrome atual pelo substituto pré-aquecido (ou por um novo) e
+        encerra o antigo em segundo plano. A sessão HTTP associada (ver
+        `session`) é a deste gerente e continua valendo: os cookies do novo
+        Chrome são copiados na próxima sincronização.
+        """
+        reserva, self._reserva = self._reserva, None
+        novo = None
+        if reserva is not None:
+            try:
+                novo = reserva.result()
+            except Exception as e:
+                logger.warning("Substituto de %s não subiu: %s", self.nome, e)
+        if novo is None:
+            novo = self._novo()
+        antigo, self.atual = self.atual, novo
+        self.paginas = 0
+        self.reciclagens += 1
+        metricas.conta("rpa_chrome_reciclagens_total", motivo=motivo)
+        self._encerra_em_fundo(antigo)
+
+    def _encerra_em_fundo(self, driver):
+        """`_encerra` numa thread guardada no gerente (esperada no `quit`)."""
+        self._encerrando = [t for t in self._encerrando if t.is_alive()]
+        t = threading.Thread(
+            target=_encerra,
+            args=(driver, self.nome),
+            name=f"encerra-{self.nome}",
+            daemon=True,
+        )
+        t.start()
+        self._encerrando.append(t)
+
+    def quit(self):
+        """
+        Encerra o Chrome atual e o substituto (esperando ele subir, se estiver
+        subindo) e espera os encerramentos pendentes, cada um limitado a
+        `DRIVER_TIMEOUT_ENCERRA` (ver `_encerra`).
+        """
+        prazo = DRIVER_TIMEOUT_ENCERRA + 1
+        reserva, self._reserva = self._reserva, None
+        if reserva is not None:
+            try:
+                self._encerra_em_fundo(reserva.result(timeout=prazo))
+            except Exception as e:
+                logger.warning("Substituto de %s não subiu: %s", self.nome, e)
+        self._encerra_em_fundo(self.atual)
+        limite = time.monotonic() + prazo
+        for t in self._encerrando:
+            t.join(max(0.0, limite - time.monotonic()))
+        self._encerrando = [t for t in self._encerrando if t.is_alive()]
+
+
+def _mata_arvore(pid: int):
+    """SIGKILL no processo `pid` e em todos os descendentes."""
+    filhos = _filhos()
+    pilha, arvore = [pid], []
+    while pilha:
+        atual = pilha.pop()
+        arvore.append(atual)
+        pilha.extend(filhos.get(atual, ()))
+    for alvo in reversed(arvore):
+        try:
+            os.kill(alvo, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _encerra(driver, nome: str, timeout: Optional[float] = None):
+    """
+    `quit()` do driver com prazo (padrão `DRIVER_TIMEOUT_ENCERRA`); se travar,
+    mata o chromedriver e o Chrome (a thread do `quit()` é daemon e fica para
+    trás).
+    """
+    timeout = DRIVER_TIMEOUT_ENCERRA if timeout is None else timeout
+
+    def sai():
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("Erro ao encerrar Chrome antigo de %s: %s", nome, e)
+
+    t = threading.Thread(target=sai, name=f"quit-{nome}", daemon=True)
+    t.start()
+    t.join(timeout)
+    if t.is_alive():
+        logger.warning(
+            "Chrome antigo de %s não encerrou em %ss, matando", nome, timeout
+        )
+        metricas.conta("rpa_chrome_encerramentos_forcados_total")
+        processo = _processo(driver)
+        if processo is not None:
+            _mata_arvore(processo.pid)
+
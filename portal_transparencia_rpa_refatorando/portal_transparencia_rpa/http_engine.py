@@ -0,0 +1,292 @@
+"""
+Motor de coleta via HTTP puro (`--engine http`).
+
+Lista e ficha são baixadas por uma sessão com pool de conexões e extraídas
+com `parsers`; as parcelas vêm direto dos endpoints `/beneficios/.../resultado`.
+O Chrome só é iniciado sob demanda: para obter cookies (bootstrap) ou quando
+uma página não pôde ser extraída do HTML estático. Os cookies do bootstrap
+ficam salvos em disco; com eles ainda válidos a execução nem abre o Chrome.
+"""
+
+import logging, threading
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import requests
+
+from . import evidencias, metricas, parsers, ratelimit, scraper
+from .modelos import Beneficiario, Parcela
+from .constants import (
+    BASE,
+    HTTP_REPETICOES_ESTRANGULADO,
+    HTTP_TIMEOUT,
+    TAMANHO_PAGINA_LISTA,
+)
+from .driver import build as new_driver
+from .gerente import ChromeGerenciado
+from .selectors import beneficio_rx, pessoa_rx
+from .session import (
+    aplica_cookies,
+    associa_sessao,
+    carrega_cookies,
+    fecha_sessao,
+    salva_cookies,
+    sincroniza_cookies,
+    texto_html,
+)
+
+logger = logging.getLogger("rpa")
+
+
+class ChromeSobDemanda:
+    """
+    ChromeDriver criado apenas no primeiro uso; acesso serializado por `lock`.
+    Se a sessão morrer entre um uso e outro, `get` sobe um Chrome novo (ver
+    `gerente`). `cookies_path` guarda o resultado do bootstrap para as
+    próximas execuções.
+    """
+
+    def __init__(
+        self, visible: bool, sess: requests.Session, cookies_path: Path | None = None
+    ):
+        self.visible = visible
+        self.sess = sess
+        self.cookies_path = cookies_path
+        self.lock = threading.RLock()
+        self._driver = None
+        # incrementa a cada bootstrap; evita que várias threads que falharam
+        # com os mesmos cookies refaçam o bootstrap uma atrás da outra
+        self.geracao = 0
+
+    def aquece(self) -> bool:
+        """Carrega na sessão os cookies de um bootstrap anterior, se válidos."""
+        dados = carrega_cookies(self.cookies_path)
+        if dados is None:
+            return False
+        aplica_cookies(self.sess, dados)
+        logger.info(
+            "Cookies do bootstrap anterior reaproveitados (%d)", len(dados["cookies"])
+        )
+        return True
+
+    def get(self) -> ChromeGerenciado:
+        with self.lock:
+            if self._driver is None:
+                logger.info("Iniciando Chrome sob demanda")
+                self._driver = ChromeGerenciado(self.visible, fabrica=new_driver)
+                associa_sessao(self._driver, self.sess)
+            elif not self._driver.vivo():
+                logger.warning("Chrome sob demanda sem resposta, reiniciando")
+                self._driver.renova()
+            return self._driver
+
+    def bootstrap(self, geracao: Optional[int] = None):
+        """
+        Abre o portal no Chrome, fecha a barra de cookies e copia os cookies
+        para a sessão HTTP (e para o disco). Com `geracao` informada, não faz
+        nada se outro bootstrap já aconteceu depois dela.
+        """
+        with self.lock:
+            if geracao is not None and geracao != self.geracao:
+                return
+            driver = self.get()
+            metricas.conta("rpa_fallback_total", para="bootstrap")
+            scraper.navega(driver, BASE)
+            scraper.espera_dom(driver)
+            driver.execute_script(
+                "const b = document.getElementById('cookiebar_close'); if (b) b.click();"
+            )
+            sincroniza_cookies(driver)
+            if self.cookies_path is not None:
+                salva_cookies(
+                    self.cookies_path,
+                    driver.get_cookies(),
+                    self.sess.headers.get("User-Agent", ""),
+                )
+            self.geracao += 1
+
+    def quit(self):
+        with self.lock:
+            if self._driver is not None:
+                fecha_sessao(self._driver)
+                self._driver.quit()
+                self._driver = None
+
+
+def salva_html(html: str, prefixo: str, base_dir: Path | None = None):
+    """Evidência do motor HTTP: só o HTML (não há screenshot sem navegador)."""
+    evidencias.salva(base_dir or scraper.RUN_DIR or Path("."), prefixo, html=html)
+
+
+def _baixa_lista(sess: requests.Session, url: str) -> requests.Response:
+    """
+    GET de uma página da lista. Com 429/503 (já repetidos pelo urllib3) ou o
+    portal estrangulando (ver `ratelimit`), espera a calma e repete a página,
+    como `json_api._baixa`: uma página perdida encerraria a listagem cedo.
+    """
+    for tentativa in range(HTTP_REPETICOES_ESTRANGULADO + 1):
+        resp = sess.get(url, timeout=HTTP_TIMEOUT)
+        if (
+            resp.ok
+            or tentativa == HTTP_REPETICOES_ESTRANGULADO
+            or not (resp.status_code in (429, 503) or ratelimit.estrangulado(url))
+        ):
+            return resp
+        metricas.conta("rpa_ratelimit_repeticoes_total", segmento="lista")
+        pausa = ratelimit.esfria(url)
+        logger.info(
+            "Lista estrangulada (%d), repetida após %.1f s", resp.status_code, pausa
+        )
+
+
+def itera_beneficiarios(
+    sess: requests.Session,
+    chrome: ChromeSobDemanda,
+    query: Optional[str],
+    max_results: Optional[int] = None,
+    page_size: int = TAMANHO_PAGINA_LISTA,
+    base_dir: Path | None = None,
+) -> Iterator[str]:
+    """
+    Mesma saída de `scraper.itera_beneficiarios`, tentando primeiro sem Chrome.
+    Se a 1ª página não vier renderizada no HTML estático, as demais também
+    são lidas pelo Chrome. Só uma página 200 sem links encerra a listagem; uma
+    página seguinte que falhe mesmo após as repetições levanta `HTTPError`.
+    """
+    via_chrome = False
+
+    def busca_pagina(pagina: int) -> List[str]:
+        nonlocal via_chrome
+        if not via_chrome:
+            url = scraper.url_lista_beneficiarios(query, pagina, page_size)
+            with metricas.span("lista"):
+                resp = _baixa_lista(sess, url)
+                if not resp.ok and pagina > 1:
+                    resp.raise_for_status()
+                html = texto_html(resp)
+                links = parsers.extrai_links(html) if resp.ok else []
+            if links or pagina > 1:
+                if pagina == 1:
+                    salva_html(html, "sucesso_lista", base_dir)
+                return links
+            # a lista costuma ser montada via JS (reCAPTCHA); nesse caso vai de Chrome
+            logger.info("Lista não veio no HTML estático, usando Chrome")
+            metricas.conta("rpa_fallback_total", para="chrome")
+            via_chrome = True
+
+        with chrome.lock:
+            driver = chrome.get()
+            links = scraper._pagina_lista(driver, query, pagina, page_size)
+            sincroniza_cookies(driver)
+        return links
+
+    return scraper.pagina_resultados(busca_pagina, max_results, page_size)
+
+
+def busca_beneficiarios(
+    sess: requests.Session,
+    chrome: ChromeSobDemanda,
+    query: Optional[str],
+    base_dir: Path | None = None,
+    max_results: Optional[int] = 10,
+    page_size: int = TAMANHO_PAGINA_LISTA,
+) -> List[str]:
+    """Mesma saída de `scraper.busca_beneficiarios`, tentando primeiro sem Chrome."""
+    return list(
+        itera_beneficiarios(sess, chrome, query, max_results, page_size, base_dir)
+    )
+
+
+def _precisa_bootstrap(e: Exception, url: str) -> bool:
+    """
+    401/403 ou corpo não-JSON indicam sessão sem os cookies do portal, a não
+    ser que o portal esteja estrangulando: aí o HTML é a página de bloqueio e
+    um bootstrap no Chrome só aumentaria a carga.
+    """
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code in (401, 403)
+    return isinstance(e, ValueError) and not ratelimit.estrangulado(url)
+
+
+def mapea_beneficio(
+    sess: requests.Session,
+    chrome: ChromeSobDemanda,
+    url: str,
+    beneficiario_id: str,
+    referer: str | None = None,
+) -> List[Parcela]:
+    """
+    Parcelas via JSON; refaz o bootstrap (ou espera o portal parar de
+    estrangular) uma vez e, por fim, cai no Chrome.
+    """
+    m = beneficio_rx.search(url)
+    segmento = m.group(1) if m else ""
+    sk_beneficiario = m.group(2) if m else ""
+
+    for tentativa in range(2):
+        geracao = chrome.geracao
+        try:
+            return scraper.parcelas_da_sessao(
+                sess, segmento, sk_beneficiario, beneficiario_id, referer
+            )
+        except Exception as e:
+            logger.warning("Erro ao coletar parcelas JSON: %s", e)
+            if tentativa:
+                break
+            if _precisa_bootstrap(e, url):
+                chrome.bootstrap(geracao)
+            elif ratelimit.estrangulado(url):
+                # `json_api` já repetiu as páginas; uma última rodada após a calma
+                ratelimit.esfria(url)
+            else:
+                break
+
+    metricas.conta("rpa_fallback_total", para="chrome")
+    with chrome.lock:
+        return scraper.parcelas_html(chrome.get(), url, referer)
+
+
+@metricas.cronometrado("beneficiario")
+def mapea_beneficiario(
+    sess: requests.Session,
+    chrome: ChromeSobDemanda,
+    url: str,
+    base_dir: Path | None = None,
+):
+    """Equivalente HTTP de `scraper.mapea_beneficiario` (sem screenshot)."""
+    logger.info("Processando beneficiário %s", url)
+    with metricas.span("ficha_http"):
+        resp = sess.get(url, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+    with metricas.span("coletar_cards"):
+        raiz = parsers.parse(texto_html(resp))
+        cards = parsers.extrai_cards(raiz)
+    if cards is None:
+        logger.warning("Ficha sem accordion no HTML, usando Chrome: %s", url)
+        metricas.conta("rpa_fallback_total", para="chrome")
+        # esta chamada já conta como "beneficiario": o Chrome tem etapa própria
+        with chrome.lock, metricas.span("beneficiario_chrome"):
+            driver = chrome.get()
+            beneficiario = scraper._mapea_beneficiario(driver, url, base_dir)
+            sincroniza_cookies(driver)
+            return beneficiario
+
+    beneficiario_match = pessoa_rx.search(url)
+    beneficiario_id = beneficiario_match.group(1) if beneficiario_match else ""
+
+    beneficiario = Beneficiario(
+        nome=parsers.extrai_campo(raiz, "Nome"),
+        cpf=parsers.extrai_campo(raiz, "CPF"),
+        localidade=parsers.extrai_campo(raiz, "Localidade"),
+        screenshot=None,
+        beneficios=[],
+    )
+
+    for card, erro in scraper.parcelas_em_paralelo(
+        lambda href: mapea_beneficio(sess, chrome, href, beneficiario_id, url), cards
+    ):
+        if erro is not None:
+            logger.error("Erro no benefício %s: %s", card.href, erro)
+
+    beneficiario.beneficios = cards
+    return beneficiario
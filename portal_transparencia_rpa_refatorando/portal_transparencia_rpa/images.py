@@ -0,0 +1,56 @@
+"""
+Screenshots fora do JSON: arquivos em `<run_dir>/png/` nomeados pelo hash
+do conteúdo (imagens idênticas são gravadas uma vez só). No JSON fica apenas
+`{"path", "sha256"}`.
+"""
+
+import base64, hashlib, logging, os, uuid
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger("rpa")
+
+# "base64" mantém o comportamento antigo (imagem embutida no JSON)
+FORMATOS = ("base64", "png", "jpeg", "webp")
+QUALIDADE = 80
+
+
+def captura(driver, formato: str = "png", qualidade: int = QUALIDADE) -> bytes:
+    """
+    Bytes do screenshot da viewport. JPEG/WebP saem comprimidos direto do
+    Chrome via CDP (`Page.captureScreenshot`), sem depender de Pillow.
+    """
+    if formato == "png":
+        return driver.get_screenshot_as_png()
+    res = driver.execute_cdp_cmd(
+        "Page.captureScreenshot", {"format": formato, "quality": qualidade}
+    )
+    return base64.b64decode(res["data"])
+
+
+def salva(dados: bytes, base_dir: Path, ext: str) -> dict:
+    """Grava `dados` em `png/<sha256>.<ext>` (se ainda não existir)."""
+    sha = hashlib.sha256(dados).hexdigest()
+    rel = Path("png") / f"{sha}.{ext}"
+    destino = base_dir / rel
+    if not destino.exists():
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        # escreve num temporário e renomeia: outro worker pode gravar o mesmo hash
+        tmp = destino.with_name(f".{sha}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_bytes(dados)
+        os.replace(tmp, destino)
+    return {"path": rel.as_posix(), "sha256": sha}
+
+
+def screenshot(
+    driver, formato: Optional[str], base_dir: Path | None
+) -> Union[str, dict, None]:
+    """
+    Valor do campo `screenshot` do registro conforme o `formato`:
+    None -> sem captura; "base64" -> PNG embutido; demais -> arquivo + hash.
+    """
+    if not formato:
+        return None
+    if formato == "base64":
+        return driver.get_screenshot_as_base64()
+    return salva(captura(driver, formato), base_dir or Path("."), formato)
@@ -1,19 +1,54 @@
-import requests, logging
-from .constants import BASE_URL, COLUNAS, PATH_JSON
+import requests, json, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from . import cache, metricas, ratelimit
+from .constants import (
+    BASE_URL,
+    COLUNAS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_REPETICOES_ESTRANGULADO,
+    HTTP_TIMEOUT,
+    PATH_JSON,
+    TAMANHO_PAGINA_PARCELAS,
+)
+from .session import sessao_do_driver
 
 log = logging.getLogger("rpa")
 
+# executor compartilhado para pedir a próxima página em segundo plano
+_prefetch: ThreadPoolExecutor | None = None
+_prefetch_lock = threading.Lock()
 
-def fetch_parcelas(segmento: str, driver, sk_beneficiario: str, pessoa_id: str):
+
+def _executor_prefetch() -> ThreadPoolExecutor:
+    global _prefetch
+    with _prefetch_lock:
+        if _prefetch is None:
+            _prefetch = ThreadPoolExecutor(
+                max_workers=HTTP_POOL_MAXSIZE, thread_name_prefix="prefetch"
+            )
+        return _prefetch
+
+
+def url_parcelas(segmento: str) -> str:
     path = PATH_JSON.get(
         segmento, "sacado/resultado" if segmento != "safra" else "recebido/resultado"
     )
-    url = f"{BASE_URL}/beneficios/{segmento}/{path}"
+    return f"{BASE_URL}/beneficios/{segmento}/{path}"
+
 
-    params = {
+def params_parcelas(
+    segmento: str,
+    sk_beneficiario: str,
+    pessoa_id: str,
+    tamanho: int = TAMANHO_PAGINA_PARCELAS,
+    offset: int = 0,
+) -> dict:
+    return {
         "paginacaoSimples": "true",
-        "tamanhoPagina": 1000,
-        "offset": 0,
+        "tamanhoPagina": tamanho,
+        "offset": offset,
         "direcaoOrdenacao": "desc",
         "colunaOrdenacao": "numeroParcela"
         if segmento == "auxilio-emergencial"
@@ -27,12 +62,155 @@ def fetch_parcelas(segmento: str, driver, sk_beneficiario: str, pessoa_id: str):
         "pessoa": pessoa_id,
     }
 
-    sess = requests.Session()
-    for c in driver.get_cookies():
-        sess.cookies.set(c["name"], c["value"])
 
-    resp = sess.get(
-        url, params=params, headers={"X-Requested-With": "XMLHttpRequest"}, timeout=30
+def _baixa(sess: requests.Session, segmento: str, params: dict, headers: dict):
+    """
+    GET das parcelas -> (resposta, corpo JSON), com corpo None num 304. Se o
+    portal estiver estrangulando (429/503 ou HTML no lugar do JSON, ver
+    `ratelimit`), espera a calma e repete a página em vez de desistir: quem
+    chama cairia no caminho HTML, bem mais lento e que pesa mais no portal.
+    """
+    url = url_parcelas(segmento)
+    for tentativa in range(HTTP_REPETICOES_ESTRANGULADO + 1):
+        resp = sess.get(url, params=params, headers=headers, timeout=HTTP_TIMEOUT)
+        try:
+            if resp.status_code == 304:
+                return resp, None
+            resp.raise_for_status()
+            return resp, resp.json()
+        except (requests.HTTPError, ValueError) as e:
+            ultima = tentativa == HTTP_REPETICOES_ESTRANGULADO
+            if ultima or not ratelimit.estrangulado(url):
+                raise
+            metricas.conta("rpa_ratelimit_repeticoes_total", segmento=segmento)
+            pausa = ratelimit.esfria(url)
+            log.info("Parcelas estranguladas (%s), repetido após %.1f s", e, pausa)
+
+
+def _pagina(corpo: dict) -> Tuple[List[dict], Optional[int]]:
+    """(linhas, recordsTotal) do corpo JSON; total None se o servidor não mandou."""
+    total = corpo.get("recordsTotal")
+    return corpo.get("data", []), int(total) if total is not None else None
+
+
+def pagina_parcelas(
+    sess: requests.Session,
+    segmento: str,
+    sk_beneficiario: str,
+    pessoa_id: str,
+    referer: str | None = None,
+    tamanho: int = TAMANHO_PAGINA_PARCELAS,
+    offset: int = 0,
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    Uma página do endpoint `/beneficios/<segmento>/.../resultado`, servida
+    pelo cache em disco quando houver (ver `cache`): (linhas, recordsTotal).
+    """
+    headers = {
+        "Accept": "application/json, text/plain, */*",
+        "X-Requested-With": "XMLHttpRequest",
+    }
+    if referer:
+        headers["Referer"] = referer
+    url = url_parcelas(segmento)
+    params = params_parcelas(segmento, sk_beneficiario, pessoa_id, tamanho, offset)
+
+    c = cache.CACHE
+    entrada = None
+    if c is not None:
+        k = cache.chave(url, params)
+        entrada = c.busca(k)
+        if entrada is not None:
+            if entrada.fresca(cache.ttl(segmento)):
+                c.acerto()
+                return _pagina(json.loads(entrada.corpo))
+            headers.update(entrada.validadores())
+
+    with metricas.span("parcelas_json", segmento=segmento):
+        resp, corpo = _baixa(sess, segmento, params, headers)
+        if corpo is None and entrada is not None:
+            c.renova(k)
+            c.acerto(revalidado=True)
+            return _pagina(json.loads(entrada.corpo))
+    if c is not None:
+        if entrada is not None:
+            c.expirada()
+        c.grava(
+            k,
+            resp.content,
+            resp.headers.get("ETag"),
+            resp.headers.get("Last-Modified"),
+        )
+    return _pagina(corpo)
+
+
+def itera_parcelas(
+    sess: requests.Session,
+    segmento: str,
+    sk_beneficiario: str,
+    pessoa_id: str,
+    referer: str | None = None,
+    tamanho: int | None = None,
+) -> Iterator[List[dict]]:
+    """
+    Gera as páginas de parcelas até `offset` chegar ao `recordsTotal` do
+    servidor (ou até uma página vazia, se ele não mandar o total). O
+    `offset` avança pelo que de fato veio: o portal limita o `tamanhoPagina`
+    por conta própria, então uma página menor que `tamanho` não é o fim.
+    Enquanto quem consome normaliza a página atual, a próxima já está sendo
+    baixada em segundo plano.
+    """
+    tamanho = tamanho or TAMANHO_PAGINA_PARCELAS
+
+    def busca(offset: int) -> Tuple[List[dict], Optional[int]]:
+        return pagina_parcelas(
+            sess, segmento, sk_beneficiario, pessoa_id, referer, tamanho, offset
+        )
+
+    offset = 0
+    atual, total = busca(offset)
+    proxima = None
+    try:
+        while True:
+            seguinte = offset + len(atual)
+            if atual and (total is None or seguinte < total):
+                proxima = _executor_prefetch().submit(busca, seguinte)
+            yield atual
+            if proxima is None:
+                return
+            offset = seguinte
+            anterior = atual
+            atual, total_seguinte = proxima.result()
+            proxima = None
+            if total_seguinte is not None:
+                total = total_seguinte
+            if atual == anterior:
+                # servidor ignorando o offset: evita laço infinito
+                log.warning("Paginação de %s repetiu a página %d", segmento, offset)
+                return
+    finally:
+        if proxima is not None:
+            proxima.cancel()
+
+
+def busca_parcelas(
+    sess: requests.Session,
+    segmento: str,
+    sk_beneficiario: str,
+    pessoa_id: str,
+    referer: str | None = None,
+    tamanho: int | None = None,
+) -> List[dict]:
+    """Todas as linhas do endpoint de parcelas, página a página."""
+    linhas: List[dict] = []
+    for pagina in itera_parcelas(
+        sess, segmento, sk_beneficiario, pessoa_id, referer, tamanho
+    ):
+        linhas.extend(pagina)
+    return linhas
+
+
+def fetch_parcelas(segmento: str, driver, sk_beneficiario: str, pessoa_id: str):
+    return busca_parcelas(
+        sessao_do_driver(driver), segmento, sk_beneficiario, pessoa_id
     )
-    resp.raise_for_status()
-    return resp.json().get("data", [])
@@ -0,0 +1,274 @@
+"""
+Métricas da execução: contadores e histogramas em memória, alimentados por
+spans (`span`/`cronometrado`) em volta de cada etapa do scraping.
+
+Exportadas ao final em `<run_dir>/metrics.json` e num textfile no formato do
+Prometheus (para o textfile collector do node_exporter). Nomes e rótulos
+seguem a convenção do Prometheus: `rpa_<coisa>_total` para contadores e
+`rpa_<coisa>_seconds` para histogramas de duração (o sufixo é a unidade base,
+em inglês, como o Prometheus pede).
+"""
+
+import json, logging, math, os, threading, time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("rpa")
+
+# limites (s) dos baldes dos histogramas de duração; o último é +Inf
+BALDES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+AJUDA = {
+    "rpa_etapa_seconds": "Duração de cada etapa do scraping",
+    "rpa_http_requisicoes_total": "Requisições HTTP por destino e status",
+    "rpa_http_retentativas_total": "Retentativas feitas pelo urllib3",
+    "rpa_http_bytes_total": "Bytes recebidos nas respostas HTTP",
+    "rpa_ratelimit_espera_seconds": "Espera pelo limite de requisições por host",
+    "rpa_ratelimit_taxa": "Limite atual de requisições por segundo do host",
+    "rpa_ratelimit_janela": "Máximo atual de requisições simultâneas ao host",
+    "rpa_ratelimit_recuos_total": "Cortes do limite por sinal de estrangulamento",
+    "rpa_ratelimit_repeticoes_total": "Páginas de parcelas repetidas (estrangulamento)",
+    "rpa_cache_total": "Consultas ao cache HTTP por resultado",
+    "rpa_fallback_total": "Quedas para um caminho mais lento (html, chrome)",
+    "rpa_evidencias_total": "Evidências gravadas ou descartadas",
+    "rpa_evidencias_bytes_total": "Bytes de evidências gravados em disco",
+    "rpa_beneficiarios_total": "Beneficiários coletados ou com erro",
+    "rpa_beneficiarios_repetidos_total": "Beneficiários repetidos após o Chrome morrer",
+    "rpa_chrome_reciclagens_total": "Chromes trocados por fichas, memória ou morte",
+    "rpa_chrome_encerramentos_forcados_total": "Chromes mortos após quit() travar",
+}
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+class _Histograma:
+    __slots__ = ("contagens", "soma", "n", "maximo")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES) + 1)
+        self.soma = 0.0
+        self.n = 0
+        self.maximo = 0.0
+
+    def observa(self, valor: float):
+        i = 0
+        while i < len(BALDES) and valor > BALDES[i]:
+            i += 1
+        self.contagens[i] += 1
+        self.soma += valor
+        self.n += 1
+        self.maximo = max(self.maximo, valor)
+
+    def soma_com(self, outro: "_Histograma"):
+        self.contagens = [a + b for a, b in zip(self.contagens, outro.contagens)]
+        self.soma += outro.soma
+        self.n += outro.n
+        self.maximo = max(self.maximo, outro.maximo)
+
+    def quantil(self, q: float) -> float:
+        """Estimativa por interpolação linear dentro do balde (como o PromQL)."""
+        alvo = q * self.n
+        acumulado = 0
+        for i, c in enumerate(self.contagens):
+            if c and acumulado + c >= alvo:
+                inicio = BALDES[i - 1] if i else 0.0
+                fim = BALDES[i] if i < len(BALDES) else self.maximo
+                estimado = inicio + (fim - inicio) * (alvo - acumulado) / c
+                return min(estimado, self.maximo)
+            acumulado += c
+        return self.maximo
+
+
+_contadores: Dict[str, Dict[Rotulos, float]] = {}
+_medidores: Dict[str, Dict[Rotulos, float]] = {}
+_histogramas: Dict[str, Dict[Rotulos, _Histograma]] = {}
+_lock = threading.Lock()
+
+
+def _chave(rotulos: dict) -> Rotulos:
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def conta(nome: str, n: float = 1, **rotulos):
+    """Incrementa o contador `nome` com os `rotulos`."""
+    k = _chave(rotulos)
+    with _lock:
+        serie = _contadores.setdefault(nome, {})
+        serie[k] = serie.get(k, 0) + n
+
+
+def define(nome: str, valor: float, **rotulos):
+    """Fixa o valor atual do medidor (gauge) `nome`."""
+    k = _chave(rotulos)
+    with _lock:
+        _medidores.setdefault(nome, {})[k] = valor
+
+
+def observa(nome: str, valor: float, **rotulos):
+    """Registra `valor` no histograma `nome`."""
+    k = _chave(rotulos)
+    with _lock:
+        serie = _histogramas.setdefault(nome, {})
+        h = serie.get(k)
+        if h is None:
+            h = serie[k] = _Histograma()
+        h.observa(valor)
+
+
+@contextmanager
+def span(etapa: str, **rotulos):
+    """Mede o bloco em `rpa_etapa_seconds{etapa=...}` (`ok="nao"` se levantar)."""
+    inicio = time.perf_counter()
+    ok = "sim"
+    try:
+        yield
+    except BaseException:
+        ok = "nao"
+        raise
+    finally:
+        segundos = time.perf_counter() - inicio
+        observa("rpa_etapa_seconds", segundos, etapa=etapa, ok=ok, **rotulos)
+        logger.debug("Etapa %s: %.0f ms", etapa, segundos * 1000)
+
+
+def cronometrado(etapa: str):
+    """Decorator: `span(etapa)` em volta de cada chamada da função."""
+
+    def decorador(func):
+        @wraps(func)
+        def medida(*a, **kw):
+            with span(etapa):
+                return func(*a, **kw)
+
+        return medida
+
+    return decorador
+
+
+def zera():
+    with _lock:
+        _contadores.clear()
+        _medidores.clear()
+        _histogramas.clear()
+
+
+# --------------------------------------------------------------------------- #
+# Exportação                                                                  #
+# --------------------------------------------------------------------------- #
+
+
+def _rotulos_prom(rotulos: Rotulos, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pares = rotulos + extra
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapa(v)}"' for k, v in pares) + "}"
+
+
+def _escapa(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _numero(v: float) -> str:
+    """Valor exato no texto do Prometheus (`:g` arredonda 1234567 para 1.23457e+06)."""
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return str(int(v)) if v == int(v) else repr(float(v))
+
+
+def prometheus() -> str:
+    """Todas as séries no formato de exposição de texto do Prometheus."""
+    linhas = []
+    with _lock:
+        for tipo, series in (("counter", _contadores), ("gauge", _medidores)):
+            for nome, serie in sorted(series.items()):
+                linhas.append(f"# HELP {nome} {AJUDA.get(nome, nome)}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+                for k, v in sorted(serie.items()):
+                    linhas.append(f"{nome}{_rotulos_prom(k)} {_numero(v)}")
+        for nome, serie in sorted(_histogramas.items()):
+            linhas.append(f"# HELP {nome} {AJUDA.get(nome, nome)}")
+            linhas.append(f"# TYPE {nome} histogram")
+            for k, h in sorted(serie.items()):
+                acumulado = 0
+                for limite, c in zip(BALDES + ("+Inf",), h.contagens):
+                    acumulado += c
+                    le = (("le", f"{limite:g}" if limite != "+Inf" else limite),)
+                    linhas.append(f"{nome}_bucket{_rotulos_prom(k, le)} {acumulado}")
+                linhas.append(f"{nome}_sum{_rotulos_prom(k)} {h.soma:.6f}")
+                linhas.append(f"{nome}_count{_rotulos_prom(k)} {h.n}")
+    return "\n".join(linhas) + "\n"
+
+
+def instantaneo() -> dict:
+    """Contadores, medidores e resumo dos histogramas (p50/p95/p99...), em dict."""
+    with _lock:
+        return dict(
+            contadores={
+                nome: [dict(rotulos=dict(k), valor=v) for k, v in sorted(serie.items())]
+                for nome, serie in sorted(_contadores.items())
+            },
+            medidores={
+                nome: [dict(rotulos=dict(k), valor=v) for k, v in sorted(serie.items())]
+                for nome, serie in sorted(_medidores.items())
+            },
+            histogramas={
+                nome: [
+                    dict(
+                        rotulos=dict(k),
+                        n=h.n,
+                        soma_s=round(h.soma, 6),
+                        p50_s=round(h.quantil(0.5), 6),
+                        p95_s=round(h.quantil(0.95), 6),
+                        p99_s=round(h.quantil(0.99), 6),
+                        max_s=round(h.maximo, 6),
+                    )
+                    for k, h in sorted(serie.items())
+                ]
+                for nome, serie in sorted(_histogramas.items())
+            },
+        )
+
+
+def _grava_atomico(path: Path, texto: str):
+    # o textfile collector pode ler a qualquer momento: nunca um arquivo pela metade
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(texto, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def exporta(run_dir: Path, textfile: Optional[Path] = None, **extras):
+    """
+    Grava `<run_dir>/metrics.json` (com `extras` no topo) e o textfile do
+    Prometheus em `<run_dir>/metrics.prom` e, se informado, em `textfile`.
+    """
+    dados = dict(extras, **instantaneo())
+    _grava_atomico(
+        run_dir / "metrics.json", json.dumps(dados, ensure_ascii=False, indent=2)
+    )
+    texto = prometheus()
+    for destino in (run_dir / "metrics.prom", textfile):
+        if destino is not None:
+            _grava_atomico(destino, texto)
+
+
+def resumo() -> str:
+    """Uma linha com chamadas, erros, p50 e p95 de cada etapa (para o log)."""
+    etapas: Dict[str, list] = {}
+    with _lock:
+        for k, h in _histogramas.get("rpa_etapa_seconds", {}).items():
+            rotulos = dict(k)
+            total, erros = etapas.setdefault(rotulos["etapa"], [_Histograma(), 0])
+            total.soma_com(h)
+            if rotulos.get("ok") == "nao":
+                etapas[rotulos["etapa"]][1] += h.n
+    partes = [
+        f"{etapa} {h.n}x{f' ({erros} erros)' if erros else ''} "
+        f"p50 {h.quantil(0.5) * 1000:.0f} ms p95 {h.quantil(0.95) * 1000:.0f} ms"
+        for etapa, (h, erros) in sorted(etapas.items())
+    ]
+    return "etapas: " + ("; ".join(partes) if partes else "nenhuma")
@@ -0,0 +1,659 @@
+"""
+Portal da Transparência de mentira, local, para medir e testar sem rede.
+
+Serve as mesmas rotas que o scraper usa — lista de busca, ficha da pessoa,
+página do benefício (tabela HTML) e `/beneficios/<segmento>/*/resultado`
+(JSON paginado) — a partir de um `Corpus`:
+
+- sintético e determinístico (`Corpus.sintetico`: N pessoas × M benefícios
+  × K parcelas, mesma semente = mesmos dados);
+- ou reconstruído de uma execução gravada (`Corpus.de_gravacao`: o
+  `json/beneficiarios.json` e a `html/sucesso_lista_*.html` do run dir).
+
+Latência por rota, taxas de erro (503), de throttling (429) e de corpo não
+JSON no endpoint de parcelas, o tamanho máximo de página e um limite de
+requisições por segundo (429 acima dele) são configuráveis.
+As falhas são sorteadas por (semente, URL, nº da tentativa), então a mesma
+execução falha sempre nos mesmos pontos e uma nova tentativa pode passar.
+
+    python -m portal_transparencia_rpa.mock_portal --pessoas 200 --port 8765
+    BASE_URL=http://127.0.0.1:8765 python -m portal_transparencia_rpa.cli ...
+"""
+
+import argparse, gzip, hashlib, html, json, logging, random, re, threading, time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .constants import COLUNAS
+from .esquemas import ESQUEMAS
+from .selectors import beneficio_rx
+
+logger = logging.getLogger("rpa")
+
+TITULOS = {
+    "auxilio-emergencial": "Auxílio Emergencial",
+    "auxilio-brasil": "Auxílio Brasil",
+    "bolsa-familia": "Beneficiário de Bolsa Família",
+    "novo-bolsa-familia": "Novo Bolsa Família",
+    "safra": "Beneficiário de Garantia Safra",
+}
+ROTAS = ("inicio", "lista", "ficha", "beneficio", "json")
+
+_NOMES = ("MARIA", "JOSE", "ANA", "JOAO", "FRANCISCA", "ANTONIO", "ADRIANA", "CARLOS")
+_SOBRENOMES = ("DA SILVA", "DOS SANTOS", "PEREIRA", "ALVES", "FERREIRA", "LIMA", "SOUZA")
+_CIDADES = (
+    ("SP", "SAO PAULO"),
+    ("BA", "SALVADOR"),
+    ("CE", "FORTALEZA"),
+    ("MG", "BELO HORIZONTE"),
+    ("PE", "RECIFE"),
+    ("PA", "BELEM"),
+)
+
+# os itens da lista não têm <span>, então o 1º </span> fecha os resultados
+_RESULTADOS_RX = re.compile(r'(<span id="resultados">).*?(</span>)', re.S)
+_SCRIPT_RX = re.compile(r"<script\b.*?</script>", re.S | re.I)
+_LINK_RX = re.compile(r'href="/busca/pessoa-fisica/((\d+)-[^"]*)">([^<]*)</a>')
+
+_LISTA_MINIMA = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Busca</title></head>
+<body><main><span id="resultados"></span></main></body></html>
+"""
+
+_ITEM = """<div class="br-item py-2 px-0" role="listitem">
+                            <div class="row align-items-center">
+                                <div class="col-sm-12"><a class="link-busca-nome" href="/busca/pessoa-fisica/{slug}">{nome}</a></div>
+                                <div class="col-sm-12 mt-3"><strong>CPF {cpf}</strong></div>
+                                <div class="col-sm-12">Beneficiário de Programa Social</div>
+                            </div>
+                        </div>"""
+
+_FICHA = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>{nome}</title></head>
+<body><main>
+<section class="dados-tabelados">
+<div><strong>Nome</strong><span>{nome}</span></div>
+<div><strong>CPF</strong><span>{cpf}</span></div>
+<div><strong>Localidade</strong><span>{localidade}</span></div>
+</section>
+<div class="br-accordion">
+<button class="header" aria-controls="accordion-recebimentos-recursos" onclick="this.classList.add('active')">Recebimentos de recursos</button>
+<div id="accordion-recebimentos-recursos"><div class="br-table">{cards}</div></div>
+</div>
+<button id="cookiebar_close">Fechar</button>
+</main></body></html>
+"""
+
+_CARD = """
+<div class="responsive"><strong>{titulo}</strong><table>
+<thead><tr><th>Detalhar</th><th>NIS</th><th>Nome</th><th>Valor Recebido</th></tr></thead>
+<tbody><tr><td><a class="br-button" href="/beneficios/{segmento}/{sk}">Detalhar</a></td><td>{nis}</td><td>{nome}</td><td>{valor}</td></tr></tbody>
+</table></div>"""
+
+_BENEFICIO = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>{titulo}</title></head>
+<body><main><table><thead><tr>{th}</tr></thead><tbody>
+{linhas}
+</tbody></table></main></body></html>
+"""
+
+_INICIO = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Portal</title></head>
+<body><main><h1>Portal da Transparência</h1></main>
+<button id="cookiebar_close">Fechar</button></body></html>
+"""
+
+_BLOQUEIO = "<!DOCTYPE html><html><body><h1>Acesso temporariamente bloqueado</h1></body></html>"
+
+
+def _slug(nome: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", nome.lower()).strip("-")
+
+
+def _reais(centavos: int) -> str:
+    inteiro, fracao = divmod(centavos, 100)
+    return f"{inteiro:,}".replace(",", ".") + f",{fracao:02d}"
+
+
+# --------------------------------------------------------------------------- #
+# Corpus                                                                      #
+# --------------------------------------------------------------------------- #
+
+
+class Corpus:
+    """
+    Pessoas servidas pelo portal, em dicts simples:
+    {"id", "slug", "nome", "cpf", "localidade", "beneficios": [{"segmento",
+    "sk", "titulo", "nis", "nome", "valor_recebido", "linhas": [linha da API]}]}.
+    """
+
+    def __init__(self, pessoas: List[dict], lista_html: Optional[str] = None):
+        self.pessoas = pessoas
+        self.por_id = {p["id"]: p for p in pessoas}
+        self.beneficios = {
+            (b["segmento"], b["sk"]): (p, b) for p in pessoas for b in p["beneficios"]
+        }
+        self.lista_html = lista_html
+
+    @property
+    def parcelas(self) -> int:
+        return sum(len(b["linhas"]) for p in self.pessoas for b in p["beneficios"])
+
+    @classmethod
+    def sintetico(
+        cls, pessoas: int = 50, beneficios: int = 3, parcelas: int = 24, seed: int = 0
+    ) -> "Corpus":
+        """`pessoas` × `beneficios` (segmentos em rodízio) × `parcelas` cada."""
+        rnd = random.Random(seed)
+        segmentos = list(COLUNAS)
+        lista = []
+        for i in range(pessoas):
+            nome = f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} {i:05d}"
+            uf, cidade = rnd.choice(_CIDADES)
+            pid = str(100000 + i)
+            pessoa = dict(
+                id=pid,
+                slug=f"{pid}-{_slug(nome)}",
+                nome=nome,
+                cpf=f"***.{rnd.randrange(1000):03d}.{rnd.randrange(1000):03d}-**",
+                localidade=f"{cidade} - {uf}",
+                beneficios=[],
+            )
+            for j in range(beneficios):
+                segmento = segmentos[(i + j) % len(segmentos)]
+                linhas, total = [], 0
+                for k in range(parcelas):
+                    valor = rnd.choice((15000, 30000, 60000, 120000, 130000))
+                    total += valor
+                    linhas.append(
+                        _linha_sintetica(segmento, k, parcelas, uf, cidade, valor)
+                    )
+                pessoa["beneficios"].append(
+                    dict(
+                        segmento=segmento,
+                        sk=str(500000 + i * beneficios + j),
+                        titulo=TITULOS[segmento],
+                        nis=""
+                        if segmento == "auxilio-emergencial"
+                        else f"{rnd.randrange(10**11):011d}",
+                        nome=nome,
+                        valor_recebido=f"R$ {_reais(total)}",
+                        linhas=linhas,
+                    )
+                )
+            lista.append(pessoa)
+        return cls(lista)
+
+    @classmethod
+    def de_gravacao(cls, origem: Path) -> "Corpus":
+        """
+        Corpus de uma execução gravada: `origem` é o run dir (ou o próprio
+        `beneficiarios.json`/`.ndjson`). Os ids das pessoas vêm dos links da
+        lista gravada quando o nome bate; senão são inventados. A lista
+        gravada também vira o modelo das páginas de busca servidas.
+        """
+        origem = Path(origem)
+        if origem.is_dir():
+            candidatos = sorted(origem.glob("json/beneficiarios*.*json")) or sorted(
+                origem.glob("beneficiarios*.*json")
+            )
+            if not candidatos:
+                raise FileNotFoundError(f"Sem beneficiarios.json em {origem}")
+            origem = candidatos[0]
+        # run dir (json/ + html/) ou tudo na mesma pasta
+        pastas = (origem.parent.parent / "html", origem.parent)
+        texto = origem.read_text(encoding="utf-8")
+        if origem.suffix == ".ndjson":
+            registros = [json.loads(l) for l in texto.splitlines() if l.strip()]
+        else:
+            registros = json.loads(texto)["beneficiarios"]
+
+        lista_html = None
+        ids: Dict[str, str] = {}
+        gravadas = [p for d in pastas for p in sorted(d.glob("sucesso_lista_*.html*"))]
+        for path in gravadas[:1]:
+            dados = path.read_bytes()
+            lista_html = (
+                gzip.decompress(dados) if path.suffix == ".gz" else dados
+            ).decode("utf-8")
+            for slug, _, nome in _LINK_RX.findall(lista_html):
+                ids.setdefault(html.unescape(nome).strip(), slug)
+
+        campos = {seg: dict(zip(e.campos, e.colunas)) for seg, e in ESQUEMAS.items()}
+        pessoas = []
+        for i, r in enumerate(registros):
+            slug = ids.get(r["nome"]) or f"{900000 + i}-{_slug(r['nome'])}"
+            pessoa = dict(
+                id=slug.split("-", 1)[0],
+                slug=slug,
+                nome=r["nome"],
+                cpf=r["cpf"],
+                localidade=r["localidade"],
+                beneficios=[],
+            )
+            for b in r.get("beneficios") or []:
+                m = beneficio_rx.search(b.get("href") or "")
+                if not m or m.group(1) not in campos:
+                    continue
+                colunas = campos[m.group(1)]
+                pessoa["beneficios"].append(
+                    dict(
+                        segmento=m.group(1),
+                        sk=m.group(2),
+                        titulo=b["beneficio"],
+                        nis=b["nis"],
+                        nome=b["nome"],
+                        valor_recebido=b["valor_recebido"],
+                        linhas=[
+                            {colunas[c]: v for c, v in p.items() if c in colunas}
+                            for p in b.get("parcelas") or []
+                        ],
+                    )
+                )
+            pessoas.append(pessoa)
+        return cls(pessoas, lista_html)
+
+    def busca(self, termo: Optional[str]) -> List[dict]:
+        """Pessoas cujo nome, CPF ou NIS contém `termo` (todas, sem termo)."""
+        if not termo:
+            return self.pessoas
+        termo = termo.upper()
+        return [
+            p
+            for p in self.pessoas
+            if termo in p["nome"].upper()
+            or termo in p["cpf"]
+            or any(termo == b["nis"] for b in p["beneficios"])
+        ]
+
+    def esperado(self, pessoa: dict, base_url: str) -> dict:
+        """O registro que o scraper deve produzir para `pessoa` (sem screenshot)."""
+        return dict(
+            nome=pessoa["nome"],
+            cpf=pessoa["cpf"],
+            localidade=pessoa["localidade"],
+            beneficios=[
+                dict(
+                    beneficio=b["titulo"],
+                    nis=b["nis"],
+                    nome=b["nome"],
+                    valor_recebido=b["valor_recebido"],
+                    href=f"{base_url}/beneficios/{b['segmento']}/{b['sk']}",
+                    parcelas=[
+                        p.para_dict()
+                        for p in ESQUEMAS[b["segmento"]].de_json(b["linhas"])
+                    ],
+                )
+                for b in pessoa["beneficios"]
+            ],
+        )
+
+
+def _linha_sintetica(segmento: str, k: int, n: int, uf: str, cidade: str, valor: int):
+    # parcelas da mais recente para a mais antiga, como o portal ordena
+    mes, ano = 12 - k % 12, 2023 - k // 12
+    linha = dict(
+        mesDisponibilizacao=f"{mes:02d}/{ano}",
+        numeroParcela=str(n - k),
+        mesFolha=f"{mes:02d}/{ano}",
+        mesReferencia=f"{mes:02d}/{ano}",
+        uf=uf,
+        municipio=cidade,
+        enquadramento="CADUNICO",
+        quantidadeDependentes=str(k % 4),
+        valor=_reais(valor),
+        observacao="Não há",
+    )
+    return {c: linha[c] for c in ESQUEMAS[segmento].colunas}
+
+
+# --------------------------------------------------------------------------- #
+# Servidor                                                                    #
+# --------------------------------------------------------------------------- #
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "Portal"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        logger.debug("mock %s - " + fmt, self.address_string(), *args)
+
+    def do_GET(self):
+        u = urlsplit(self.path)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        rota, resposta = self.server.responde(u.path, q, self.path, self.headers)
+        status, tipo, corpo, extras = resposta
+        self.send_response(status)
+        if corpo is not None:
+            self.send_header("Content-Type", tipo)
+        for k, v in extras.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(corpo or b"")))
+        self.end_headers()
+        self.wfile.write(corpo or b"")
+        self.server.conta(rota, status, len(corpo or b""))
+
+
+class Portal(ThreadingHTTPServer):
+    """
+    Servidor HTTP do `Corpus`. `latencia` é {rota: segundos} (rota "*" vale
+    para todas), somada a um ruído uniforme de até `jitter`. `taxa_erro`,
+    `taxa_429` e `taxa_lixo` são frações das respostas que viram 503, 429
+    (com Retry-After) e HTML no lugar do JSON de parcelas. `max_lista` e
+    `max_parcelas` limitam o `tamanhoPagina` aceito, como o portal faz.
+    `max_rps` > 0 responde 429 às requisições acima desse ritmo (janela de 1 s).
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        corpus: Corpus,
+        endereco=("127.0.0.1", 0),
+        latencia: Optional[Dict[str, float]] = None,
+        jitter: float = 0.0,
+        taxa_erro: float = 0.0,
+        taxa_429: float = 0.0,
+        taxa_lixo: float = 0.0,
+        max_lista: int = 50,
+        max_parcelas: int = 1000,
+        max_rps: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(endereco, _Handler)
+        self.corpus = corpus
+        self.latencia = dict(latencia or {})
+        self.jitter = jitter
+        self.taxa_erro, self.taxa_429, self.taxa_lixo = taxa_erro, taxa_429, taxa_lixo
+        self.max_lista, self.max_parcelas = max_lista, max_parcelas
+        self.max_rps = max_rps
+        self._chegadas: deque = deque()
+        self.seed = seed
+        self.lock = threading.Lock()
+        self._tentativas: Dict[str, int] = {}
+        self.contagem: Dict[str, Dict[str, int]] = {}
+        self.bytes = 0
+        self._lista = _RESULTADOS_RX.split(
+            _SCRIPT_RX.sub("", corpus.lista_html or _LISTA_MINIMA), maxsplit=1
+        )
+        if len(self._lista) != 4:
+            self._lista = _RESULTADOS_RX.split(_LISTA_MINIMA, maxsplit=1)
+
+    @property
+    def url(self) -> str:
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    # ---- sorteios determinísticos ------------------------------------------
+
+    def _sorteio(self, chave: str) -> random.Random:
+        with self.lock:
+            n = self._tentativas[chave] = self._tentativas.get(chave, 0) + 1
+        semente = hashlib.blake2b(f"{self.seed}|{chave}|{n}".encode(), digest_size=8)
+        return random.Random(semente.digest())
+
+    def _excede(self) -> bool:
+        """Mais de `max_rps` requisições aceitas no último segundo?"""
+        if self.max_rps <= 0:
+            return False
+        agora = time.monotonic()
+        with self.lock:
+            while self._chegadas and agora - self._chegadas[0] >= 1.0:
+                self._chegadas.popleft()
+            if len(self._chegadas) >= self.max_rps:
+                return True
+            self._chegadas.append(agora)
+            return False
+
+    def conta(self, rota: str, status: int, n: int):
+        with self.lock:
+            d = self.contagem.setdefault(rota, {})
+            d[str(status)] = d.get(str(status), 0) + 1
+            self.bytes += n
+
+    def estatisticas(self) -> dict:
+        """{"rotas": {rota: {status: n}}, "bytes": n}."""
+        with self.lock:
+            return {
+                "rotas": {r: dict(d) for r, d in self.contagem.items()},
+                "bytes": self.bytes,
+            }
+
+    # ---- rotas -------------------------------------------------------------
+
+    def responde(self, path: str, q: dict, bruto: str, headers):
+        if path == "/__stats":
+            corpo = json.dumps(self.estatisticas()).encode()
+            return "stats", (200, "application/json", corpo, {})
+        rota, gera = self._rota(path, q)
+        if self._excede():
+            return rota, (429, "text/html", _BLOQUEIO.encode(), {"Retry-After": "1"})
+        rnd = self._sorteio(bruto)
+        atraso = self.latencia.get(rota, self.latencia.get("*", 0.0))
+        atraso += rnd.uniform(0, self.jitter) if self.jitter else 0.0
+        if atraso > 0:
+            time.sleep(atraso)
+        sorteio = rnd.random()
+        if sorteio < self.taxa_429:
+            return rota, (429, "text/html", _BLOQUEIO.encode(), {"Retry-After": "1"})
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            return rota, (503, "text/html", _BLOQUEIO.encode(), {})
+        if rota == "json" and sorteio < self.taxa_429 + self.taxa_erro + self.taxa_lixo:
+            # página de bloqueio com 200: o "Expecting value" do resp.json()
+            return rota, self._html(_BLOQUEIO)
+        resposta = gera()
+        if rota == "json" and resposta[0] == 200:
+            etag = '"%s"' % hashlib.blake2b(resposta[2], digest_size=8).hexdigest()
+            if headers.get("If-None-Match") == etag:
+                return rota, (304, None, None, {"ETag": etag})
+            resposta[3]["ETag"] = etag
+        return rota, resposta
+
+    def _rota(self, path: str, q: dict):
+        if path in ("", "/"):
+            return "inicio", lambda: self._html(_INICIO)
+        if path == "/pessoa-fisica/busca/lista":
+            return "lista", lambda: self._pagina_lista(q)
+        if path.startswith("/busca/pessoa-fisica/"):
+            pid = path.rsplit("/", 1)[-1].split("-", 1)[0]
+            return "ficha", lambda: self._ficha(pid)
+        partes = path.strip("/").split("/")
+        if len(partes) > 2 and partes[0] == "beneficios" and partes[-1] == "resultado":
+            return "json", lambda: self._parcelas(partes[1], q)
+        if len(partes) == 3 and partes[0] == "beneficios":
+            return "beneficio", lambda: self._beneficio(partes[1], partes[2])
+        return "outra", lambda: self._nao_achou()
+
+    @staticmethod
+    def _html(texto: str, status: int = 200):
+        return status, "text/html; charset=utf-8", texto.encode("utf-8"), {}
+
+    def _nao_achou(self):
+        return self._html("<html><body>Não encontrado</body></html>", 404)
+
+    def _pagina_lista(self, q: dict):
+        tamanho = min(int(q.get("tamanhoPagina", 10)), self.max_lista)
+        pagina = max(1, int(q.get("pagina", 1)))
+        pessoas = self.corpus.busca(q.get("termo"))
+        itens = "".join(
+            _ITEM.format(slug=p["slug"], nome=html.escape(p["nome"]), cpf=p["cpf"])
+            for p in pessoas[(pagina - 1) * tamanho : pagina * tamanho]
+        )
+        antes, abre, fecha, depois = self._lista
+        return self._html(f"{antes}{abre}{itens}{fecha}{depois}")
+
+    def _ficha(self, pid: str):
+        p = self.corpus.por_id.get(pid)
+        if p is None:
+            return self._nao_achou()
+        cards = "".join(
+            _CARD.format(
+                titulo=html.escape(b["titulo"]),
+                segmento=b["segmento"],
+                sk=b["sk"],
+                nis=b["nis"],
+                nome=html.escape(b["nome"]),
+                valor=b["valor_recebido"],
+            )
+            for b in p["beneficios"]
+        )
+        return self._html(
+            _FICHA.format(
+                nome=html.escape(p["nome"]),
+                cpf=p["cpf"],
+                localidade=html.escape(p["localidade"]),
+                cards=cards,
+            )
+        )
+
+    def _beneficio(self, segmento: str, sk: str):
+        achado = self.corpus.beneficios.get((segmento, sk))
+        if achado is None:
+            return self._nao_achou()
+        _, b = achado
+        colunas = ESQUEMAS[segmento].colunas
+        linhas = "\n".join(
+            "<tr>"
+            + "".join(f"<td>{html.escape(l.get(c, ''))}</td>" for c in colunas)
+            + "</tr>"
+            for l in b["linhas"]
+        )
+        th = "".join(f"<th>{c}</th>" for c in colunas)
+        return self._html(
+            _BENEFICIO.format(titulo=html.escape(b["titulo"]), th=th, linhas=linhas)
+        )
+
+    def _parcelas(self, segmento: str, q: dict):
+        sk = q.get("skBeneficiario") or q.get("beneficiario") or ""
+        achado = self.corpus.beneficios.get((segmento, sk))
+        if achado is None or achado[0]["id"] != q.get("pessoa"):
+            linhas = []
+        else:
+            linhas = achado[1]["linhas"]
+        colunas = (q.get("colunasSelecionadas") or "").split(",")
+        offset = int(q.get("offset", 0))
+        tamanho = min(int(q.get("tamanhoPagina", 10)), self.max_parcelas)
+        pagina = [
+            {c: l[c] for c in colunas if c in l}
+            for l in linhas[offset : offset + tamanho]
+        ]
+        corpo = dict(recordsTotal=len(linhas), recordsFiltered=len(linhas), data=pagina)
+        return 200, "application/json", json.dumps(corpo, ensure_ascii=False).encode(), {}
+
+
+@contextmanager
+def servidor(corpus: Corpus, porta: int = 0, **config):
+    """Sobe o `Portal` numa thread e devolve o servidor (veja `Portal.url`)."""
+    portal = Portal(corpus, ("127.0.0.1", porta), **config)
+    thread = threading.Thread(
+        target=portal.serve_forever, name="mock-portal", daemon=True
+    )
+    thread.start()
+    try:
+        yield portal
+    finally:
+        portal.shutdown()
+        portal.server_close()
+        thread.join()
+
+
+# --------------------------------------------------------------------------- #
+# Linha de comando                                                            #
+# --------------------------------------------------------------------------- #
+
+
+def _latencias(valores: List[str]) -> Dict[str, float]:
+    """["0.05", "json=0.2"] -> {"*": 0.05, "json": 0.2}."""
+    latencia = {}
+    for v in valores or []:
+        rota, _, seg = v.rpartition("=")
+        if rota and rota not in ROTAS:
+            raise ValueError(f"Rota desconhecida: {rota}")
+        latencia[rota or "*"] = float(seg)
+    return latencia
+
+
+def argumentos(ap: argparse.ArgumentParser):
+    """Opções do corpus e do servidor (também usadas pelos scripts de medição)."""
+    g = ap.add_argument_group("portal local")
+    g.add_argument("--replay", type=Path, help="Run dir (ou beneficiarios.json) gravado")
+    g.add_argument("--pessoas", type=int, default=50, help="Corpus sintético: pessoas")
+    g.add_argument("--beneficios", type=int, default=3, help="Benefícios por pessoa")
+    g.add_argument("--parcelas", type=int, default=24, help="Parcelas por benefício")
+    g.add_argument("--seed", type=int, default=0)
+    g.add_argument(
+        "--latency",
+        action="append",
+        metavar="[ROTA=]SEG",
+        help=f"Latência por resposta; ROTA em {', '.join(ROTAS)} (repetível)",
+    )
+    g.add_argument("--jitter", type=float, default=0.0, help="Ruído extra de até SEG")
+    g.add_argument("--error-rate", type=float, default=0.0, help="Fração de 503")
+    g.add_argument("--throttle-rate", type=float, default=0.0, help="Fração de 429")
+    g.add_argument(
+        "--garbage-rate",
+        type=float,
+        default=0.0,
+        help="Fração de HTML no lugar do JSON de parcelas",
+    )
+    g.add_argument(
+        "--max-rps",
+        type=float,
+        default=0.0,
+        help="Responde 429 acima de N req/s, como o portal (0 = sem limite)",
+    )
+    g.add_argument("--list-max-page", type=int, default=50)
+    g.add_argument("--parcel-max-page", type=int, default=1000)
+
+
+def corpus_de(args) -> Corpus:
+    if args.replay:
+        return Corpus.de_gravacao(args.replay)
+    return Corpus.sintetico(args.pessoas, args.beneficios, args.parcelas, args.seed)
+
+
+def config_de(args) -> dict:
+    return dict(
+        latencia=_latencias(args.latency),
+        jitter=args.jitter,
+        taxa_erro=args.error_rate,
+        taxa_429=args.throttle_rate,
+        taxa_lixo=args.garbage_rate,
+        max_lista=args.list_max_page,
+        max_parcelas=args.parcel_max_page,
+        max_rps=args.max_rps,
+        seed=args.seed,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Portal da Transparência local (mock)")
+    ap.add_argument("--port", type=int, default=8765)
+    argumentos(ap)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    corpus = corpus_de(args)
+    portal = Portal(corpus, ("127.0.0.1", args.port), **config_de(args))
+    logger.info(
+        "%d pessoas, %d parcelas; use BASE_URL=%s",
+        len(corpus.pessoas),
+        corpus.parcelas,
+        portal.url,
+    )
+    try:
+        portal.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.server_close()
+        logger.info("Requisições: %s", json.dumps(portal.estatisticas()))
+
+
+if __name__ == "__main__":
+    main()
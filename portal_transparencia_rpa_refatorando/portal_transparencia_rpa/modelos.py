@@ -0,0 +1,187 @@
+"""
+Modelos compactos dos registros: `Beneficiario`, `Beneficio` e `Parcela`.
+
+Em vez de um dict por parcela (com as mesmas chaves repetidas em milhares de
+linhas), cada `Parcela` guarda só a tupla de valores e aponta para a tupla de
+campos do seu esquema (compartilhada por todas as parcelas do benefício).
+Os textos das parcelas (UF, município, meses, valores...) são internados
+(`sys.intern`), então cada valor distinto existe uma vez só na memória.
+
+Os modelos aceitam `get`/`[]` como um dict (somente leitura) e são
+serializados direto para JSON por `dumps`, no mesmo formato byte a byte do
+`json.dumps(..., ensure_ascii=False)` sobre o dict equivalente.
+"""
+
+import json
+from json.encoder import encode_basestring
+from sys import intern
+from typing import Iterator, List, Optional, Tuple
+
+from .utils import higienizar
+
+
+class _Registro:
+    """Base: acesso por chave, iteração de campos e conversão para dict."""
+
+    __slots__ = ()
+    CAMPOS: Tuple[str, ...] = ()
+
+    def __init__(self, **valores):
+        for campo in self.CAMPOS:
+            setattr(self, campo, valores.pop(campo, None))
+        if valores:
+            raise TypeError(f"Campos desconhecidos: {', '.join(valores)}")
+
+    def itens(self) -> Iterator[Tuple[str, object]]:
+        """Pares (campo, valor) na ordem da saída."""
+        return ((c, getattr(self, c)) for c in self.CAMPOS)
+
+    def get(self, campo: str, padrao=None):
+        return getattr(self, campo) if campo in self.CAMPOS else padrao
+
+    def __getitem__(self, campo: str):
+        if campo not in self.CAMPOS:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def para_dict(self) -> dict:
+        """Dict equivalente (recursivo), para quem precisa de tipos simples."""
+        return {c: _para_python(v) for c, v in self.itens()}
+
+    def __eq__(self, outro):
+        if not isinstance(outro, _Registro):
+            return NotImplemented
+        return list(self.itens()) == list(outro.itens())
+
+    def __repr__(self):
+        campos = ", ".join(f"{c}={v!r}" for c, v in self.itens())
+        return f"{type(self).__name__}({campos})"
+
+
+class Parcela(_Registro):
+    """Linha de parcela: tupla de valores + campos do esquema (compartilhados)."""
+
+    __slots__ = ("campos", "valores")
+
+    def __init__(self, campos: Tuple[str, ...], valores: Tuple[str, ...]):
+        self.campos = campos
+        self.valores = valores
+
+    @classmethod
+    def de_textos(cls, campos: Tuple[str, ...], textos) -> "Parcela":
+        """Higieniza e interna cada texto."""
+        return cls(campos, tuple([intern(higienizar(t)) for t in textos]))
+
+    def itens(self):
+        return zip(self.campos, self.valores)
+
+    def get(self, campo: str, padrao=None):
+        try:
+            return self.valores[self.campos.index(campo)]
+        except ValueError:
+            return padrao
+
+    def __getitem__(self, campo: str):
+        try:
+            return self.valores[self.campos.index(campo)]
+        except ValueError:
+            raise KeyError(campo) from None
+
+
+class Beneficio(_Registro):
+    """Card de benefício da ficha e suas parcelas."""
+
+    __slots__ = CAMPOS = ("beneficio", "nis", "nome", "valor_recebido", "href", "parcelas")
+
+    beneficio: str
+    nis: str
+    nome: str
+    valor_recebido: str
+    href: str
+    parcelas: List[Parcela]
+
+
+class Beneficiario(_Registro):
+    """
+    Ficha do beneficiário. `consulta` só é preenchida no modo em lote e, vazia,
+    não aparece na saída.
+    """
+
+    __slots__ = CAMPOS = ("consulta", "nome", "cpf", "localidade", "screenshot", "beneficios")
+
+    consulta: Optional[str]
+    nome: str
+    cpf: str
+    localidade: str
+    screenshot: Optional[str]
+    beneficios: List[Beneficio]
+
+    def itens(self):
+        itens = super().itens()
+        if self.consulta is None:
+            next(itens)
+        return itens
+
+
+def _para_python(valor):
+    if isinstance(valor, _Registro):
+        return valor.para_dict()
+    if isinstance(valor, list):
+        return [_para_python(v) for v in valor]
+    return valor
+
+
+# --------------------------------------------------------------------------- #
+# Serialização                                                                #
+# --------------------------------------------------------------------------- #
+
+
+def _pedacos(obj, indent: Optional[int], nivel: int) -> Iterator[str]:
+    """Mesmos pedaços que o `json.dumps(ensure_ascii=False, indent=...)`."""
+    if isinstance(obj, str):
+        yield encode_basestring(obj)
+    elif obj is None:
+        yield "null"
+    elif obj is True:
+        yield "true"
+    elif obj is False:
+        yield "false"
+    elif isinstance(obj, (_Registro, dict)):
+        itens = obj.itens() if isinstance(obj, _Registro) else obj.items()
+        primeiro = True
+        for chave, valor in itens:
+            if primeiro:
+                yield "{" if indent is None else "{\n" + " " * (indent * (nivel + 1))
+                primeiro = False
+            else:
+                yield ", " if indent is None else ",\n" + " " * (indent * (nivel + 1))
+            yield encode_basestring(str(chave))
+            yield ": "
+            yield from _pedacos(valor, indent, nivel + 1)
+        if primeiro:
+            yield "{}"
+        else:
+            yield "}" if indent is None else "\n" + " " * (indent * nivel) + "}"
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            yield "[]"
+            return
+        sep = ", " if indent is None else ",\n" + " " * (indent * (nivel + 1))
+        yield "[" if indent is None else "[\n" + " " * (indent * (nivel + 1))
+        for i, valor in enumerate(obj):
+            if i:
+                yield sep
+            yield from _pedacos(valor, indent, nivel + 1)
+        yield "]" if indent is None else "\n" + " " * (indent * nivel) + "]"
+    else:
+        # números e afins: deixa com o próprio json
+        yield json.dumps(obj)
+
+
+def dumps(obj, indent: Optional[int] = None, nivel: int = 0) -> str:
+    """
+    JSON de modelos (ou dicts/listas com modelos dentro) sem montar dicts
+    intermediários. `nivel` desloca a indentação, para embutir o resultado
+    dentro de um documento maior já indentado.
+    """
+    return "".join(_pedacos(obj, indent, nivel))
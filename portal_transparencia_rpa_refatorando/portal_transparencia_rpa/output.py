@@ -0,0 +1,154 @@
+"""
+Escrita incremental do resultado: cada beneficiário vai para o disco assim
+que fica pronto, sem montar o documento inteiro em memória.
+
+- `json`: mesmo documento `{"consulta", "beneficiarios"}` (indent=2) de antes,
+  escrito registro a registro; se a execução cair, o arquivo é fechado como
+  JSON válido com o que já foi coletado.
+- `ndjson`: um beneficiário por linha + `<arquivo>.meta.json` com os
+  metadados da execução e o índice (url -> offset) de cada linha.
+
+Os registros (`modelos.Beneficiario`) são serializados direto por
+`modelos.dumps`, sem passar por dicts.
+"""
+
+import json, logging
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple
+
+from .modelos import dumps
+
+logger = logging.getLogger("rpa")
+
+FORMATOS = ("json", "ndjson")
+
+
+class _Escritor:
+    """
+    Base dos escritores: arquivo binário para que cada registro tenha um
+    offset/tamanho em bytes exato (usado pelo índice e pelo `--resume`).
+    Com `retoma` (entradas do journal) o arquivo é truncado no fim do último
+    registro confirmado e a escrita continua dali.
+    """
+
+    def __init__(self, path: Path, consulta: Optional[str], retoma: Sequence[dict] = ()):
+        self.path = path
+        self.consulta = consulta
+        self.indice: list = [dict(e) for e in retoma]
+        self.total = len(self.indice)
+        if self.indice:
+            ultimo = self.indice[-1]
+            self._f = path.open("r+b")
+            self._f.truncate(ultimo["offset"] + ultimo["bytes"])
+            self._f.seek(0, 2)
+        else:
+            self._f = path.open("wb")
+            self._f.write(self.cabecalho())
+
+    def cabecalho(self) -> bytes:
+        return b""
+
+    def serializa(self, registro) -> bytes:
+        raise NotImplementedError
+
+    def escreve(self, registro, url: Optional[str] = None) -> dict:
+        """Grava o registro (com flush) e devolve sua entrada no índice."""
+        dados = self.serializa(registro)
+        entrada = {"url": url, "offset": self._f.tell(), "bytes": len(dados)}
+        self._f.write(dados)
+        self._f.flush()
+        self.indice.append(entrada)
+        self.total += 1
+        return entrada
+
+
+class EscritorJson(_Escritor):
+    """Documento JSON único, gravado em streaming."""
+
+    def cabecalho(self) -> bytes:
+        cab = json.dumps({"consulta": self.consulta}, ensure_ascii=False, indent=2)
+        # abre o objeto sem fechar: `{\n  "consulta": ...,\n  "beneficiarios": [`
+        return (cab[:-2] + ',\n  "beneficiarios": [').encode("utf-8")
+
+    def serializa(self, registro) -> bytes:
+        # nivel=2: já sai indentado como item de "beneficiarios"
+        sep = ",\n    " if self.total else "\n    "
+        return (sep + dumps(registro, indent=2, nivel=2)).encode("utf-8")
+
+    def fecha(self, status: str = "ok"):
+        self._f.write(b"\n  ]\n}" if self.total else b"]\n}")
+        self._f.close()
+
+
+class EscritorNdjson(_Escritor):
+    """Um registro por linha, com flush a cada beneficiário."""
+
+    def __init__(self, path: Path, consulta: Optional[str], retoma: Sequence[dict] = ()):
+        super().__init__(path, consulta, retoma)
+        self.meta = {
+            "consulta": consulta,
+            "formato": "ndjson",
+            "inicio": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def serializa(self, registro) -> bytes:
+        return (dumps(registro) + "\n").encode("utf-8")
+
+    def fecha(self, status: str = "ok"):
+        self._f.close()
+        self.meta.update(
+            fim=datetime.now().isoformat(timespec="seconds"),
+            status=status,
+            total=self.total,
+            indice=self.indice,
+        )
+        caminho_meta(self.path).write_text(
+            json.dumps(self.meta, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+
+def caminho_meta(path: Path) -> Path:
+    return path.with_name(path.name + ".meta.json")
+
+
+def le_registros(
+    path: Path, entradas: Sequence[dict]
+) -> Iterator[Tuple[dict, Optional[str]]]:
+    """
+    (registro, url) de cada entrada confirmada no journal, lidos de volta da
+    saída pelo offset/tamanho (como dicts). Serve ao `--resume` para
+    reconstruir o que depende dos registros já gravados (ver `colunar`).
+    """
+    with path.open("rb") as f:
+        for entrada in entradas:
+            f.seek(entrada["offset"])
+            # no json o registro vem precedido da vírgula do item anterior
+            dados = f.read(entrada["bytes"]).lstrip(b",")
+            yield json.loads(dados), entrada.get("url")
+
+
+@contextmanager
+def abre_saida(
+    path: Path, formato: str, consulta: Optional[str], retoma: Sequence[dict] = ()
+):
+    """
+    Abre o escritor do `formato`. Ao sair com erro fecha o arquivo mesmo
+    assim (status "erro"), preservando o que já foi coletado. `retoma` são as
+    entradas do journal de uma execução anterior (ver `checkpoint`).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cls = EscritorNdjson if formato == "ndjson" else EscritorJson
+    escritor = cls(path, consulta, retoma)
+    try:
+        yield escritor
+    except BaseException:
+        escritor.fecha("erro")
+        logger.info(
+            "Saída parcial preservada: %d registros em %s", escritor.total, path
+        )
+        raise
+    escritor.fecha()
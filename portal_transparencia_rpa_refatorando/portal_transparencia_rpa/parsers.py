@@ -0,0 +1,196 @@
+"""
+Extração de dados direto do HTML (sem Selenium).
+Usa o `html.parser` da biblioteca padrão para montar uma árvore leve e
+consultas simples por tag/id/classe, suficientes para as páginas do portal.
+"""
+
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .constants import BASE
+from .modelos import Beneficio
+from .utils import higienizar
+
+# tags que nunca têm fechamento
+_VOID = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class No:
+    """Nó mínimo da árvore HTML."""
+
+    __slots__ = ("tag", "attrs", "filhos", "pai")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], pai: Optional["No"] = None):
+        self.tag = tag
+        self.attrs = attrs
+        self.filhos: list = []  # `No` ou `str`
+        self.pai = pai
+
+    def classes(self) -> List[str]:
+        return (self.attrs.get("class") or "").split()
+
+    def texto(self) -> str:
+        """Equivalente ao `textContent` do DOM."""
+        partes: List[str] = []
+        pilha = [self]
+        while pilha:
+            atual = pilha.pop()
+            if isinstance(atual, str):
+                partes.append(atual)
+            else:
+                pilha.extend(reversed(atual.filhos))
+        return "".join(partes)
+
+
+class _Montador(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.raiz = No("#document", {})
+        self.pilha = [self.raiz]
+
+    def handle_starttag(self, tag, attrs):
+        no = No(tag, {k: v or "" for k, v in attrs}, self.pilha[-1])
+        self.pilha[-1].filhos.append(no)
+        if tag not in _VOID:
+            self.pilha.append(no)
+
+    def handle_startendtag(self, tag, attrs):
+        self.pilha[-1].filhos.append(
+            No(tag, {k: v or "" for k, v in attrs}, self.pilha[-1])
+        )
+
+    def handle_endtag(self, tag):
+        # fecha até a tag correspondente; ignora fechamentos órfãos
+        for i in range(len(self.pilha) - 1, 0, -1):
+            if self.pilha[i].tag == tag:
+                del self.pilha[i:]
+                return
+
+    def handle_data(self, data):
+        self.pilha[-1].filhos.append(data)
+
+
+def parse(html: str) -> No:
+    """Monta a árvore do documento."""
+    m = _Montador()
+    m.feed(html)
+    m.close()
+    return m.raiz
+
+
+def itera(no: No, pred: Callable[[No], bool]) -> Iterator[No]:
+    """Percorre os descendentes de `no` (em ordem de documento) que satisfazem `pred`."""
+    pilha = list(reversed([f for f in no.filhos if isinstance(f, No)]))
+    while pilha:
+        atual = pilha.pop()
+        if pred(atual):
+            yield atual
+        pilha.extend(reversed([f for f in atual.filhos if isinstance(f, No)]))
+
+
+def primeiro(no: No, pred: Callable[[No], bool]) -> Optional[No]:
+    return next(itera(no, pred), None)
+
+
+def tag(nome: str, classe: Optional[str] = None) -> Callable[[No], bool]:
+    """Predicado `tag.classe` (classe opcional)."""
+    return lambda n: n.tag == nome and (classe is None or classe in n.classes())
+
+
+def por_id(id_: str) -> Callable[[No], bool]:
+    return lambda n: n.attrs.get("id") == id_
+
+
+# --------------------------------------------------------------------------- #
+# Extratores das páginas do portal                                            #
+# --------------------------------------------------------------------------- #
+
+
+def extrai_links(html: str) -> List[str]:
+    """Links `a.link-busca-nome` da lista de resultados (URLs absolutas)."""
+    raiz = parse(html)
+    links = []
+    for a in itera(raiz, tag("a", "link-busca-nome")):
+        href = a.attrs.get("href")
+        if href:
+            links.append(href if href.startswith("http") else BASE + href)
+    return links
+
+
+def extrai_campo(raiz: No, label: str) -> str:
+    """Texto do `<span>` irmão seguinte a `<strong>label</strong>` na ficha."""
+    for strong in itera(raiz, tag("strong")):
+        if " ".join(strong.texto().split()) != label:
+            continue
+        irmaos = strong.pai.filhos if strong.pai else []
+        for irmao in irmaos[irmaos.index(strong) + 1 :]:
+            if isinstance(irmao, No) and irmao.tag == "span":
+                return irmao.texto().strip()
+        return ""
+    return ""
+
+
+def extrai_cards(raiz: No) -> Optional[List[Beneficio]]:
+    """
+    Cards do accordion de recebimentos no mesmo formato de `coletar_cards`.
+    Devolve None quando o accordion não está no HTML (página incompleta).
+    """
+    accordion = primeiro(raiz, por_id("accordion-recebimentos-recursos"))
+    if accordion is None:
+        return None
+
+    def em_tabela(n: No) -> bool:
+        # equivalente ao seletor "div.br-table div.responsive"
+        if not tag("div", "responsive")(n):
+            return False
+        pai = n.pai
+        while pai is not None and pai is not accordion:
+            if tag("div", "br-table")(pai):
+                return True
+            pai = pai.pai
+        return False
+
+    cards = []
+    for box in itera(accordion, em_tabela):
+        strong = primeiro(box, tag("strong"))
+        tbody = primeiro(box, tag("tbody"))
+        row = primeiro(tbody, tag("tr")) if tbody else None
+        link = primeiro(row, tag("a", "br-button")) if row else None
+        if strong is None or row is None or link is None:
+            continue
+        href = link.attrs.get("href", "")
+        cards.append(
+            monta_card(
+                strong.texto(),
+                [td.texto() for td in itera(row, tag("td"))],
+                href if href.startswith("http") else BASE + href,
+            )
+        )
+    return cards
+
+
+def monta_card(titulo: str, cols: List[str], href: str) -> Beneficio:
+    """Card de benefício a partir do título e das células (já higieniza)."""
+    cols = [higienizar(c) for c in cols]
+    return Beneficio(
+        beneficio=higienizar(titulo),
+        nis=cols[1] if len(cols) > 1 else "",
+        nome=cols[2] if len(cols) > 2 else "",
+        valor_recebido=cols[3] if len(cols) > 3 else "",
+        href=href,
+        parcelas=[],
+    )
+
+
+def extrai_linhas(html: str) -> List[List[str]]:
+    """Células (`textContent`) de cada `table tbody tr` da página."""
+    raiz = parse(html)
+    linhas = []
+    for tabela in itera(raiz, tag("table")):
+        for tbody in itera(tabela, tag("tbody")):
+            for tr in itera(tbody, tag("tr")):
+                linhas.append([td.texto() for td in itera(tr, tag("td"))])
+    return linhas
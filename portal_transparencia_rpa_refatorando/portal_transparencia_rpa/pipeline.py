@@ -1,33 +1,375 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Collection, Iterable, Iterator, List, Optional, Tuple
 
-from . import scraper, constants
-from .driver import build as new_driver
+from . import http_engine, json_api, metricas, scraper, constants
+from .constants import HTTP_POOL_MAXSIZE, TAMANHO_PAGINA_LISTA
+from .driver import build as new_driver, configura as configura_driver
+from .gerente import ChromeGerenciado
+from .modelos import Beneficiario
 from .scraper import (
-    busca_beneficiarios,
+    itera_beneficiarios,
     mapea_beneficiario,
+    pessoa_id,
     salva_evidencia,
 )
-import logging, json
+from .session import fecha_sessao, nova_sessao
+import logging, queue, threading
 from pathlib import Path
 
 logger = logging.getLogger("rpa")
 
 
-def run(query: Optional[str], visible: bool = False, base_dir: Path | None = None):
+def run(
+    query: Optional[str],
+    visible: bool = False,
+    base_dir: Path | None = None,
+    **opcoes,
+):
     """
-    Executa a coleta completa de até 10 beneficiários para a `query` informada.
+    Executa a coleta completa de até `max_results` beneficiários (None/0 =
+    todos) para a `query` informada. `opcoes` são repassadas para `coleta`.
+    """
+    registros = coleta(query, visible, base_dir, **opcoes)
+    beneficiarios = [r.para_dict() for _, r in registros]
+    return {"consulta": query, "beneficiarios": beneficiarios}
+
+
+def coleta(
+    query: Optional[str],
+    visible: bool = False,
+    base_dir: Path | None = None,
+    **opcoes,
+) -> Iterator[Tuple[str, Beneficiario]]:
+    """Gera pares (url, registro) de uma única consulta (ver `coleta_lote`)."""
+    lote = coleta_lote([query], visible, base_dir, **opcoes)
+    return ((url, registro) for _, url, registro in lote)
+
+
+def coleta_lote(
+    consultas: Iterable[Optional[str]],
+    visible: bool = False,
+    base_dir: Path | None = None,
+    workers: int = 1,
+    engine: str = "selenium",
+    benefit_workers: int | None = None,
+    max_results: Optional[int] = 10,
+    page_size: int = TAMANHO_PAGINA_LISTA,
+    parcel_page_size: int | None = None,
+    screenshot: Optional[str] = "base64",
+    pular: Collection[str] = (),
+    lean: bool = False,
+    block: Optional[Collection[str]] = None,
+    session_cache: Optional[Path] = None,
+) -> Iterator[Tuple[Optional[str], str, Beneficiario]]:
+    """
+    Gera (consulta, url, registro) dos beneficiários de cada consulta, em
+    sequência e na ordem da lista, à medida que ficam prontos. Drivers e
+    sessões são os mesmos para todas as consultas; uma pessoa que aparece em
+    mais de uma consulta só é coletada na primeira. A lista é paginada sob
+    demanda (`page_size` por página, até `max_results` por consulta).
+
+    Com `workers > 1` os beneficiários são distribuídos entre um pool de
+    ChromeDrivers (ver `_coleta_pool`); a ordem original da lista é preservada.
+    `engine="http"` usa o motor sem navegador (ver `http_engine`).
+    `benefit_workers` limita as buscas de parcelas simultâneas por pessoa e
+    `parcel_page_size` define as linhas por página nos endpoints de parcelas.
+    `screenshot` escolhe como guardar a captura da ficha (ver `images`).
+    `pular` são ids de pessoas já coletadas (retomada via `checkpoint`).
+    `lean` sobe os Chromes no perfil leve, bloqueando `block` (ver `driver`).
+    `session_cache` é onde o motor HTTP guarda os cookies do bootstrap.
     """
-    driver = new_driver(visible)
     constants.RUN_DIR = base_dir
     scraper.RUN_DIR = base_dir
+    if benefit_workers:
+        scraper.PARCELAS_CONCORRENCIA = benefit_workers
+    if parcel_page_size:
+        json_api.TAMANHO_PAGINA_PARCELAS = parcel_page_size
+    scraper.SCREENSHOT = screenshot
+    configura_driver(lean, block, screenshot=bool(screenshot))
+    listagem = dict(
+        consultas=list(consultas),
+        max_results=max_results,
+        page_size=page_size,
+        pular=pular,
+    )
+    if engine == "http":
+        return _coleta_http(visible, base_dir, workers, session_cache, **listagem)
+    if workers > 1:
+        return _coleta_pool(visible, base_dir, workers, **listagem)
+    return _coleta_serial(visible, base_dir, **listagem)
+
+
+def _lista_lote(
+    consultas: List[Optional[str]],
+    lista: Callable[[Optional[str]], Iterable[str]],
+    pular: Collection[str],
+) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    (consulta, url) de todas as consultas, uma após a outra, sem repetir
+    pessoas entre consultas nem as já coletadas numa execução anterior
+    (`pular`). Num lote, a listagem que falhar é registrada e a próxima
+    consulta segue; com uma consulta só, o erro é propagado.
+    """
+    vistas = set(pular)
+    repetidos = 0
+    for consulta in consultas:
+        try:
+            for url in lista(consulta):
+                chave = pessoa_id(url)
+                if chave in vistas:
+                    repetidos += 1
+                    logger.debug("Já coletado, pulando %s", url)
+                    continue
+                vistas.add(chave)
+                yield consulta, url
+        except Exception as e:
+            if len(consultas) == 1:
+                raise
+            logger.error("Erro na listagem da consulta %r: %s", consulta, e)
+    if repetidos:
+        logger.info("%d beneficiários já coletados foram pulados", repetidos)
+
+
+def _coleta_serial(
+    visible: bool,
+    base_dir: Path | None,
+    consultas: List[Optional[str]],
+    max_results: Optional[int],
+    page_size: int,
+    pular: Collection[str],
+) -> Iterator[Tuple[Optional[str], str, Beneficiario]]:
+    driver = ChromeGerenciado(visible, fabrica=new_driver)
     try:
-        beneficiarios = []
-        for b in busca_beneficiarios(driver, query):
-            try:
-                beneficiarios.append(mapea_beneficiario(driver, b))
-            except Exception as e:
-                logger.error("Erro no beneficiário %s: %s", b, e)
+        itens = _lista_lote(
+            consultas,
+            lambda q: itera_beneficiarios(driver, q, max_results, page_size),
+            pular,
+        )
+        for consulta, b in itens:
+            registro = _coleta_beneficiario(driver, b, base_dir)
+            if registro is not None:
+                yield consulta, b, registro
+    finally:
+        _fecha_drivers([driver])
+
+
+def _coleta_beneficiario(
+    driver: ChromeGerenciado, url: str, base_dir: Path | None
+):
+    """
+    Mapeia um beneficiário. Se o Chrome morreu ou travou no meio (ver
+    `gerente`), sobe outro e repete o beneficiário uma vez. Em caso de erro
+    salva evidência (só com o Chrome vivo) e devolve None.
+    """
+    for tentativa in range(2):
+        try:
+            registro = mapea_beneficiario(driver, url, base_dir)
+        except Exception as e:
+            if driver.vivo():
+                logger.error("Erro no beneficiário %s: %s", url, e)
                 salva_evidencia(driver, "beneficiario", base_dir)
-        return {"consulta": query, "beneficiarios": beneficiarios}
+                driver.usado()
+                break
+            logger.warning("Chrome sem resposta em %s (%s), reiniciando", url, e)
+            driver.renova()
+            if tentativa:
+                logger.error("Erro no beneficiário %s: %s", url, e)
+                break
+            metricas.conta("rpa_beneficiarios_repetidos_total")
+            continue
+        driver.usado()
+        metricas.conta("rpa_beneficiarios_total", resultado="ok")
+        return registro
+    metricas.conta("rpa_beneficiarios_total", resultado="erro")
+    return None
+
+
+def _em_ordem(
+    itens: Iterable, tarefa: Callable[..., Optional[dict]], workers: int
+) -> Iterator[Tuple[object, dict]]:
+    """
+    Submete `tarefa(item)` a `workers` threads assim que cada item da
+    listagem chega (ela roda numa thread própria, então a página 1 já é
+    processada enquanto as seguintes carregam) e gera pares (item, resultado)
+    na ordem da lista.
+    Na primeira falha de tarefa a listagem para, os pendentes são
+    descartados e o erro é propagado.
+    """
+    fila: "queue.Queue" = queue.Queue()
+    parar = threading.Event()
+    falhas: list = []
+    fim = object()
+
+    def executa(item):
+        if parar.is_set():
+            raise RuntimeError("Coleta interrompida")
+        try:
+            return tarefa(item)
+        except Exception as e:
+            falhas.append(e)
+            parar.set()
+            raise
+
+    ex = ThreadPoolExecutor(max_workers=workers)
+
+    def produtor():
+        try:
+            for item in itens:
+                if parar.is_set():
+                    break
+                fila.put((item, ex.submit(executa, item)))
+        except Exception as e:
+            fila.put(e)
+        finally:
+            fila.put(fim)
+
+    listagem = threading.Thread(target=produtor, name="listagem", daemon=True)
+    listagem.start()
+    try:
+        while True:
+            pronto = fila.get()
+            if pronto is fim:
+                break
+            if isinstance(pronto, Exception):
+                raise pronto
+            item, futuro = pronto
+            try:
+                registro = futuro.result()
+            except Exception:
+                logger.error("Worker falhou, cancelando pendentes")
+                raise falhas[0] if falhas else futuro.exception()
+            if registro is not None:
+                yield item, registro
+    finally:
+        parar.set()
+        listagem.join()
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+# --------------------------------------------------------------------------- #
+# Pool de workers                                                             #
+# --------------------------------------------------------------------------- #
+
+
+def _abre_drivers(visible: bool, workers: int) -> list:
+    """Sobe `workers` ChromeDrivers em paralelo; se algum falhar, fecha todos."""
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futuros = [
+            ex.submit(ChromeGerenciado, visible, f"worker_{i:02d}", new_driver)
+            for i in range(1, workers + 1)
+        ]
+    drivers, erro = [], None
+    for f in futuros:
+        try:
+            drivers.append(f.result())
+        except Exception as e:
+            erro = erro or e
+    if erro is not None:
+        _fecha_drivers(drivers)
+        raise erro
+    return drivers
+
+
+def _fecha_drivers(drivers: list):
+    for d in drivers:
+        try:
+            fecha_sessao(d)
+            d.quit()
+        except Exception as e:
+            logger.warning("Erro ao encerrar driver: %s", e)
+
+
+def _coleta_pool(
+    visible: bool,
+    base_dir: Path | None,
+    workers: int,
+    consultas: List[Optional[str]],
+    max_results: Optional[int],
+    page_size: int,
+    pular: Collection[str],
+) -> Iterator[Tuple[Optional[str], str, Beneficiario]]:
+    """
+    Mantém `workers` ChromeDrivers aquecidos e espalha os links entre eles.
+    Cada worker grava evidências em `<run_dir>/worker_NN`. Um Chrome morto
+    é trocado pelo próprio worker (ver `_coleta_beneficiario`); se mesmo
+    assim um worker falhar, os pendentes são cancelados e todos os drivers
+    são encerrados antes de propagar o erro.
+    """
+    base = base_dir or Path(".")
+    drivers = _abre_drivers(visible, workers)
+    livres: "queue.Queue[tuple[Path, object]]" = queue.Queue()
+    # o 1º driver fica com a listagem e só entra no rodízio quando ela acaba
+    for i, d in enumerate(drivers[1:], 2):
+        livres.put((base / f"worker_{i:02d}", d))
+
+    def itens():
+        try:
+            yield from _lista_lote(
+                consultas,
+                lambda q: itera_beneficiarios(drivers[0], q, max_results, page_size),
+                pular,
+            )
+        finally:
+            livres.put((base / "worker_01", drivers[0]))
+
+    def tarefa(item: Tuple[Optional[str], str]):
+        worker_dir, driver = livres.get()
+        try:
+            return _coleta_beneficiario(driver, item[1], worker_dir)
+        finally:
+            livres.put((worker_dir, driver))
+
+    try:
+        for (consulta, url), registro in _em_ordem(itens(), tarefa, workers):
+            yield consulta, url, registro
+    finally:
+        _fecha_drivers(drivers)
+
+
+# --------------------------------------------------------------------------- #
+# Motor HTTP                                                                  #
+# --------------------------------------------------------------------------- #
+
+
+def _coleta_http(
+    visible: bool,
+    base_dir: Path | None,
+    workers: int,
+    session_cache: Optional[Path],
+    consultas: List[Optional[str]],
+    max_results: Optional[int],
+    page_size: int,
+    pular: Collection[str],
+) -> Iterator[Tuple[Optional[str], str, Beneficiario]]:
+    """
+    Coleta pelo `http_engine`: uma sessão compartilhada por `workers` threads
+    e um único Chrome, iniciado só se algum passo precisar dele. Cookies de
+    um bootstrap anterior (`session_cache`) são carregados logo de início.
+    """
+    sess = nova_sessao(pool_maxsize=max(HTTP_POOL_MAXSIZE, workers))
+    chrome = http_engine.ChromeSobDemanda(visible, sess, session_cache)
+    chrome.aquece()
+
+    def tarefa(item: Tuple[Optional[str], str]):
+        url = item[1]
+        try:
+            registro = http_engine.mapea_beneficiario(sess, chrome, url, base_dir)
+        except Exception as e:
+            logger.error("Erro no beneficiário %s: %s", url, e)
+            metricas.conta("rpa_beneficiarios_total", resultado="erro")
+            return None
+        metricas.conta("rpa_beneficiarios_total", resultado="ok")
+        return registro
+
+    def lista(q: Optional[str]):
+        return http_engine.itera_beneficiarios(
+            sess, chrome, q, max_results, page_size, base_dir
+        )
+
+    try:
+        itens = _lista_lote(consultas, lista, pular)
+        for (consulta, url), registro in _em_ordem(itens, tarefa, max(1, workers)):
+            yield consulta, url, registro
     finally:
-        driver.quit()
+        chrome.quit()
+        sess.close()
@@ -0,0 +1,252 @@
+"""
+Limite de requisições por host (token bucket), compartilhado por todas as
+threads e sessões do processo. Aplicado no adapter HTTP (ver `session`).
+
+O limite é adaptativo (AIMD, como o controle de congestionamento do TCP):
+cada resposta boa sobe devagar a taxa e a janela de requisições simultâneas
+até o teto configurado; cada sinal de estrangulamento do portal (429/503,
+página HTML no lugar do JSON, timeout ou latência muito acima da base) corta
+as duas pela metade. Assim a coleta roda perto da maior taxa que o portal
+aguenta sem cair nos bloqueios.
+"""
+
+import logging, threading, time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from . import metricas
+from .constants import (
+    HTTP_LATENCIA_FATOR,
+    HTTP_POOL_MAXSIZE,
+    HTTP_RAJADA_POR_HOST,
+    HTTP_RECUO,
+    HTTP_TAXA_MINIMA,
+    HTTP_TAXA_POR_HOST,
+)
+
+logger = logging.getLogger("rpa")
+
+# respostas antes de a latência base valer como referência e folga mínima (s)
+# acima dela, para o ruído de respostas de milissegundos não contar como sinal
+AMOSTRAS_LATENCIA = 10
+FOLGA_LATENCIA = 0.2
+
+
+class Balde:
+    """Token bucket: `taxa` fichas por segundo, acumulando até `rajada`."""
+
+    def __init__(self, taxa: float, rajada: int):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.fichas = float(rajada)
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _repoe(self, agora: float):
+        self.fichas = min(self.rajada, self.fichas + (agora - self.ultimo) * self.taxa)
+        self.ultimo = agora
+
+    def ajusta(self, taxa: float, rajada: int):
+        """Muda a taxa e a rajada, mantendo as fichas acumuladas (até a rajada)."""
+        with self.lock:
+            self._repoe(time.monotonic())
+            self.taxa = taxa
+            self.rajada = rajada
+            self.fichas = min(self.fichas, rajada)
+
+    def aguarda(self):
+        """Bloqueia até haver uma ficha disponível e a consome."""
+        while True:
+            with self.lock:
+                self._repoe(time.monotonic())
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.taxa
+            time.sleep(espera)
+
+
+class Controle:
+    """
+    AIMD de um host sobre um `Balde` e uma janela de requisições simultâneas.
+    `entra()` antes de cada requisição e `sai()` com o resultado depois.
+    Com `adaptativo=False` a taxa e a janela ficam fixas no teto.
+    """
+
+    def __init__(
+        self, host: str, teto: float, rajada: int, janela: int, adaptativo=True
+    ):
+        self.host = host
+        self.teto = teto
+        self.taxa = teto
+        self.rajada = rajada
+        self.balde = Balde(teto, rajada)
+        self.janela_max = janela
+        self.janela = float(janela)
+        self.adaptativo = adaptativo
+        self.em_voo = 0
+        self.cond = threading.Condition()
+        self.latencia: Optional[float] = None  # média móvel (s)
+        self.base: Optional[float] = None  # menor média vista, subindo devagar
+        self.amostras = 0
+        self.ultimo_corte = float("-inf")
+        self.calma_ate = 0.0  # depois de um corte, não sobe até aqui
+        self.ultimo_sinal = float("-inf")
+
+    def entra(self):
+        """Espera uma vaga na janela e uma ficha do balde."""
+        with self.cond:
+            while self.em_voo >= int(self.janela):
+                self.cond.wait()
+            self.em_voo += 1
+        self.balde.aguarda()
+
+    def sai(self, enviada: float, sinal: Optional[str] = None):
+        """
+        Libera a vaga da requisição enviada em `enviada` (`time.monotonic()`).
+        `sinal` é o motivo do estrangulamento percebido pelo adapter (ex.:
+        "429", "nao_json", "timeout"); sem ele, a latência da resposta ainda
+        pode indicar sobrecarga.
+        """
+        with self.cond:
+            self.em_voo -= 1
+            if self.adaptativo and not sinal:
+                sinal = self._mede(time.monotonic() - enviada)
+            if sinal:
+                self.ultimo_sinal = time.monotonic()
+                if self.adaptativo:
+                    self._recua(sinal, enviada)
+            elif self.adaptativo:
+                self._avanca()
+            self.cond.notify_all()
+
+    def _mede(self, segundos: float) -> Optional[str]:
+        self.amostras += 1
+        if self.latencia is None:
+            self.latencia = segundos
+        else:
+            self.latencia += (segundos - self.latencia) * 0.2
+        if self.base is None or self.latencia < self.base:
+            self.base = self.latencia
+        else:
+            # a base acompanha devagar uma mudança duradoura do portal
+            self.base += (self.latencia - self.base) * 0.01
+        if (
+            self.amostras >= AMOSTRAS_LATENCIA
+            and self.latencia > HTTP_LATENCIA_FATOR * self.base
+            and self.latencia > self.base + FOLGA_LATENCIA
+        ):
+            return "latencia"
+        return None
+
+    def _recua(self, motivo: str, enviada: float):
+        agora = time.monotonic()
+        if enviada < self.ultimo_corte:
+            # enviada ainda na taxa antiga (ex.: retentativas do urllib3 com
+            # Retry-After): o corte que ela pediria já foi feito
+            return
+        self.taxa = max(HTTP_TAXA_MINIMA, self.taxa * HTTP_RECUO)
+        self.janela = max(1.0, self.janela * HTTP_RECUO)
+        self.ultimo_corte = agora
+        self.calma_ate = agora + max(1.0, 2 * (self.latencia or 0.0))
+        self._ajusta_balde()
+        metricas.conta("rpa_ratelimit_recuos_total", host=self.host, motivo=motivo)
+        logger.info(
+            "Portal estrangulando %s (%s): %.1f req/s, %d simultâneas",
+            self.host,
+            motivo,
+            self.taxa,
+            int(self.janela),
+        )
+
+    def _avanca(self):
+        if time.monotonic() < self.calma_ate or (
+            self.taxa >= self.teto and self.janela >= self.janela_max
+        ):
+            return
+        # +1 req/s por segundo de respostas boas e +1 vaga por janela completa
+        self.taxa = min(self.teto, self.taxa + 1 / self.taxa)
+        self.janela = min(self.janela_max, self.janela + 1 / self.janela)
+        self._ajusta_balde()
+
+    def _ajusta_balde(self):
+        # a rajada encolhe junto com a taxa, senão o balde cheio fura o corte
+        rajada = max(1, round(self.rajada * self.taxa / self.teto))
+        self.balde.ajusta(self.taxa, rajada)
+        self._publica()
+
+    def _publica(self):
+        metricas.define("rpa_ratelimit_taxa", round(self.taxa, 3), host=self.host)
+        metricas.define("rpa_ratelimit_janela", int(self.janela), host=self.host)
+
+    def pausa(self) -> float:
+        """Segundos até o fim da calma após o último corte (0 se não há)."""
+        with self.cond:
+            return max(0.0, self.calma_ate - time.monotonic())
+
+
+_taxa = HTTP_TAXA_POR_HOST
+_rajada = HTTP_RAJADA_POR_HOST
+_janela = HTTP_POOL_MAXSIZE
+_adaptativo = True
+_controles: dict = {}
+_lock = threading.Lock()
+
+
+def configura(
+    taxa: float,
+    rajada: int | None = None,
+    adaptativo: bool = True,
+    janela: int = HTTP_POOL_MAXSIZE,
+):
+    """
+    Redefine o limite por host (req/s), que passa a ser o teto do controle
+    adaptativo. `taxa <= 0` desliga o limite (e a adaptação).
+    """
+    global _taxa, _rajada, _janela, _adaptativo
+    with _lock:
+        _taxa = taxa
+        _rajada = rajada if rajada is not None else max(1, int(taxa))
+        _janela = janela
+        _adaptativo = adaptativo
+        _controles.clear()
+
+
+def controle(url: str) -> Optional[Controle]:
+    """`Controle` do host de `url` (None com o limite desligado)."""
+    if _taxa <= 0:
+        return None
+    host = urlsplit(url).netloc
+    with _lock:
+        c = _controles.get(host)
+        if c is None:
+            c = _controles[host] = Controle(host, _taxa, _rajada, _janela, _adaptativo)
+    return c
+
+
+def aguarda(url: str) -> Optional[Controle]:
+    """
+    Espera a vez de fazer uma requisição para o host de `url`. Quem chama
+    devolve a vaga com `sai()` no `Controle` retornado.
+    """
+    c = controle(url)
+    if c is not None:
+        c.entra()
+    return c
+
+
+def estrangulado(url: str, janela: float = 5.0) -> bool:
+    """O host de `url` deu sinal de estrangulamento nos últimos `janela` s?"""
+    c = controle(url)
+    return c is not None and time.monotonic() - c.ultimo_sinal < janela
+
+
+def esfria(url: str) -> float:
+    """Espera a calma do host de `url` passar; devolve os segundos esperados."""
+    c = controle(url)
+    if c is None:
+        return 0.0
+    # ao menos o intervalo de uma ficha, para não repetir na mesma rajada
+    pausa = max(c.pausa(), 1 / c.taxa)
+    time.sleep(pausa)
+    return pausa
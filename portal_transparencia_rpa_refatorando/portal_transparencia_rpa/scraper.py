@@ -1,65 +1,81 @@
 """
-Scraper principal para o Portal da Transparência.
-Mantém exatamente as mesmas funções, nomes e comentários do código original,
-apenas extraindo variáveis fixas para `constants.py` e a regex para `selectors.py`.
+Coleta pelo Chrome (`--engine chrome`) e peças comuns aos dois motores.
+
+Percorre a lista paginada da busca (`pagina_resultados`, também usada pelo
+`http_engine`), abre cada ficha e expande o accordion de benefícios. As
+parcelas vêm do JSON do portal pela sessão HTTP com os cookies do driver,
+vários benefícios em paralelo; só os que falharem caem na tabela HTML.
 """
 
-import json, logging, re, sys, time, uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 
 from selenium import webdriver
-from selenium.common.exceptions import (
-    NoSuchElementException,
-    ElementClickInterceptedException,
-)
+from selenium.common.exceptions import ElementClickInterceptedException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait as W
-from selenium.webdriver.support import expected_conditions as EC
 
 # ---- módulos do próprio projeto -------------------------------------------
+from . import esquemas, evidencias, images, json_api, metricas, parsers, waits
+from .modelos import Beneficiario, Beneficio, Parcela
 from .driver import build as new_driver  # cria o ChromeDriver
-from .constants import BASE, LIST_ENDPOINT, COLUNAS, PATH_JSON, RUN_DIR
-from .selectors import anchor_rx
+from .constants import (
+    BASE,
+    HTTP_TIMEOUT,
+    LIST_ENDPOINT,
+    PARCELAS_CONCORRENCIA,
+    RUN_DIR,
+    TAMANHO_PAGINA_LISTA,
+)
+from .selectors import anchor_rx, beneficio_rx, pessoa_rx
+from .session import sessao_do_driver, sincroniza_cookies, texto_html
+from .utils import higienizar as _higienizar
 # ----------------------------------------------------------------------------
 
 logger = logging.getLogger("rpa")
 
+# formato do screenshot da ficha (ver `images.FORMATOS`; None = não captura)
+SCREENSHOT: Optional[str] = "base64"
+
 
 # --------------------------------------------------------------------------- #
 # Utilidades                                                                  #
 # --------------------------------------------------------------------------- #
 
 
+def navega(driver: webdriver.Chrome, url: str):
+    """`driver.get(url)` medido (etapa `driver_get`)."""
+    with metricas.span("driver_get"):
+        driver.get(url)
+
+
+@metricas.cronometrado("espera_dom")
 def espera_dom(driver: webdriver.Chrome, timeout: int = 20):
-    """Espera o DOM carregar completamente (document.readyState == 'complete')."""
-    W(driver, timeout).until(
-        lambda d: d.execute_script("return document.readyState") == "complete"
-    )
+    """Espera o DOM carregar (evento `readystatechange`, ver `waits`)."""
+    waits.espera_carga(driver, timeout)
 
 
+@metricas.cronometrado("espera_resultados")
 def espera_resultados(driver: webdriver.Chrome, timeout: int = 30) -> List[str]:
     """Espera aparecerem os links de beneficiários na lista de resultados."""
-    espera_dom(driver)
-    fim = time.time() + timeout
-    while time.time() < fim:
-        links = driver.find_elements(By.CSS_SELECTOR, "#resultados a.link-busca-nome")
-        if links:
-            return [
-                a.get_attribute("href") or "" for a in links if a.get_attribute("href")
-            ]
-        time.sleep(1)
+    css = "#resultados a.link-busca-nome"
+    if waits.espera_seletor(driver, css, timeout, "lista", obrigatorio=False):
+        links = driver.find_elements(By.CSS_SELECTOR, css)
+        return [h for h in (a.get_attribute("href") for a in links) if h]
     # fallback via regex, se o CSS não achou nada
     return [BASE + h for h in anchor_rx.findall(driver.page_source)]
 
 
-def url_lista_beneficiarios(query: Optional[str]):
-    """Monta a URL da lista de beneficiários (até 10 por página)."""
+def url_lista_beneficiarios(
+    query: Optional[str], pagina: int = 1, tamanho: int = TAMANHO_PAGINA_LISTA
+):
+    """Monta a URL de uma página da lista de beneficiários."""
     from urllib.parse import quote_plus, urlencode
 
     params = {
-        "pagina": 1,
-        "tamanhoPagina": 10,
+        "pagina": pagina,
+        "tamanhoPagina": tamanho,
         "beneficiarioProgramaSocial": "true",
     }
     if query:
@@ -68,24 +84,13 @@ def url_lista_beneficiarios(query: Optional[str]):
 
 
 def salva_evidencia(driver, prefixo: str, base_dir: Path | None = None):
-    uid = uuid.uuid4().hex[:8]
-    base = base_dir or RUN_DIR or Path(".")
-
-    html_path = base / "html" / f"{prefixo}_{uid}.html"
-    png_path = base / "png" / f"{prefixo}_{uid}.png"
-
-    # cria as sub-pastas se preciso
-    html_path.parent.mkdir(parents=True, exist_ok=True)
-    png_path.parent.mkdir(parents=True, exist_ok=True)
-
-    html_path.write_text(driver.page_source, encoding="utf-8")
-    driver.save_screenshot(str(png_path))
-    logger.info("Evidência salva: %s_%s", prefixo, uid)
+    """Captura HTML + screenshot; a gravação fica em segundo plano (`evidencias`)."""
+    evidencias.captura(driver, prefixo, base_dir or RUN_DIR or Path("."))
 
 
 def higienizar(txt: Optional[str]) -> str:
     """Remove espaços/quebras de linha duplicados e trata None."""
-    return re.sub(r"\s+", " ", txt or "").strip()
+    return _higienizar(txt)
 
 
 # --------------------------------------------------------------------------- #
@@ -93,28 +98,95 @@ def higienizar(txt: Optional[str]) -> str:
 # --------------------------------------------------------------------------- #
 
 
-def busca_beneficiarios(driver: webdriver.Chrome, query: Optional[str]):
-    """Retorna (máx. 10) links de beneficiários para a pesquisa fornecida."""
-    driver.get(url_lista_beneficiarios(query))
-    links = espera_resultados(driver)
-    if not links:
-        salva_evidencia(driver, "erro_lista", RUN_DIR)
-        raise RuntimeError("Nenhum beneficiário encontrado")
+def pessoa_id(url: str) -> str:
+    """Id da pessoa embutido na URL da ficha (ou a própria URL, se não houver)."""
+    m = pessoa_rx.search(url)
+    return m.group(1) if m else url
 
-    salva_evidencia(driver, "sucesso_lista", RUN_DIR)
-    # remove duplicados preservando ordem
-    return list(dict.fromkeys(links))[:10]
 
+def pagina_resultados(
+    busca_pagina: Callable[[int], List[str]],
+    max_results: Optional[int] = None,
+    page_size: int = TAMANHO_PAGINA_LISTA,
+) -> Iterator[str]:
+    """
+    Percorre as páginas da busca chamando `busca_pagina(n)` e gera os links
+    assim que cada página chega, sem repetir pessoas (por id). Para numa
+    página vazia, numa página sem ids novos, numa página menor que a 1ª ou
+    em `max_results` — sem pedir a página seguinte, que no Chrome custaria a
+    espera inteira por uma lista vazia.
+
+    O portal limita o `tamanhoPagina` por conta própria: a 1ª página define
+    o tamanho efetivo. Até `TAMANHO_PAGINA_LISTA` (o da busca do próprio
+    portal) o pedido é sempre atendido, então uma 1ª página menor é o fim da
+    lista. Acima disso ela pode ser o limite do servidor; a página seguinte
+    (vazia, se era o fim) decide.
+    """
+    vistos = set()
+    pagina = 1
+    efetivo = page_size
+    while True:
+        links = busca_pagina(pagina)
+        if pagina == 1 and links:
+            efetivo = min(page_size, len(links))
+        novos = 0
+        for link in links:
+            chave = pessoa_id(link)
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+            novos += 1
+            yield link
+            if max_results and len(vistos) >= max_results:
+                return
+        if not novos or len(links) < efetivo:
+            return
+        if pagina == 1 and len(links) < min(page_size, TAMANHO_PAGINA_LISTA):
+            return
+        pagina += 1
+
+
+@metricas.cronometrado("lista")
+def _pagina_lista(
+    driver: webdriver.Chrome, query: Optional[str], pagina: int, page_size: int
+) -> List[str]:
+    """Links de uma página da lista; a 1ª página vazia é erro (com evidência)."""
+    navega(driver, url_lista_beneficiarios(query, pagina, page_size))
+    # depois da 1ª página, lista vazia só significa fim: não espera 30 s
+    links = espera_resultados(driver, 30 if pagina == 1 else 10)
+    if pagina == 1:
+        if not links:
+            salva_evidencia(driver, "erro_lista", RUN_DIR)
+            raise RuntimeError("Nenhum beneficiário encontrado")
+        salva_evidencia(driver, "sucesso_lista", RUN_DIR)
+    return links
+
+
+def itera_beneficiarios(
+    driver: webdriver.Chrome,
+    query: Optional[str],
+    max_results: Optional[int] = None,
+    page_size: int = TAMANHO_PAGINA_LISTA,
+) -> Iterator[str]:
+    """Gera (sob demanda) os links de todas as páginas da pesquisa."""
+    return pagina_resultados(
+        lambda pagina: _pagina_lista(driver, query, pagina, page_size),
+        max_results,
+        page_size,
+    )
 
-def get_texto(driver: webdriver.Chrome, label: str) -> str:
-    """Extrai o texto de um campo exibido na ficha do beneficiário."""
-    xp = f"//strong[normalize-space()='{label}']/following-sibling::span"
-    try:
-        return driver.find_element(By.XPATH, xp).text.strip()
-    except NoSuchElementException:
-        return ""
+
+def busca_beneficiarios(
+    driver: webdriver.Chrome,
+    query: Optional[str],
+    max_results: Optional[int] = 10,
+    page_size: int = TAMANHO_PAGINA_LISTA,
+):
+    """Retorna (máx. `max_results`) links de beneficiários para a pesquisa."""
+    return list(itera_beneficiarios(driver, query, max_results, page_size))
 
 
+@metricas.cronometrado("abrir_beneficios")
 def abrir_beneficios(driver: webdriver.Chrome, timeout: int = 10):
     """Expande o accordion de recebimentos."""
     header = driver.find_element(
@@ -132,10 +204,8 @@ def abrir_beneficios(driver: webdriver.Chrome, timeout: int = 10):
         except Exception:
             pass
 
-    W(driver, timeout).until(
-        EC.presence_of_element_located(
-            (By.CSS_SELECTOR, "#accordion-recebimentos-recursos div.br-table")
-        )
+    waits.espera_seletor(
+        driver, "#accordion-recebimentos-recursos div.br-table", timeout, "beneficios"
     )
 
 
@@ -144,253 +214,284 @@ def fetch_parcelas_json(
     segmento: str,
     sk_beneficiario: str,
     pessoa_id: str,
-) -> List[Dict]:
+    referer: Optional[str] = None,
+) -> List[Parcela]:
     """
-    Usa os cookies do Selenium para chamar o endpoint JSON
-    e devolve a lista de parcelas já no formato esperado.
+    Usa a sessão HTTP do driver (cookies do Selenium, ver `session`) para
+    chamar o endpoint JSON e devolve a lista de parcelas já no formato esperado.
     """
-    path = (
-        PATH_JSON.get(segmento, "sacado/resultado")
-        if segmento != "safra"
-        else "recebido/resultado"
+    return parcelas_da_sessao(
+        sessao_do_driver(driver),
+        segmento,
+        sk_beneficiario,
+        pessoa_id,
+        referer or driver.current_url,
     )
-    url = f"{BASE}/beneficios/{segmento}/{path}"
 
-    params = {
-        "paginacaoSimples": "true",
-        "tamanhoPagina": 1000,
-        "offset": 0,
-        "direcaoOrdenacao": "desc",
-        "colunaOrdenacao": "numeroParcela"
-        if segmento == "auxilio-emergencial"
-        else "mesReferencia",
-        "colunasSelecionadas": COLUNAS[segmento],
-        (
-            "skBeneficiario"
-            if segmento in ("auxilio-emergencial", "safra")
-            else "beneficiario"
-        ): sk_beneficiario,
-        "pessoa": pessoa_id,
-    }
 
-    import requests
+def parcelas_da_sessao(
+    sess,
+    segmento: str,
+    sk_beneficiario: str,
+    pessoa_id: str,
+    referer: Optional[str] = None,
+) -> List[Parcela]:
+    """Busca todas as páginas de parcelas, normalizando cada uma ao chegar."""
+    out: List[Parcela] = []
+    for pagina in json_api.itera_parcelas(
+        sess, segmento, sk_beneficiario, pessoa_id, referer
+    ):
+        out.extend(normaliza_parcelas(segmento, pagina))
+    return out
+
+
+def normaliza_parcelas(segmento: str, data: List[Dict]) -> List[Parcela]:
+    """Converte as linhas do endpoint JSON para o formato de saída."""
+    return esquemas.normaliza_json(segmento, data)
 
-    sess = requests.Session()
-    for ck in driver.get_cookies():
-        sess.cookies.set(ck["name"], ck["value"])
 
-    headers = {
-        "Accept": "application/json, text/plain, */*",
-        "Referer": driver.current_url,
-        "X-Requested-With": "XMLHttpRequest",
-        "User-Agent": driver.execute_script("return navigator.userAgent;"),
+# campos da ficha e cards do accordion numa única ida ao navegador
+_JS_FICHA = """
+const [labels, seletor] = arguments;
+const campos = {};
+const strongs = Array.from(document.getElementsByTagName("strong"));
+for (const label of labels) {
+    campos[label] = "";
+    for (const s of strongs) {
+        if (s.textContent.replace(/\\s+/g, " ").trim() !== label) continue;
+        let irmao = s.nextElementSibling;
+        while (irmao && irmao.tagName !== "SPAN") irmao = irmao.nextElementSibling;
+        if (irmao) { campos[label] = irmao.innerText; break; }
     }
+}
+const cards = [];
+let incompletos = 0;
+for (const box of document.querySelectorAll(seletor)) {
+    const strong = box.querySelector("strong");
+    const row = box.querySelector("tbody tr");
+    const link = row && row.querySelector("a.br-button");
+    if (!strong || !link) { incompletos++; continue; }
+    cards.push({
+        titulo: strong.textContent,
+        cols: Array.from(row.querySelectorAll("td"), td => td.textContent),
+        href: link.href,
+    });
+}
+return {campos, cards, incompletos};
+"""
+CAMPOS_FICHA = ("Nome", "CPF", "Localidade")
 
-    resp = sess.get(url, params=params, headers=headers, timeout=30)
-    resp.raise_for_status()
-    data = resp.json().get("data", [])
-
-    out: List[Dict] = []
-    for row in data:
-        if segmento == "auxilio-emergencial":
-            out.append(
-                dict(
-                    mes_disponibilizacao=higienizar(row["mesDisponibilizacao"]),
-                    parcela=higienizar(row["numeroParcela"]),
-                    uf=higienizar(row["uf"]),
-                    municipio=higienizar(row["municipio"]),
-                    enquadramento=higienizar(row["enquadramento"]),
-                    valor=higienizar(row["valor"]),
-                    observacao=higienizar(row["observacao"]),
-                )
-            )
-        elif segmento == "auxilio-brasil":
-            out.append(
-                dict(
-                    mes_folha=higienizar(row["mesFolha"]),
-                    mes_ref=higienizar(row["mesReferencia"]),
-                    uf=higienizar(row["uf"]),
-                    municipio=higienizar(row["municipio"]),
-                    valor=higienizar(row["valor"]),
-                )
-            )
-        elif segmento == "bolsa-familia":
-            out.append(
-                dict(
-                    mes_folha=higienizar(row["mesFolha"]),
-                    mes_ref=higienizar(row["mesReferencia"]),
-                    uf=higienizar(row["uf"]),
-                    municipio=higienizar(row["municipio"]),
-                    qtd_dependentes=higienizar(row["quantidadeDependentes"]),
-                    valor=higienizar(row["valor"]),
-                )
-            )
-        elif segmento == "novo-bolsa-familia":
-            out.append(
-                dict(
-                    mes_folha=higienizar(row["mesFolha"]),
-                    mes_ref=higienizar(row["mesReferencia"]),
-                    uf=higienizar(row["uf"]),
-                    municipio=higienizar(row["municipio"]),
-                    valor=higienizar(row["valor"]),
-                )
-            )
-        elif segmento == "safra":
-            out.append(
-                dict(
-                    mes_folha=higienizar(row["mesFolha"]),
-                    uf=higienizar(row["uf"]),
-                    municipio=higienizar(row["municipio"]),
-                    valor=higienizar(row["valor"]),
-                )
-            )
-    return out
+
+@metricas.cronometrado("coletar_cards")
+def extrai_ficha(driver: webdriver.Chrome) -> dict:
+    """
+    Campos da ficha (`CAMPOS_FICHA`) e cards do accordion com um único
+    `execute_script`, em vez de um `find_element` por campo, card e célula.
+    Devolve {"campos": {label: texto}, "cards": [...]}, já higienizado.
+    """
+    bruto = driver.execute_script(
+        _JS_FICHA,
+        list(CAMPOS_FICHA),
+        "#accordion-recebimentos-recursos div.br-table div.responsive",
+    )
+    if bruto["incompletos"]:
+        logger.warning("%d card(s) sem título ou link ignorados", bruto["incompletos"])
+    return dict(
+        campos={k: higienizar(v) for k, v in bruto["campos"].items()},
+        cards=[
+            parsers.monta_card(c["titulo"], c["cols"], c["href"])
+            for c in bruto["cards"]
+        ],
+    )
 
 
-def coletar_cards(driver: webdriver.Chrome) -> List[dict]:
+def coletar_cards(driver: webdriver.Chrome) -> List[Beneficio]:
     """Coleta os cards exibidos dentro do accordion de recebimentos."""
-    cards = []
-    selector = "#accordion-recebimentos-recursos div.br-table div.responsive"
-    for box in driver.find_elements(By.CSS_SELECTOR, selector):
-        try:
-            titulo = higienizar(
-                box.find_element(By.TAG_NAME, "strong").get_attribute("textContent")
-            )
-            row = box.find_element(By.CSS_SELECTOR, "tbody tr")
-            cols = [
-                higienizar(td.get_attribute("textContent"))
-                for td in row.find_elements(By.TAG_NAME, "td")
-            ]
-            href = row.find_element(By.CSS_SELECTOR, "a.br-button").get_attribute(
-                "href"
-            )
-            cards.append(
-                dict(
-                    beneficio=titulo,
-                    nis=cols[1] if len(cols) > 1 else "",
-                    nome=cols[2] if len(cols) > 2 else "",
-                    valor_recebido=cols[3] if len(cols) > 3 else "",
-                    href=href,
-                    parcelas=[],
-                )
-            )
-        except Exception as e:
-            logger.warning("Erro ao coletar card: %s", e)
-    return cards
+    return extrai_ficha(driver)["cards"]
 
 
 def mapea_beneficio(
-    driver: webdriver.Chrome, url: str, beneficiario_id: str
-) -> List[dict]:
+    driver: webdriver.Chrome,
+    url: str,
+    beneficiario_id: str,
+    referer: Optional[str] = None,
+) -> List[Parcela]:
     """Mapeia as parcelas de um benefício (JSON + fallback HTML)."""
-    m = re.search(r"/beneficios/([^/]+)/(\d+)", url)
-    segmento = m.group(1) if m else ""
-    sk_beneficiario = m.group(2) if m else ""
-
     # 1º: tenta via JSON (mais rápido)
     try:
-        return fetch_parcelas_json(driver, segmento, sk_beneficiario, beneficiario_id)
+        return parcelas_json(driver, url, beneficiario_id, referer)
     except Exception as e:
         logger.warning("Erro ao coletar parcelas JSON: %s", e)
 
     # 2º: fallback raspando a tabela HTML
-    driver.get(url)
-    espera_dom(driver)
-    W(driver, 30).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr"))
+    return parcelas_html(driver, url, referer)
+
+
+def _segmento_sk(url: str):
+    m = beneficio_rx.search(url)
+    return (m.group(1), m.group(2)) if m else ("", "")
+
+
+def parcelas_json(
+    driver: webdriver.Chrome,
+    url: str,
+    beneficiario_id: str,
+    referer: Optional[str] = None,
+) -> List[Parcela]:
+    """
+    Parcelas do benefício `url` via endpoint JSON. Com `referer` informado não
+    fala com o WebDriver, então pode rodar em várias threads ao mesmo tempo.
+    """
+    segmento, sk_beneficiario = _segmento_sk(url)
+    return fetch_parcelas_json(
+        driver, segmento, sk_beneficiario, beneficiario_id, referer
     )
 
-    parcelas: List[Dict] = []
-    for tr in driver.find_elements(By.CSS_SELECTOR, "table tbody tr"):
-        tds = tr.find_elements(By.TAG_NAME, "td")
-        if segmento == "auxilio-brasil" and len(tds) >= 5:
-            parcelas.append(
-                dict(
-                    mes_folha=higienizar(tds[0].text),
-                    mes_ref=higienizar(tds[1].text),
-                    uf=higienizar(tds[2].text),
-                    municipio=higienizar(tds[3].text),
-                    valor=higienizar(tds[4].text),
-                )
-            )
-        elif segmento == "auxilio-emergencial" and len(tds) >= 7:
-            parcelas.append(
-                dict(
-                    mes_disponibilizacao=higienizar(tds[0].text),
-                    parcela=higienizar(tds[1].text),
-                    uf=higienizar(tds[2].text),
-                    municipio=higienizar(tds[3].text),
-                    enquadramento=higienizar(tds[4].text),
-                    valor=higienizar(tds[5].text),
-                    observacao=higienizar(tds[6].text),
-                )
-            )
-        elif segmento == "bolsa-familia" and len(tds) >= 6:
-            parcelas.append(
-                dict(
-                    mes_folha=higienizar(tds[0].text),
-                    mes_ref=higienizar(tds[1].text),
-                    uf=higienizar(tds[2].text),
-                    municipio=higienizar(tds[3].text),
-                    qtd_dependentes=higienizar(tds[4].text),
-                    valor=higienizar(tds[5].text),
-                )
-            )
-        elif segmento == "novo-bolsa-familia" and len(tds) >= 5:
-            parcelas.append(
-                dict(
-                    mes_folha=higienizar(tds[0].text),
-                    mes_ref=higienizar(tds[1].text),
-                    uf=higienizar(tds[2].text),
-                    municipio=higienizar(tds[3].text),
-                    valor=higienizar(tds[4].text),
-                )
-            )
-        elif segmento == "safra" and len(tds) >= 4:
-            parcelas.append(
-                dict(
-                    mes_folha=higienizar(tds[0].text),
-                    uf=higienizar(tds[1].text),
-                    municipio=higienizar(tds[2].text),
-                    valor=higienizar(tds[3].text),
-                )
-            )
-    return parcelas
-
-
-def mapea_beneficiario(driver: webdriver.Chrome, url: str):
-    """Coleta dados do beneficiário + benefícios / parcelas."""
+
+@metricas.cronometrado("parcelas_html")
+def parcelas_html(
+    driver: webdriver.Chrome, url: str, referer: Optional[str] = None
+) -> List[Parcela]:
+    """Raspa a tabela HTML do benefício sem tirar o navegador da ficha."""
+    metricas.conta("rpa_fallback_total", para="html")
+    segmento, _ = _segmento_sk(url)
+    try:
+        linhas = _linhas_http(driver, url, referer)
+    except Exception as e:
+        logger.warning("Erro ao baixar tabela HTML via HTTP: %s", e)
+        linhas = []
+    if not linhas:
+        metricas.conta("rpa_fallback_total", para="aba")
+        linhas = _linhas_em_aba(driver, url, referer)
+    return linhas_para_parcelas(segmento, linhas)
+
+
+def _linhas_http(
+    driver: webdriver.Chrome, url: str, referer: Optional[str] = None
+) -> List[List[str]]:
+    """Baixa a página do benefício pela sessão HTTP do driver e lê a tabela."""
+    headers = {"Referer": referer} if referer else {}
+    resp = sessao_do_driver(driver).get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    resp.raise_for_status()
+    return parsers.extrai_linhas(texto_html(resp))
+
+
+def _linhas_em_aba(
+    driver: webdriver.Chrome, url: str, referer: Optional[str] = None
+) -> List[List[str]]:
+    """
+    Abre a página do benefício numa aba nova e fecha ao final, de modo que a
+    ficha continua carregada na aba original. Se não for possível abrir aba,
+    navega na própria aba e restaura a ficha (`referer`) em seguida.
+    """
+    original = driver.current_window_handle
+    try:
+        driver.switch_to.new_window("tab")
+        em_aba = True
+    except Exception as e:
+        logger.warning("Não foi possível abrir nova aba: %s", e)
+        em_aba = False
+
+    try:
+        navega(driver, url)
+        waits.espera_seletor(driver, "table tbody tr", 30, "parcelas_html")
+        return [
+            [td.text for td in tr.find_elements(By.TAG_NAME, "td")]
+            for tr in driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
+        ]
+    finally:
+        if em_aba:
+            driver.close()
+            driver.switch_to.window(original)
+        elif referer:
+            navega(driver, referer)
+            espera_dom(driver)
+            abrir_beneficios(driver)
+
+
+def linhas_para_parcelas(segmento: str, linhas: List[List[str]]) -> List[Parcela]:
+    """Converte as células da tabela HTML de parcelas para o formato de saída."""
+    return esquemas.normaliza_html(segmento, linhas)
+
+
+def parcelas_em_paralelo(busca, cards: List[Beneficio]):
+    """
+    Executa `busca(card.href)` para todos os cards com até
+    `PARCELAS_CONCORRENCIA` requisições simultâneas. Preenche `card.parcelas`
+    e devolve pares (card, erro) na ordem original.
+    """
+    if not cards:
+        return []
+    n = max(1, min(PARCELAS_CONCORRENCIA, len(cards)))
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        futuros = [ex.submit(busca, card.href) for card in cards]
+    resultado = []
+    for card, f in zip(cards, futuros):
+        erro = f.exception()
+        if erro is None:
+            card.parcelas = f.result()
+        resultado.append((card, erro))
+    return resultado
+
+
+@metricas.cronometrado("beneficiario")
+def mapea_beneficiario(
+    driver: webdriver.Chrome, url: str, base_dir: Path | None = None
+):
+    """
+    Coleta dados do beneficiário + benefícios / parcelas.
+    `base_dir` permite que cada worker grave suas evidências em pasta própria.
+    """
+    return _mapea_beneficiario(driver, url, base_dir)
+
+
+def _mapea_beneficiario(
+    driver: webdriver.Chrome, url: str, base_dir: Path | None = None
+):
+    """`mapea_beneficiario` sem a etapa "beneficiario" (fallback do motor HTTP)."""
     logger.info("Processando beneficiário %s", url)
-    driver.get(url)
+    navega(driver, url)
     espera_dom(driver)
 
-    beneficiario_match = re.search(r"/pessoa-fisica/(\d+)-", url)
+    beneficiario_match = pessoa_rx.search(url)
     beneficiario_id = beneficiario_match.group(1) if beneficiario_match else ""
 
-    beneficiario = dict(
-        nome=get_texto(driver, "Nome"),
-        cpf=get_texto(driver, "CPF"),
-        localidade=get_texto(driver, "Localidade"),
-        screenshot=driver.get_screenshot_as_base64(),
+    # screenshot antes de expandir o accordion, como sempre foi
+    screenshot = images.screenshot(driver, SCREENSHOT, RUN_DIR)
+    abrir_beneficios(driver)
+    ficha = extrai_ficha(driver)
+    beneficiario = Beneficiario(
+        nome=ficha["campos"]["Nome"],
+        cpf=ficha["campos"]["CPF"],
+        localidade=ficha["campos"]["Localidade"],
+        screenshot=screenshot,
         beneficios=[],
     )
 
-    abrir_beneficios(driver)
-    cards = coletar_cards(driver)
+    cards = ficha["cards"]
     ficha_url = driver.current_url
-
-    for card in cards:
+    # uma leitura do cookie jar por ficha; a sessão HTTP só muda se ele mudou
+    sincroniza_cookies(driver)
+
+    # 1º: JSON de todos os benefícios em paralelo (não usa o driver)
+    pendentes = []
+    for card, erro in parcelas_em_paralelo(
+        lambda href: parcelas_json(driver, href, beneficiario_id, ficha_url), cards
+    ):
+        if erro is not None:
+            logger.warning("Erro ao coletar parcelas JSON: %s", erro)
+            pendentes.append(card)
+
+    # 2º: fallback HTML, em série porque usa o navegador. Ele não tira o
+    # navegador da ficha (ver `_linhas_em_aba`), então não há recarga.
+    for card in pendentes:
         try:
-            card["parcelas"] = mapea_beneficio(driver, card["href"], beneficiario_id)
+            card.parcelas = parcelas_html(driver, card.href, ficha_url)
         except Exception as e:
-            logger.error("Erro no benefício %s: %s", card.get("href"), e)
-            salva_evidencia(driver, "beneficio", RUN_DIR)
-        finally:
-            driver.get(ficha_url)
-            espera_dom(driver)
-            abrir_beneficios(driver)
+            logger.error("Erro no benefício %s: %s", card.href, e)
+            salva_evidencia(driver, "beneficio", base_dir or RUN_DIR)
 
-    beneficiario["beneficios"] = cards
+    beneficiario.beneficios = cards
     return beneficiario
 
 
@@ -408,7 +509,7 @@ def run(query: Optional[str], visible: bool = False):
         beneficiarios = []
         for b in busca_beneficiarios(driver, query):
             try:
-                beneficiarios.append(mapea_beneficiario(driver, b))
+                beneficiarios.append(mapea_beneficiario(driver, b).para_dict())
             except Exception as e:
                 logger.error("Erro no beneficiário %s: %s", b, e)
                 salva_evidencia(driver, "beneficiario", RUN_DIR)
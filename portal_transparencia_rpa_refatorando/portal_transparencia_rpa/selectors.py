@@ -15,3 +15,7 @@ anchor_rx = re.compile(
 # CARD_SELECTOR      = "#accordion-recebimentos-recursos div.br-table div.responsive"
 # ACCORDION_HEADER   = "button.header[aria-controls='accordion-recebimentos-recursos']"
 # ACCORDION_TABLE    = "#accordion-recebimentos-recursos div.br-table"
+
+# Ids embutidos nas URLs da ficha e dos benefícios
+pessoa_rx = re.compile(r"/pessoa-fisica/(\d+)-")
+beneficio_rx = re.compile(r"/beneficios/([^/]+)/(\d+)")
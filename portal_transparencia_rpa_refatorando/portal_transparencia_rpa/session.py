@@ -0,0 +1,253 @@
+"""
+Sessões HTTP reaproveitáveis (keep-alive + pool de conexões + retry +
+limite adaptativo de requisições por host).
+
+Cada ChromeDriver ganha uma única `requests.Session` de vida longa
+(`sessao_do_driver`): o User-Agent é lido uma vez e os cookies só são
+recopiados quando o cookie jar do navegador muda.
+
+Os cookies de um bootstrap podem ser salvos em disco (`salva_cookies`) e
+reaproveitados por outras execuções até expirarem (`carrega_cookies`).
+"""
+
+import json, logging, os, threading, time, weakref
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metricas, ratelimit
+from .constants import (
+    HTTP_BACKOFF,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_RETRIES,
+    SESSAO_TTL,
+    USER_AGENT,
+)
+
+logger = logging.getLogger("rpa")
+
+# driver -> (sessão, impressão digital dos cookies)
+_SESSOES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+
+def _destino(url: str) -> str:
+    """Rótulo da rota do portal nas métricas HTTP."""
+    path = urlsplit(url).path
+    if path.endswith("/resultado"):
+        return "parcelas"
+    if "/busca/lista" in path:
+        return "lista"
+    if path.startswith("/busca/pessoa-fisica/"):
+        return "ficha"
+    if path.startswith("/beneficios/"):
+        return "beneficio"
+    return "outro"
+
+
+def _sinal(request, resp, retries) -> Optional[str]:
+    """Motivo de estrangulamento visto na resposta (e nas retentativas), se houver."""
+    estados = [h.status for h in retries.history] if retries is not None else []
+    for status in estados + [resp.status_code]:
+        if status in (429, 503):
+            return str(status)
+    # o portal às vezes responde o bloqueio com 200 e uma página HTML
+    if (
+        resp.status_code == 200
+        and "json" in request.headers.get("Accept", "")
+        and "json" not in resp.headers.get("Content-Type", "")
+    ):
+        return "nao_json"
+    return None
+
+
+class _AdaptadorLimitado(HTTPAdapter):
+    """
+    HTTPAdapter que respeita o limite por host de `ratelimit`, informa a ele
+    os sinais de estrangulamento e conta requisições, retentativas e bytes
+    por rota (ver `metricas`).
+    """
+
+    def send(self, request, **kwargs):
+        destino = _destino(request.url)
+        inicio = time.monotonic()
+        controle = ratelimit.aguarda(request.url)
+        enviada = time.monotonic()
+        metricas.observa("rpa_ratelimit_espera_seconds", enviada - inicio)
+        try:
+            resp = super().send(request, **kwargs)
+        except Exception as e:
+            if controle is not None:
+                lento = isinstance(e, (requests.Timeout, requests.ConnectionError))
+                controle.sai(enviada, "timeout" if lento else None)
+            metricas.conta(
+                "rpa_http_requisicoes_total", destino=destino, status=type(e).__name__
+            )
+            raise
+        retries = getattr(resp.raw, "retries", None)
+        if controle is not None:
+            controle.sai(enviada, _sinal(request, resp, retries))
+        metricas.conta(
+            "rpa_http_requisicoes_total", destino=destino, status=resp.status_code
+        )
+        if retries is not None and retries.history:
+            metricas.conta(
+                "rpa_http_retentativas_total", len(retries.history), destino=destino
+            )
+        if not kwargs.get("stream"):
+            metricas.conta("rpa_http_bytes_total", len(resp.content), destino=destino)
+        return resp
+
+
+def nova_sessao(pool_maxsize: int = HTTP_POOL_MAXSIZE) -> requests.Session:
+    """Cria uma `requests.Session` com pool de conexões dimensionado e retry."""
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        # devolve a última resposta; quem chama decide via raise_for_status()
+        raise_on_status=False,
+    )
+    sess = requests.Session()
+    adapter = _AdaptadorLimitado(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    sess.headers.update(
+        {
+            "User-Agent": USER_AGENT,
+            "Accept-Language": "pt-BR,pt;q=0.9",
+        }
+    )
+    return sess
+
+
+def texto_html(resp: requests.Response) -> str:
+    """HTML da resposta; sem charset no header, o portal serve UTF-8."""
+    if "charset" not in resp.headers.get("Content-Type", "").lower():
+        resp.encoding = "utf-8"
+    return resp.text
+
+
+def _copia_cookies(sess: requests.Session, cookies: list):
+    """Cookies no formato do Selenium -> cookie jar da sessão (mesmo domínio)."""
+    for ck in cookies:
+        sess.cookies.set(
+            ck["name"], ck["value"], domain=ck.get("domain", ""), path=ck.get("path", "/")
+        )
+
+
+def _impressao(cookies) -> frozenset:
+    return frozenset((c["name"], c["value"], c.get("domain")) for c in cookies)
+
+
+def associa_sessao(driver, sess: requests.Session):
+    """Registra `sess` como a sessão do `driver` (ex.: motor HTTP)."""
+    with _LOCK:
+        _SESSOES[driver] = [sess, None]
+
+
+def sessao_do_driver(driver) -> requests.Session:
+    """
+    Sessão de vida longa do `driver`. Na primeira chamada cria a sessão,
+    lê o User-Agent do navegador e copia os cookies; depois não faz nenhuma
+    chamada ao WebDriver.
+    """
+    with _LOCK:
+        estado = _SESSOES.get(driver)
+        if estado is None:
+            sess = nova_sessao()
+            sess.headers["User-Agent"] = driver.execute_script(
+                "return navigator.userAgent;"
+            )
+            estado = _SESSOES[driver] = [sess, None]
+    if estado[1] is None:
+        sincroniza_cookies(driver)
+    return estado[0]
+
+
+def sincroniza_cookies(driver) -> bool:
+    """
+    Recopia os cookies do navegador se o jar mudou desde a última cópia.
+    Retorna True quando houve atualização.
+    """
+    with _LOCK:
+        registrado = driver in _SESSOES
+    if not registrado:
+        sessao_do_driver(driver)
+        return True
+
+    cookies = driver.get_cookies()
+    impressao = _impressao(cookies)
+    with _LOCK:
+        estado = _SESSOES.get(driver)
+        if estado is None or estado[1] == impressao:
+            return False
+        _copia_cookies(estado[0], cookies)
+        estado[1] = impressao
+    logger.debug("Cookies sincronizados (%d)", len(cookies))
+    return True
+
+
+def fecha_sessao(driver):
+    """Fecha a sessão associada ao `driver` (chamar antes de `driver.quit()`)."""
+    with _LOCK:
+        estado = _SESSOES.pop(driver, None)
+    if estado is not None:
+        estado[0].close()
+
+
+# --------------------------------------------------------------------------- #
+# Cookies persistidos entre execuções                                         #
+# --------------------------------------------------------------------------- #
+
+
+def salva_cookies(path: Path, cookies: list, user_agent: str, ttl: int = SESSAO_TTL):
+    """
+    Grava cookies + User-Agent de um bootstrap. Vale por `ttl` segundos ou
+    até o primeiro cookie expirar, o que vier antes. Arquivo só do usuário.
+    """
+    expira = time.time() + ttl
+    for ck in cookies:
+        if ck.get("expiry"):
+            expira = min(expira, ck["expiry"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(
+            {"expira": expira, "user_agent": user_agent, "cookies": cookies}, f
+        )
+    os.replace(tmp, path)
+
+
+def carrega_cookies(path: Optional[Path]) -> Optional[dict]:
+    """Bootstrap salvo em `path`, se existir e ainda não tiver expirado."""
+    if path is None or not path.exists():
+        return None
+    try:
+        dados = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        logger.warning("Cookies salvos ilegíveis em %s, ignorando", path)
+        return None
+    if dados.get("expira", 0) <= time.time():
+        logger.info("Cookies salvos expiraram, novo bootstrap necessário")
+        return None
+    return dados
+
+
+def aplica_cookies(sess: requests.Session, dados: dict):
+    """Copia cookies e User-Agent salvos para a sessão."""
+    _copia_cookies(sess, dados["cookies"])
+    if dados.get("user_agent"):
+        sess.headers["User-Agent"] = dados["user_agent"]
@@ -1,4 +1,4 @@
-import re, time, logging
+import logging
 from selenium.webdriver.common.by import By
 from pathlib import Path
 from datetime import datetime
@@ -18,7 +18,9 @@ def get_run_dir() -> Path:
 
 
 def higienizar(txt: str) -> str:
-    return re.sub(r"\s+", " ", txt or "").strip()
+    # split() sem argumento quebra no mesmo conjunto de espaços que `\s`
+    # (Unicode), sem passar pelo cache de regex a cada célula
+    return " ".join((txt or "").split())
 
 
 def espera_dom(driver, timeout: int = 20):
@@ -0,0 +1,161 @@
+"""
+Esperas por evento no navegador.
+
+Em vez de consultar o DOM em laço (`time.sleep`), um script assíncrono
+(`execute_async_script`) fica escutando a página — MutationObserver para
+seletores, `readystatechange` para a carga — e devolve no instante em que a
+condição é satisfeita. Se o script não puder rodar (ex.: a página navegou no
+meio da espera) cai num polling com intervalo adaptativo (50 ms dobrando até
+1 s). Cada espera registra sua latência por nome (ver `resumo`).
+"""
+
+import logging, threading, time
+from typing import Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from . import driver as navegador
+
+logger = logging.getLogger("rpa")
+
+# cada chamada assíncrona fica abaixo do script timeout padrão (30 s) do Selenium
+_FATIA_JS = 25.0
+_POLL_MIN = 0.05
+_POLL_MAX = 1.0
+
+_JS_SELETOR = """
+const [css, ms, pronto] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+if (document.querySelector(css)) return pronto(true);
+let t;
+const obs = new MutationObserver(() => {
+    if (document.querySelector(css)) { obs.disconnect(); clearTimeout(t); pronto(true); }
+});
+obs.observe(document.documentElement || document, {childList: true, subtree: true});
+t = setTimeout(() => { obs.disconnect(); pronto(false); }, ms);
+"""
+
+_JS_CARGA = """
+const [estado, ms, pronto] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+const ok = () => document.readyState === "complete" ||
+    (estado === "interactive" && document.readyState === "interactive");
+if (ok()) return pronto(true);
+const t = setTimeout(() => pronto(false), ms);
+document.addEventListener("readystatechange", () => {
+    if (ok()) { clearTimeout(t); pronto(true); }
+});
+"""
+
+
+# --------------------------------------------------------------------------- #
+# Latências                                                                   #
+# --------------------------------------------------------------------------- #
+
+_latencias: dict = {}  # nome -> [esperas, total_s, max_s, expiradas]
+_lock = threading.Lock()
+
+
+def registra(nome: str, segundos: float, ok: bool = True):
+    with _lock:
+        d = _latencias.setdefault(nome, [0, 0.0, 0.0, 0])
+        d[0] += 1
+        d[1] += segundos
+        d[2] = max(d[2], segundos)
+        d[3] += not ok
+    logger.debug("Espera %s: %.0f ms%s", nome, segundos * 1000, "" if ok else " (expirou)")
+
+
+def latencias() -> dict:
+    """{nome: {"esperas", "total_s", "max_s", "expiradas"}} até o momento."""
+    with _lock:
+        return {
+            nome: dict(esperas=n, total_s=t, max_s=m, expiradas=x)
+            for nome, (n, t, m, x) in _latencias.items()
+        }
+
+
+def resumo() -> str:
+    partes = [
+        f"{nome} {d['esperas']}x média {d['total_s'] / d['esperas'] * 1000:.0f} ms "
+        f"(máx {d['max_s'] * 1000:.0f} ms, {d['expiradas']} expiradas)"
+        for nome, d in sorted(latencias().items())
+    ]
+    return "esperas: " + ("; ".join(partes) if partes else "nenhuma")
+
+
+# --------------------------------------------------------------------------- #
+# Esperas                                                                     #
+# --------------------------------------------------------------------------- #
+
+
+def _espera(driver, js: str, arg: str, teste, timeout: float) -> bool:
+    """Escuta por evento em fatias de `_FATIA_JS`; se o JS falhar, faz polling."""
+    fim = time.monotonic() + timeout
+    while True:
+        restante = fim - time.monotonic()
+        if restante <= 0:
+            return False
+        try:
+            if driver.execute_async_script(js, arg, int(min(restante, _FATIA_JS) * 1000)):
+                return True
+        except WebDriverException as e:
+            logger.debug("Espera por evento indisponível (%s), usando polling", e.msg)
+            break
+
+    intervalo = _POLL_MIN
+    while True:
+        try:
+            if teste():
+                return True
+        except WebDriverException:
+            pass
+        restante = fim - time.monotonic()
+        if restante <= 0:
+            return False
+        time.sleep(min(intervalo, restante))
+        intervalo = min(intervalo * 2, _POLL_MAX)
+
+
+def espera_seletor(
+    driver,
+    css: str,
+    timeout: float = 30,
+    nome: Optional[str] = None,
+    obrigatorio: bool = True,
+) -> bool:
+    """
+    Espera o seletor `css` existir na página. Sem `obrigatorio` devolve False
+    ao expirar; com ele levanta `TimeoutException` (como o `WebDriverWait`).
+    """
+    inicio = time.monotonic()
+    ok = _espera(
+        driver,
+        _JS_SELETOR,
+        css,
+        lambda: driver.find_elements(By.CSS_SELECTOR, css),
+        timeout,
+    )
+    registra(nome or css, time.monotonic() - inicio, ok)
+    if not ok and obrigatorio:
+        raise TimeoutException(f"Seletor {css!r} não apareceu em {timeout} s")
+    return ok
+
+
+def espera_carga(driver, timeout: float = 20, nome: str = "carga"):
+    """
+    Espera o `document.readyState` chegar em "complete" — ou "interactive"
+    no perfil leve, que não espera imagens e afins (ver `driver`).
+    """
+    estado = "interactive" if navegador.LEVE else "complete"
+    inicio = time.monotonic()
+    ok = _espera(
+        driver,
+        _JS_CARGA,
+        estado,
+        lambda: driver.execute_script("return document.readyState")
+        in ("complete", estado),
+        timeout,
+    )
+    registra(nome, time.monotonic() - inicio, ok)
+    if not ok:
+        raise TimeoutException(f"Página não carregou em {timeout} s")
@@ -0,0 +1,338 @@
+"""
+Benchmark de ponta a ponta contra o portal local (`mock_portal`).
+
+Roda um corpus fixo (N pessoas × M benefícios × K parcelas), grava a saída
+como o CLI faria e mede beneficiários/min, p50/p95/p99 de cada estágio,
+pico de RSS e bytes escritos. A coleta é repetida `--repeat` vezes: as
+métricas da execução são a mediana das repetições e os percentis saem das
+durações de todas elas juntas. O resultado vai para um JSON; com
+`--baseline` ele é comparado com uma medição anterior e as regressões acima
+de `--tolerance` são apontadas (código de saída 2).
+
+Sem `--rate` a coleta não tem limite de req/s: o balde do CLI (8 req/s)
+dominaria o tempo medido e esconderia o custo do próprio scraper.
+
+    python scripts/bench.py --pessoas 100 --engine http --workers 4
+    python scripts/bench.py --pessoas 100 --engine http --workers 4 \\
+        --baseline test_data/bench/base.json
+
+A coleta roda num processo filho (o RSS medido é só o do scraper); o portal
+fica numa thread do processo pai.
+"""
+
+import argparse, json, os, resource, subprocess, sys, tempfile, threading, time
+from statistics import median_low
+from contextlib import nullcontext
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# estágio -> (módulo, função) nos pontos em que a função é chamada
+ESTAGIOS = {
+    "beneficiario": [
+        ("pipeline", "mapea_beneficiario"),
+        ("http_engine", "mapea_beneficiario"),
+    ],
+    "cards": [("scraper", "extrai_ficha"), ("parsers", "extrai_cards")],
+    "parcelas_json": [("json_api", "pagina_parcelas")],
+    "parcelas_html": [("scraper", "parcelas_html")],
+    "normaliza": [("esquemas", "normaliza_json"), ("esquemas", "normaliza_html")],
+}
+# métrica -> True se maior é melhor
+METRICAS = {"beneficiarios_min": True, "pico_rss_mb": False, "bytes_escritos": False}
+# estágios mais rápidos que isso (p95 da base) ou com menos amostras que
+# isso (na base ou na atual) ficam fora da comparação: é ruído
+P95_MINIMO_MS = 5.0
+AMOSTRAS_MINIMAS = 20
+
+
+class Estagios:
+    """Durações (s) por estágio, registradas de qualquer thread."""
+
+    def __init__(self):
+        self.duracoes: dict = {}
+        self.lock = threading.Lock()
+
+    def registra(self, nome: str, segundos: float):
+        with self.lock:
+            self.duracoes.setdefault(nome, []).append(segundos)
+
+    def cronometra(self, nome: str, func):
+        @wraps(func)
+        def medida(*a, **kw):
+            inicio = time.perf_counter()
+            try:
+                return func(*a, **kw)
+            finally:
+                self.registra(nome, time.perf_counter() - inicio)
+
+        return medida
+
+    def instala(self):
+        import importlib
+
+        from portal_transparencia_rpa import scraper
+
+        for nome, alvos in ESTAGIOS.items():
+            for modulo, attr in alvos:
+                mod = importlib.import_module(f"portal_transparencia_rpa.{modulo}")
+                setattr(mod, attr, self.cronometra(nome, getattr(mod, attr)))
+
+        # "lista": cada página da busca, nos dois motores
+        original = scraper.pagina_resultados
+
+        def pagina_resultados(busca_pagina, *a, **kw):
+            return original(self.cronometra("lista", busca_pagina), *a, **kw)
+
+        scraper.pagina_resultados = pagina_resultados
+
+    def brutas(self) -> dict:
+        with self.lock:
+            return {nome: list(d) for nome, d in self.duracoes.items()}
+
+
+def _percentil(ordenados: list, p: float) -> float:
+    """Nearest-rank, como o p95 de dashboards."""
+    return ordenados[max(0, -(-len(ordenados) * p // 100) - 1)]
+
+
+def _percentis(ordenados: list) -> dict:
+    return dict(
+        n=len(ordenados),
+        total_s=round(sum(ordenados), 4),
+        **{f"p{p}_ms": round(_percentil(ordenados, p) * 1000, 3) for p in (50, 95, 99)},
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Processo filho: a coleta                                                    #
+# --------------------------------------------------------------------------- #
+
+
+def coleta(args, destino: Path):
+    from portal_transparencia_rpa import evidencias, pipeline, ratelimit
+    from portal_transparencia_rpa.colunar import abre_tabela
+    from portal_transparencia_rpa.output import abre_saida
+
+    ratelimit.configura(args.rate, adaptativo=not args.fixed_rate)
+    estagios = Estagios()
+    estagios.instala()
+    beneficiarios = parcelas = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        run_dir = Path(tmp)
+        inicio = time.monotonic()
+        tabela = (
+            abre_tabela(run_dir / "json" / "parcelas", args.parcels)
+            if args.parcels
+            else nullcontext()
+        )
+        saida = abre_saida(
+            run_dir / "json" / f"beneficiarios.{args.format}", args.format, args.query
+        )
+        try:
+            with saida as saida, tabela as tabela:
+                for url, registro in pipeline.coleta(
+                    args.query,
+                    False,
+                    run_dir,
+                    engine=args.engine,
+                    workers=args.workers,
+                    benefit_workers=args.benefit_workers,
+                    max_results=None,
+                    page_size=args.page_size,
+                    screenshot=None,
+                    lean=args.lean,
+                ):
+                    t0 = time.perf_counter()
+                    saida.escreve(registro, url)
+                    if tabela is not None:
+                        tabela.escreve(registro, url)
+                    estagios.registra("escrita", time.perf_counter() - t0)
+                    beneficiarios += 1
+                    parcelas += sum(len(b.parcelas) for b in registro.beneficios)
+        finally:
+            evidencias.encerra()
+        segundos = time.monotonic() - inicio
+        escritos = sum(f.stat().st_size for f in run_dir.rglob("*") if f.is_file())
+
+    resultado = dict(
+        beneficiarios=beneficiarios,
+        parcelas=parcelas,
+        segundos=round(segundos, 3),
+        beneficiarios_min=round(beneficiarios / max(segundos, 1e-9) * 60, 1),
+        # ru_maxrss vem em KiB no Linux
+        pico_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        bytes_escritos=escritos,
+        duracoes=estagios.brutas(),
+    )
+    destino.write_text(json.dumps(resultado), encoding="utf-8")
+
+
+# --------------------------------------------------------------------------- #
+# Processo pai: portal, relatório e comparação                                #
+# --------------------------------------------------------------------------- #
+
+
+def _git() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def agrega(medicoes: list) -> dict:
+    """
+    Junta as repetições: mediana de cada métrica e percentis de cada estágio
+    sobre as durações de todas as repetições.
+    """
+    escalares = ("beneficiarios", "parcelas", "segundos", *METRICAS)
+    duracoes: dict = {}
+    for m in medicoes:
+        for nome, d in m["duracoes"].items():
+            duracoes.setdefault(nome, []).extend(d)
+    return dict(
+        repeticoes=len(medicoes),
+        **{k: median_low(m[k] for m in medicoes) for k in escalares},
+        por_repeticao=[m["beneficiarios_min"] for m in medicoes],
+        estagios={nome: _percentis(sorted(d)) for nome, d in sorted(duracoes.items())},
+    )
+
+
+def compara(atual: dict, base: dict, tolerancia: float) -> list:
+    """Linhas "métrica: base -> atual (variação)" e se cada uma é regressão."""
+    linhas = []
+
+    def confere(nome, a, b, maior_melhor):
+        if not b:
+            return
+        variacao = (a - b) / b
+        pior = -variacao if maior_melhor else variacao
+        linhas.append((f"{nome}: {b:g} -> {a:g} ({variacao:+.1%})", pior > tolerancia))
+
+    for metrica, maior_melhor in METRICAS.items():
+        confere(metrica, atual[metrica], base[metrica], maior_melhor)
+    for nome, b in base["estagios"].items():
+        a = atual["estagios"].get(nome)
+        if (
+            a
+            and b["p95_ms"] >= P95_MINIMO_MS
+            and min(a["n"], b["n"]) >= AMOSTRAS_MINIMAS
+        ):
+            confere(f"{nome} p95 ms", a["p95_ms"], b["p95_ms"], False)
+    return linhas
+
+
+def imprime(r: dict):
+    if r.get("repeticoes", 1) > 1:
+        print(
+            f"mediana de {r['repeticoes']} repetições (beneficiários/min: "
+            f"{', '.join(f'{v:.0f}' for v in r['por_repeticao'])})"
+        )
+    print(
+        f"{r['beneficiarios']} beneficiários, {r['parcelas']} parcelas em "
+        f"{r['segundos']:.2f} s: {r['beneficiarios_min']:.0f} beneficiários/min, "
+        f"pico RSS {r['pico_rss_mb']:.0f} MB, {r['bytes_escritos'] / 1024:.0f} KiB escritos"
+    )
+    print(f"{'estágio':15} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'total s':>9}")
+    for nome, e in r["estagios"].items():
+        print(
+            f"{nome:15} {e['n']:6d} {e['p50_ms']:9.2f} {e['p95_ms']:9.2f} "
+            f"{e['p99_ms']:9.2f} {e['total_s']:9.2f}"
+        )
+    print("requisições:", json.dumps(r["requisicoes"]["rotas"], sort_keys=True))
+
+
+def main():
+    from portal_transparencia_rpa import mock_portal
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--engine", choices=("selenium", "http"), default="http")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--benefit-workers", type=int, default=None)
+    ap.add_argument("--page-size", type=int, default=10)
+    ap.add_argument("--query")
+    ap.add_argument("--format", choices=("json", "ndjson"), default="ndjson")
+    ap.add_argument("--parcels", choices=("parquet", "arrow", "csv"))
+    ap.add_argument("--lean", action="store_true", help="Perfil leve do Chrome")
+    ap.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Limite de req/s por host, como o --rate do CLI (padrão: sem limite)",
+    )
+    ap.add_argument("--fixed-rate", action="store_true", help="Sem o ajuste AIMD")
+    ap.add_argument(
+        "--repeat", type=int, default=3, help="Repetições da coleta (mediana)"
+    )
+    ap.add_argument("--out", type=Path, help="JSON do resultado (padrão: test_data/bench/)")
+    ap.add_argument("--baseline", type=Path, help="Resultado anterior para comparar")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="Piora aceita (fração)")
+    ap.add_argument("--filho", type=Path, help=argparse.SUPPRESS)
+    mock_portal.argumentos(ap)
+    args = ap.parse_args()
+
+    if args.filho:
+        return coleta(args, args.filho)
+
+    corpus = mock_portal.corpus_de(args)
+    parametros = {
+        k: (str(v) if isinstance(v, Path) else v)
+        for k, v in vars(args).items()
+        if k not in ("out", "baseline", "tolerance", "filho", "repeat")
+    }
+    medicoes = []
+    for _ in range(max(1, args.repeat)):
+        # portal novo a cada repetição: nenhuma herda o estado da anterior
+        with mock_portal.servidor(corpus, **mock_portal.config_de(args)) as portal:
+            with tempfile.TemporaryDirectory() as tmp:
+                destino = Path(tmp) / "resultado.json"
+                subprocess.run(
+                    [sys.executable, __file__, *sys.argv[1:], "--filho", str(destino)],
+                    env=dict(os.environ, BASE_URL=portal.url),
+                    check=True,
+                )
+                medicoes.append(json.loads(destino.read_text(encoding="utf-8")))
+            requisicoes = portal.estatisticas()
+
+    resultado = dict(
+        data=datetime.now().isoformat(timespec="seconds"),
+        git=_git(),
+        parametros=parametros,
+        corpus=dict(pessoas=len(corpus.pessoas), parcelas=corpus.parcelas),
+        requisicoes=requisicoes,
+        **agrega(medicoes),
+    )
+    out = args.out or Path("test_data") / "bench" / datetime.now().strftime(
+        "bench_%Y-%m-%d_%H-%M-%S.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+    imprime(resultado)
+    print(f"Resultado em {out}")
+
+    if resultado["beneficiarios"] < len(corpus.busca(args.query)):
+        print("AVISO: nem todos os beneficiários do corpus foram coletados")
+    if not args.baseline:
+        return
+    base = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if base.get("parametros") != parametros:
+        print("AVISO: parâmetros diferentes da base, a comparação pode não valer")
+    regressoes = 0
+    print(f"comparação com {args.baseline} (tolerância {args.tolerance:.0%}):")
+    for linha, regressao in compara(resultado, base, args.tolerance):
+        regressoes += regressao
+        print(("  REGRESSÃO " if regressao else "  ") + linha)
+    if regressoes:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compara o perfil padrão do Chrome com o perfil leve (`--lean`): tempo de
+carga e bytes transferidos por ficha de beneficiário.
+
+    python scripts/bench_driver.py --query "MARIA" --n 5
+"""
+
+import argparse, statistics, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from portal_transparencia_rpa import driver as navegador
+from portal_transparencia_rpa.scraper import (
+    espera_dom,
+    espera_resultados,
+    url_lista_beneficiarios,
+)
+
+
+def mede(leve: bool, query: str, n: int, visible: bool) -> list:
+    navegador.configura(leve, screenshot=False)
+    d = navegador.build(visible)
+    try:
+        d.get(url_lista_beneficiarios(query, 1, n))
+        links = espera_resultados(d)[:n]
+        amostras = []
+        for url in links:
+            t0 = time.perf_counter()
+            d.get(url)
+            espera_dom(d)
+            ms = (time.perf_counter() - t0) * 1000
+            amostras.append(dict(navegador.metricas_carga(d), parede=ms))
+        return amostras
+    finally:
+        d.quit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--query", default="")
+    ap.add_argument("--n", type=int, default=5, help="Fichas por perfil")
+    ap.add_argument("--visible", action="store_true")
+    args = ap.parse_args()
+
+    res = {}
+    for nome, leve in (("padrão", False), ("leve", True)):
+        amostras = mede(leve, args.query, args.n, args.visible)
+        res[nome] = {
+            k: statistics.mean(a[k] for a in amostras)
+            for k in ("parede", "ms", "bytes", "recursos")
+        }
+        print(
+            f"{nome:7} {res[nome]['parede']:8.0f} ms  "
+            f"DCL {res[nome]['ms']:6.0f} ms  "
+            f"{res[nome]['bytes'] / 1024:8.1f} KiB  "
+            f"{res[nome]['recursos']:5.0f} recursos  (média de {len(amostras)})"
+        )
+    p, l = res["padrão"], res["leve"]
+    print(
+        f"economia por beneficiário: {p['parede'] - l['parede']:.0f} ms, "
+        f"{(p['bytes'] - l['bytes']) / 1024:.1f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Microbenchmark da normalização de parcelas (`esquemas`): linhas por segundo
+por benefício, a partir do JSON e das células HTML.
+
+    python scripts/bench_normaliza.py --linhas 200000
+"""
+
+import argparse, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from portal_transparencia_rpa.esquemas import ESQUEMAS
+
+AMOSTRA = {
+    "mesDisponibilizacao": " 04/2020 ",
+    "numeroParcela": "1ª",
+    "mesFolha": "01/2021",
+    "mesReferencia": "12/2020",
+    "uf": "SP ",
+    "municipio": "SÃO  PAULO",
+    "enquadramento": "\n Bolsa Família ",
+    "quantidadeDependentes": "2",
+    "valor": " 1.300,00",
+    "observacao": "",
+}
+
+
+def mede(funcao, dados) -> float:
+    inicio = time.perf_counter()
+    funcao(dados)
+    return len(dados) / (time.perf_counter() - inicio)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--linhas", type=int, default=100_000)
+    args = ap.parse_args()
+
+    for segmento, esquema in ESQUEMAS.items():
+        data = [{c: AMOSTRA[c] for c in esquema.colunas}] * args.linhas
+        celulas = [[AMOSTRA[c] for c in esquema.colunas]] * args.linhas
+        print(
+            f"{segmento:20} json {mede(esquema.de_json, data):>12,.0f} linhas/s  "
+            f"html {mede(esquema.de_html, celulas):>12,.0f} linhas/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
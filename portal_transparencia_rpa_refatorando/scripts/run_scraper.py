@@ -0,0 +1,98 @@
+"""
+Roda o pipeline contra o portal local (`mock_portal`) e confere cada
+beneficiário coletado com o corpus servido: regressão de ponta a ponta sem
+rede, com a vazão no final. Sai com código 1 se algo divergir.
+
+    python scripts/run_scraper.py --engine http --pessoas 100 --workers 4
+    python scripts/run_scraper.py --replay test_data/test_2025-05-14_08-44-32
+    python scripts/run_scraper.py --latency 0.05 --error-rate 0.05 --garbage-rate 0.02
+"""
+
+import argparse, json, logging, os, socket, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    # BASE_URL é lido na importação de `constants`: a porta vem antes de tudo
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--port", type=int, default=0)
+    porta = pre.parse_known_args()[0].port or _porta_livre()
+    os.environ["BASE_URL"] = f"http://127.0.0.1:{porta}"
+
+    from portal_transparencia_rpa import evidencias, mock_portal, pipeline
+    from portal_transparencia_rpa.scraper import pessoa_id
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1], parents=[pre])
+    ap.add_argument("--engine", choices=("selenium", "http"), default="http")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--query", help="Termo da busca (padrão: todas as pessoas)")
+    ap.add_argument("--max-results", type=int, default=0, help="0 = todos")
+    ap.add_argument("--page-size", type=int, default=10)
+    ap.add_argument("--visible", action="store_true")
+    ap.add_argument("--debug", action="store_true")
+    mock_portal.argumentos(ap)
+    args = ap.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.WARNING,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+
+    corpus = mock_portal.corpus_de(args)
+    esperados = [p["id"] for p in corpus.busca(args.query)]
+    if args.max_results:
+        esperados = esperados[: args.max_results]
+
+    divergentes, parcelas, coletados = [], 0, []
+    with mock_portal.servidor(
+        corpus, porta, **mock_portal.config_de(args)
+    ) as portal, tempfile.TemporaryDirectory() as tmp:
+        inicio = time.monotonic()
+        try:
+            for url, registro in pipeline.coleta(
+                args.query,
+                args.visible,
+                Path(tmp),
+                engine=args.engine,
+                workers=args.workers,
+                max_results=args.max_results or None,
+                page_size=args.page_size,
+                screenshot=None,
+            ):
+                pid = pessoa_id(url)
+                coletados.append(pid)
+                obtido = registro.para_dict()
+                obtido.pop("screenshot", None)
+                if obtido != corpus.esperado(corpus.por_id[pid], portal.url):
+                    divergentes.append(pid)
+                parcelas += sum(len(b["parcelas"]) for b in obtido["beneficios"])
+        finally:
+            evidencias.encerra()
+        segundos = time.monotonic() - inicio
+        stats = portal.estatisticas()
+
+    faltando = sorted(set(esperados) - set(coletados))
+    print(
+        f"{len(coletados)} beneficiários, {parcelas} parcelas em {segundos:.2f} s "
+        f"({len(coletados) / max(segundos, 1e-9) * 60:.0f} beneficiários/min)"
+    )
+    print("requisições:", json.dumps(stats["rotas"], sort_keys=True))
+    if divergentes:
+        print(f"DIVERGENTES ({len(divergentes)}): {', '.join(divergentes[:20])}")
+    if faltando:
+        print(f"FALTANDO ({len(faltando)}): {', '.join(faltando[:20])}")
+    if coletados != [p for p in esperados if p in coletados]:
+        print("ORDEM diferente da lista")
+        divergentes.append("ordem")
+    sys.exit(1 if divergentes or faltando else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Fixtures dos testes. `BASE_URL` é lido na importação de `constants`, então a
+porta do portal local é escolhida aqui, antes de qualquer import do pacote.
+"""
+
+import os, socket
+from contextlib import ExitStack
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+PORTA = _porta_livre()
+os.environ["BASE_URL"] = f"http://127.0.0.1:{PORTA}"
+
+import pytest
+
+from portal_transparencia_rpa import cache, evidencias, metricas, mock_portal, ratelimit
+
+
+@pytest.fixture(autouse=True)
+def estado_limpo():
+    """Sem limite de req/s nem cache; métricas zeradas a cada teste."""
+    ratelimit.configura(0)
+    cache.configura(None)
+    metricas.zera()
+    yield
+    cache.configura(None)
+    evidencias.encerra()
+
+
+@pytest.fixture
+def portal():
+    """`portal(corpus, **config)` sobe o `mock_portal` na porta do BASE_URL."""
+    with ExitStack() as pilha:
+        yield lambda corpus, **config: pilha.enter_context(
+            mock_portal.servidor(corpus, PORTA, **config)
+        )
@@ -0,0 +1,37 @@
+"""Cache persistente das respostas de parcelas (`cache`): validade e ETag."""
+
+import requests
+
+from portal_transparencia_rpa import cache, json_api
+from portal_transparencia_rpa.mock_portal import Corpus
+
+
+def test_cache_serve_na_validade_e_revalida_com_etag(portal, tmp_path, monkeypatch):
+    corpus = Corpus.sintetico(pessoas=1, beneficios=1, parcelas=30)
+    servidor = portal(corpus)
+    cache.configura(tmp_path / "cache.sqlite")
+    pessoa = corpus.pessoas[0]
+    b = pessoa["beneficios"][0]
+    sess = requests.Session()
+
+    def pagina():
+        return json_api.pagina_parcelas(sess, b["segmento"], b["sk"], pessoa["id"])
+
+    linhas, total = pagina()
+    assert total == 30 and len(linhas) == 30
+    # dentro da validade: nem chega ao portal
+    assert pagina() == (linhas, total)
+    assert servidor.estatisticas()["rotas"]["json"] == {"200": 1}
+
+    # vencida: pergunta com If-None-Match e o 304 reaproveita o corpo guardado
+    monkeypatch.setattr(cache, "ttl", lambda segmento: 0)
+    assert pagina() == (linhas, total)
+    assert servidor.estatisticas()["rotas"]["json"] == {"200": 1, "304": 1}
+    assert (cache.CACHE.acertos, cache.CACHE.revalidados) == (2, 1)
+
+
+def test_entrada_sem_validade_nunca_vence():
+    entrada = cache.Entrada("k", b"{}", None, None, gravado=0.0)
+    assert entrada.fresca(None)
+    assert not entrada.fresca(60)
+    assert entrada.validadores() == {}
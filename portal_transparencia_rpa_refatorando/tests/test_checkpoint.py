@@ -0,0 +1,51 @@
+"""Journal de checkpoint (`checkpoint`) e retomada da saída (`output`)."""
+
+import json
+
+import pytest
+
+from portal_transparencia_rpa.checkpoint import Journal, le_journal
+from portal_transparencia_rpa.output import (
+    FORMATOS,
+    EscritorJson,
+    EscritorNdjson,
+    abre_saida,
+)
+
+
+@pytest.mark.parametrize("formato", FORMATOS)
+def test_retomada_trunca_a_saida_no_ultimo_confirmado(tmp_path, formato):
+    path = tmp_path / f"beneficiarios.{formato}"
+    cls = EscritorNdjson if formato == "ndjson" else EscritorJson
+    journal = Journal(tmp_path, {"query": "x"})
+    saida = cls(path, "x")
+    for nome in ("A", "B"):
+        journal.registra(nome, saida.escreve({"nome": nome}, f"/p/{nome}"))
+    # queda: C chegou à saída mas não ao journal, e a última linha ficou pela metade
+    saida.escreve({"nome": "C"}, "/p/C")
+    saida._f.close()
+    journal._f.write('{"pessoa": "C", "off')
+    journal.fecha()
+
+    parametros, feitos = le_journal(tmp_path)
+    assert parametros == {"query": "x"}
+    assert [e["pessoa"] for e in feitos] == ["A", "B"]
+
+    with abre_saida(path, formato, "x", feitos) as saida:
+        saida.escreve({"nome": "D"}, "/p/D")
+    if formato == "json":
+        registros = json.loads(path.read_text(encoding="utf-8"))["beneficiarios"]
+    else:
+        linhas = path.read_text(encoding="utf-8").splitlines()
+        registros = [json.loads(l) for l in linhas]
+    assert [r["nome"] for r in registros] == ["A", "B", "D"]
+
+
+def test_journal_reaberto_preserva_os_parametros(tmp_path):
+    Journal(tmp_path, {"query": "x"}).fecha()
+    journal = Journal(tmp_path, {"query": "outra"})
+    journal.registra("A", {"url": "/p/A", "offset": 0, "bytes": 1})
+    journal.fecha()
+    parametros, feitos = le_journal(tmp_path)
+    assert parametros == {"query": "x"}
+    assert feitos == [{"pessoa": "A", "url": "/p/A", "offset": 0, "bytes": 1}]
@@ -0,0 +1,143 @@
+"""Tabela colunar de parcelas (`colunar`): lotes, dicionários e retomada."""
+
+import csv, os, subprocess, sys, time
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from portal_transparencia_rpa import colunar
+from portal_transparencia_rpa.checkpoint import le_journal
+from portal_transparencia_rpa.colunar import abre_tabela, centavos, competencia, linhas
+from portal_transparencia_rpa.mock_portal import Corpus
+from portal_transparencia_rpa.output import le_registros
+
+pa, pq = colunar.pa, colunar.pq
+precisa_pyarrow = pytest.mark.skipif(pa is None, reason="pyarrow não instalado")
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def _registros(corpus: Corpus, base: str = "http://portal") -> list:
+    """(registro, url da ficha) de cada pessoa, como o scraper entrega."""
+    return [
+        (corpus.esperado(p, base), f"{base}/busca/pessoa-fisica/{p['slug']}")
+        for p in corpus.pessoas
+    ]
+
+
+def _linhas(registros) -> list:
+    return [linha for registro, url in registros for linha in linhas(registro, url)]
+
+
+def _le(path: Path, formato: str):
+    """(tabela, lotes gravados) de uma tabela parquet/arrow."""
+    if formato == "parquet":
+        arquivo = pq.ParquetFile(str(path))
+        return arquivo.read(), arquivo.metadata.num_row_groups
+    leitor = pa.ipc.open_file(str(path))
+    return leitor.read_all(), leitor.num_record_batches
+
+
+def test_conversoes():
+    assert competencia("Dez 12/2020") == date(2020, 12, 1)
+    assert competencia("13/2020") is None
+    assert centavos("R$ 1.300,05") == 130005
+    assert centavos("-R$ 7,5") == -750
+    assert centavos("") is None
+
+
+@precisa_pyarrow
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_tabela_em_varios_lotes(tmp_path, monkeypatch, formato):
+    monkeypatch.setattr(colunar, "LINHAS_POR_GRUPO", 7)
+    registros = _registros(Corpus.sintetico(pessoas=3, beneficios=2, parcelas=5))
+    with abre_tabela(tmp_path / "parcelas", formato) as tabela:
+        for registro, url in registros:
+            tabela.escreve(registro, url)
+
+    lida, lotes = _le(tmp_path / f"parcelas.{formato}", formato)
+    assert lotes == 5  # 30 linhas em lotes de 7
+    assert lida.to_pylist() == _linhas(registros)
+    for nome, tipo in colunar.COLUNAS:
+        dicionario = pa.types.is_dictionary(lida.schema.field(nome).type)
+        assert dicionario == (tipo == "dict")
+
+
+def test_tabela_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(colunar, "LINHAS_POR_GRUPO", 7)
+    registros = _registros(Corpus.sintetico(pessoas=3, beneficios=2, parcelas=5))
+    with abre_tabela(tmp_path / "parcelas", "csv") as tabela:
+        for registro, url in registros:
+            tabela.escreve(registro, url)
+
+    with (tmp_path / "parcelas.csv").open(encoding="utf-8") as f:
+        lidas = list(csv.DictReader(f))
+    esperadas = _linhas(registros)
+    assert len(lidas) == len(esperadas) == 30
+    assert [l["valor_centavos"] for l in lidas] == [
+        str(l["valor_centavos"]) for l in esperadas
+    ]
+
+
+@precisa_pyarrow
+def test_retomada_refaz_a_tabela_com_os_recuperados(tmp_path):
+    # tabela de uma execução morta: sem rodapé, ilegível
+    (tmp_path / "parcelas.parquet").write_bytes(b"PAR1")
+    registros = _registros(Corpus.sintetico(pessoas=3, beneficios=2, parcelas=5))
+    with abre_tabela(tmp_path / "parcelas", "parquet", registros[:2]) as tabela:
+        tabela.escreve(*registros[2])
+    lida = pq.read_table(str(tmp_path / "parcelas.parquet"))
+    assert lida.to_pylist() == _linhas(registros)
+
+
+def _cli(*args: str) -> list:
+    return [sys.executable, "-m", "portal_transparencia_rpa.cli", *args]
+
+
+@precisa_pyarrow
+def test_cli_morto_e_retomado_nao_perde_nem_duplica_parcelas(portal, tmp_path):
+    portal(
+        Corpus.sintetico(pessoas=8, beneficios=2, parcelas=30),
+        latencia={"json": 0.1},
+    )
+    ambiente = dict(os.environ, PYTHONPATH=str(RAIZ))
+    comuns = ("--rate", "0", "--no-cache", "--no-screenshot", "--engine", "http")
+    processo = subprocess.Popen(
+        _cli("--parcels", "parquet", "--workers", "1", *comuns),
+        cwd=tmp_path,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        # mata (SIGKILL) depois de 2 beneficiários confirmados no journal
+        limite = time.monotonic() + 60
+        journal = None
+        while time.monotonic() < limite:
+            journal = next(tmp_path.glob("test_data/*/journal.ndjson"), None)
+            if journal is not None and len(journal.read_text().splitlines()) >= 3:
+                break
+            time.sleep(0.02)
+    finally:
+        processo.kill()
+        processo.wait()
+    run_dir = journal.parent
+    _, feitos = le_journal(run_dir)
+    assert 2 <= len(feitos) < 8
+
+    subprocess.run(
+        _cli("--resume", str(run_dir), *comuns),
+        cwd=tmp_path,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        timeout=120,
+        check=True,
+    )
+    _, feitos = le_journal(run_dir)
+    assert len(feitos) == 8
+    saida = run_dir / "json" / "beneficiarios.json"
+    tabela = pq.read_table(str(run_dir / "json" / "parcelas.parquet"))
+    assert tabela.to_pylist() == _linhas(le_registros(saida, feitos))
+    assert tabela.num_rows == 8 * 2 * 30
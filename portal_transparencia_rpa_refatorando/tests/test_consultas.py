@@ -0,0 +1,30 @@
+"""Leitura do arquivo de consultas do modo em lote (`consultas`)."""
+
+import pytest
+
+from portal_transparencia_rpa.consultas import le_consultas
+
+
+def test_le_consultas_txt(tmp_path):
+    arq = tmp_path / "consultas.txt"
+    arq.write_text("# nomes\nMARIA\n\n  123.456.789-00 \nMARIA\n", encoding="utf-8")
+    assert le_consultas(str(arq)) == ["MARIA", "123.456.789-00"]
+
+
+def test_le_consultas_csv(tmp_path):
+    com_cabecalho = tmp_path / "com.csv"
+    com_cabecalho.write_text("nome,cpf\nMARIA,111\nJOSÉ,222\n", encoding="utf-8-sig")
+    # "cpf" vem antes de "nome" na ordem de preferência das colunas
+    assert le_consultas(str(com_cabecalho)) == ["111", "222"]
+    sem_cabecalho = tmp_path / "sem.csv"
+    sem_cabecalho.write_text("MARIA,1\nJOSÉ,2\n", encoding="utf-8")
+    assert le_consultas(str(sem_cabecalho)) == ["MARIA", "JOSÉ"]
+
+
+def test_le_consultas_ndjson(tmp_path):
+    arq = tmp_path / "consultas.ndjson"
+    arq.write_text('{"query": "A"}\n\n{"consulta": "B"}\n"C"\n', encoding="utf-8")
+    assert le_consultas(str(arq)) == ["A", "B", "C"]
+    arq.write_text('{"outra": "A"}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        le_consultas(str(arq))
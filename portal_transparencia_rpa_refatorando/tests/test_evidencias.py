@@ -0,0 +1,62 @@
+"""Evidências gravadas fora da thread de coleta (`evidencias`)."""
+
+import gzip
+
+import pytest
+
+from portal_transparencia_rpa import evidencias, metricas
+
+
+@pytest.fixture(autouse=True)
+def config_padrao():
+    """`configura` vale para o módulo todo: volta ao padrão depois do teste."""
+    yield
+    evidencias.configura()
+
+
+def _contagens() -> dict:
+    serie = metricas.instantaneo()["contadores"].get("rpa_evidencias_total", [])
+    return {s["rotulos"]["resultado"]: s["valor"] for s in serie}
+
+
+class DriverFalso:
+    def __init__(self):
+        self.chamadas = 0
+
+    @property
+    def page_source(self):
+        self.chamadas += 1
+        return "<html>" + "x" * 54 + "</html>"
+
+    def get_screenshot_as_png(self):
+        self.chamadas += 1
+        return b"\x89PNG"
+
+
+def test_encerra_grava_tudo_que_estava_na_fila(tmp_path):
+    evidencias.configura(tamanho_fila=100, comprime=True)
+    nomes = [evidencias.salva(tmp_path, "erro", html=f"<p>{i}</p>") for i in range(20)]
+    evidencias.encerra()
+
+    assert all(nomes)
+    for i, nome in enumerate(nomes):
+        html = gzip.decompress((tmp_path / "html" / f"{nome}.html.gz").read_bytes())
+        assert html == f"<p>{i}</p>".encode()
+    assert _contagens() == {"gravada": 20}
+
+
+def test_teto_de_bytes_descarta_e_conta(tmp_path):
+    # teto de 100 bytes: a captura (71) e a 2ª (64, que estoura) passam
+    evidencias.configura(max_bytes=100, comprime=False)
+    driver = DriverFalso()
+    assert evidencias.captura(driver, "lista", tmp_path)
+    assert evidencias.salva(tmp_path, "ficha", html="y" * 64)
+    assert evidencias.salva(tmp_path, "ficha", html="z" * 64) is None
+    assert evidencias.captura(driver, "lista", tmp_path) is None
+    # passado o teto, o navegador nem é consultado
+    assert driver.chamadas == 2
+    evidencias.encerra()
+
+    assert len(list((tmp_path / "html").iterdir())) == 2
+    assert len(list((tmp_path / "png").iterdir())) == 1
+    assert _contagens() == {"gravada": 2, "teto": 2}
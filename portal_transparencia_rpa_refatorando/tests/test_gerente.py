@@ -0,0 +1,163 @@
+"""Ciclo de vida dos Chromes (`gerente`) com um driver falso (`fabrica=`)."""
+
+import os, subprocess, threading, time
+from types import SimpleNamespace
+
+import pytest
+
+from portal_transparencia_rpa import gerente
+from portal_transparencia_rpa.gerente import ChromeGerenciado
+
+linux = pytest.mark.skipif(not os.path.isdir("/proc"), reason="precisa de /proc")
+
+
+class Falso:
+    """WebDriver falso: conta os `quit()` e pode travar ou morrer."""
+
+    def __init__(self, processo=None):
+        self.quits = 0
+        self.morto = False
+        self.trava = threading.Event()  # setado = `execute_script`/`quit` travam
+        self.solta = threading.Event()
+        if processo is not None:
+            self.service = SimpleNamespace(process=processo)
+
+    def set_page_load_timeout(self, segundos):
+        pass
+
+    def execute_script(self, script):
+        if self.morto:
+            raise RuntimeError("sessão morta")
+        if self.trava.is_set():
+            self.solta.wait(5)
+        return 1
+
+    def quit(self):
+        self.quits += 1
+        if self.trava.is_set():
+            self.solta.wait(5)
+
+
+class Fabrica:
+    """`fabrica=` que guarda os drivers criados (opcionalmente lenta)."""
+
+    def __init__(self, demora: float = 0.0):
+        self.demora = demora
+        self.criados = []
+
+    def __call__(self, visible):
+        time.sleep(self.demora)
+        driver = Falso()
+        self.criados.append(driver)
+        return driver
+
+
+def _morto(pid: int) -> bool:
+    """Processo inexistente ou zumbi."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            return f.read().rsplit(b")", 1)[1].split()[0] in (b"Z", b"X")
+    except FileNotFoundError:
+        return True
+
+
+@pytest.fixture
+def prazo_curto(monkeypatch):
+    monkeypatch.setattr(gerente, "DRIVER_TIMEOUT_ENCERRA", 0.3)
+
+
+def test_recicla_apos_max_paginas_com_substituto_preaquecido():
+    fabrica = Fabrica()
+    chrome = ChromeGerenciado(fabrica=fabrica, max_paginas=3, max_rss_mb=0)
+    primeiro = chrome.atual
+    chrome.usado()
+    assert chrome._reserva is None
+    chrome.usado()  # perto do limite: o substituto já sobe
+    assert chrome._reserva is not None
+    chrome.usado()
+    assert chrome.atual is fabrica.criados[1] and chrome.atual is not primeiro
+    assert (chrome.paginas, chrome.reciclagens) == (0, 1)
+    chrome.quit()
+    assert [d.quits for d in fabrica.criados] == [1, 1]
+
+
+def test_vivo():
+    fabrica = Fabrica()
+    chrome = ChromeGerenciado(fabrica=fabrica, max_paginas=0, max_rss_mb=0)
+    assert chrome.vivo()
+    chrome.atual.morto = True
+    assert not chrome.vivo()
+    chrome.atual.morto = False
+    chrome.atual.trava.set()
+    inicio = time.monotonic()
+    assert not chrome.vivo(timeout=0.1)
+    assert time.monotonic() - inicio < 1
+    chrome.atual.solta.set()
+
+
+def test_vivo_com_chromedriver_encerrado():
+    processo = SimpleNamespace(poll=lambda: 1, pid=0)
+    chrome = ChromeGerenciado(fabrica=lambda v: Falso(processo), max_paginas=0)
+    assert not chrome.vivo()
+
+
+def test_renova_sem_substituto_sobe_um_novo_e_encerra_o_antigo():
+    fabrica = Fabrica()
+    chrome = ChromeGerenciado(fabrica=fabrica, max_paginas=0, max_rss_mb=0)
+    antigo = chrome.atual
+    chrome.renova()
+    assert chrome.atual is fabrica.criados[1]
+    chrome.quit()
+    assert antigo.quits == 1 and chrome.atual.quits == 1
+
+
+def test_quit_espera_o_substituto_que_ainda_esta_subindo():
+    fabrica = Fabrica()
+    chrome = ChromeGerenciado(fabrica=fabrica, max_paginas=0, max_rss_mb=0)
+    fabrica.demora = 0.2
+    chrome._preaquece()
+    chrome.quit()
+    assert len(fabrica.criados) == 2
+    assert [d.quits for d in fabrica.criados] == [1, 1]
+
+
+def test_quit_travado_nao_segura_a_troca(prazo_curto):
+    fabrica = Fabrica()
+    chrome = ChromeGerenciado(fabrica=fabrica, max_paginas=0, max_rss_mb=0)
+    chrome.atual.trava.set()
+    inicio = time.monotonic()
+    chrome.renova()
+    chrome.renova()
+    assert time.monotonic() - inicio < 0.2
+    chrome.quit()
+    # o quit do gerente espera os encerramentos, limitado ao prazo
+    assert time.monotonic() - inicio < 2
+    assert all(d.quits == 1 for d in fabrica.criados)
+    fabrica.criados[0].solta.set()
+
+
+@linux
+def test_quit_travado_mata_a_arvore_de_processos(prazo_curto):
+    processo = subprocess.Popen(["sleep", "60"])
+    driver = Falso(processo)
+    driver.trava.set()
+    chrome = ChromeGerenciado(fabrica=lambda v: driver, max_paginas=0, max_rss_mb=0)
+    chrome.quit()
+    assert processo.wait(2) == -9
+    driver.solta.set()
+
+
+@linux
+def test_mata_arvore_mata_os_descendentes():
+    pai = subprocess.Popen(["sh", "-c", "sleep 60 & sleep 60 & wait"])
+    limite = time.monotonic() + 5
+    while len(gerente._filhos().get(pai.pid, ())) < 2:
+        assert time.monotonic() < limite
+        time.sleep(0.02)
+    arvore = [pai.pid, *gerente._filhos()[pai.pid]]
+    gerente._mata_arvore(pai.pid)
+    pai.wait(2)
+    limite = time.monotonic() + 2
+    while not all(_morto(p) for p in arvore) and time.monotonic() < limite:
+        time.sleep(0.02)
+    assert all(_morto(p) for p in arvore)
@@ -0,0 +1,31 @@
+"""Listagem do motor HTTP (`http_engine`) contra o portal local."""
+
+import pytest
+import requests
+
+from portal_transparencia_rpa import http_engine
+from portal_transparencia_rpa.mock_portal import Corpus
+from portal_transparencia_rpa.scraper import pessoa_id
+
+
+def _lista(sess: requests.Session, base_dir) -> list:
+    chrome = http_engine.ChromeSobDemanda(False, sess)
+    urls = http_engine.itera_beneficiarios(
+        sess, chrome, None, page_size=10, base_dir=base_dir
+    )
+    return [pessoa_id(url) for url in urls]
+
+
+def test_lista_repete_a_pagina_estrangulada(portal, tmp_path):
+    # seed 1: a página 1 vem de primeira, a página 2 só na 3ª tentativa (2 × 429)
+    servidor = portal(Corpus.sintetico(pessoas=30), taxa_429=0.5, seed=1)
+    esperados = [p["id"] for p in servidor.corpus.pessoas]
+    assert _lista(requests.Session(), tmp_path) == esperados
+    assert servidor.estatisticas()["rotas"]["lista"]["429"] >= 2
+
+
+def test_lista_nao_termina_calada_se_a_pagina_nao_vem(portal, tmp_path):
+    # seed 7: a página 2 responde 429 em todas as tentativas
+    portal(Corpus.sintetico(pessoas=30), taxa_429=0.5, seed=7)
+    with pytest.raises(requests.HTTPError):
+        _lista(requests.Session(), tmp_path)
@@ -0,0 +1,19 @@
+"""Exportação das métricas (`metricas`) no formato de texto do Prometheus."""
+
+from portal_transparencia_rpa import metricas
+
+
+def test_prometheus_escreve_os_valores_exatos():
+    metricas.conta("rpa_http_bytes_total", 1234567, host="portal")
+    metricas.define("rpa_ratelimit_taxa", 0.1, host="portal")
+    linhas = metricas.prometheus().splitlines()
+    assert 'rpa_http_bytes_total{host="portal"} 1234567' in linhas
+    assert 'rpa_ratelimit_taxa{host="portal"} 0.1' in linhas
+
+
+def test_span_vai_para_o_histograma_em_segundos():
+    with metricas.span("lista"):
+        pass
+    texto = metricas.prometheus()
+    assert "# TYPE rpa_etapa_seconds histogram" in texto
+    assert 'rpa_etapa_seconds_count{etapa="lista",ok="sim"} 1' in texto
@@ -0,0 +1,54 @@
+"""Modelos compactos (`modelos`): `dumps` igual ao `json.dumps` byte a byte."""
+
+import json
+
+import pytest
+
+from portal_transparencia_rpa.modelos import Beneficiario, Beneficio, Parcela, dumps
+
+
+def _beneficiario(consulta=None) -> Beneficiario:
+    campos = ("mes_folha", "valor", "uf", "municipio")
+    local = ("SP", "SÃO PAULO")
+    return Beneficiario(
+        consulta=consulta,
+        nome='JOSÉ "ZÉ" DA SILVA',
+        cpf="***.123.456-**",
+        localidade="São Paulo - SP",
+        screenshot=None,
+        beneficios=[
+            Beneficio(
+                beneficio="Bolsa Família",
+                nis="12345678901",
+                nome="JOSÉ DA SILVA",
+                valor_recebido="R$ 1.300,00",
+                href="/beneficios/bolsa-familia/1",
+                parcelas=[
+                    Parcela.de_textos(campos, ("01/2021", "R$ 600,00", *local)),
+                    Parcela.de_textos(campos, ("02/2021", "R$ 700,00", *local)),
+                ],
+            ),
+            Beneficio(
+                beneficio="Safra",
+                nis="",
+                nome="JOSÉ DA SILVA",
+                valor_recebido="R$ 0,00",
+                href="/beneficios/safra/2",
+                parcelas=[],
+            ),
+        ],
+    )
+
+
+@pytest.mark.parametrize("consulta", [None, "JOSÉ\tDA SILVA"])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_dumps_igual_ao_json_dumps_byte_a_byte(consulta, indent):
+    registro = _beneficiario(consulta)
+    esperado = json.dumps(registro.para_dict(), ensure_ascii=False, indent=indent)
+    assert dumps(registro, indent=indent) == esperado
+
+
+def test_dumps_com_nivel_embute_no_documento_indentado():
+    registro = _beneficiario()
+    esperado = json.dumps(registro.para_dict(), ensure_ascii=False, indent=2)
+    assert dumps(registro, indent=2, nivel=2) == esperado.replace("\n", "\n    ")
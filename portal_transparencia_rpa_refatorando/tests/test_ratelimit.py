@@ -0,0 +1,73 @@
+"""Limite de requisições por host (`ratelimit`): token bucket e AIMD."""
+
+import threading, time
+
+import pytest
+
+from portal_transparencia_rpa.constants import HTTP_RECUO, HTTP_TAXA_MINIMA
+from portal_transparencia_rpa.ratelimit import Balde, Controle
+
+
+def test_balde_libera_a_rajada_e_depois_espera_a_taxa():
+    balde = Balde(taxa=20, rajada=3)
+    inicio = time.monotonic()
+    for _ in range(3):
+        balde.aguarda()
+    assert time.monotonic() - inicio < 0.03
+    balde.aguarda()
+    assert time.monotonic() - inicio >= 0.04
+
+
+def test_balde_ajusta_limita_as_fichas_a_nova_rajada():
+    balde = Balde(taxa=10, rajada=10)
+    balde.ajusta(2, 1)
+    assert (balde.taxa, balde.rajada) == (2, 1)
+    assert balde.fichas <= 1
+
+
+def test_controle_recua_uma_vez_por_sinal():
+    c = Controle("h", teto=8, rajada=8, janela=4)
+    c.entra()
+    enviada = time.monotonic()
+    c.sai(enviada, "429")
+    taxa = max(HTTP_TAXA_MINIMA, 8 * HTTP_RECUO)
+    assert c.taxa == taxa and c.janela == max(1.0, 4 * HTTP_RECUO)
+    assert c.balde.taxa == taxa
+    # outra resposta enviada antes do corte não corta de novo
+    c.entra()
+    c.sai(enviada - 0.001, "429")
+    assert c.taxa == taxa
+
+
+def test_controle_so_avanca_depois_da_calma():
+    c = Controle("h", teto=8, rajada=8, janela=4)
+    c.entra()
+    c.sai(time.monotonic(), "503")
+    taxa = c.taxa
+    c.entra()
+    c.sai(time.monotonic())
+    assert c.taxa == taxa
+    c.calma_ate = 0.0
+    c.entra()
+    c.sai(time.monotonic())
+    assert c.taxa == pytest.approx(taxa + 1 / taxa)
+
+
+def test_controle_fixo_nao_recua():
+    c = Controle("h", teto=8, rajada=8, janela=4, adaptativo=False)
+    c.entra()
+    c.sai(time.monotonic(), "429")
+    assert (c.taxa, c.janela) == (8, 4)
+    assert c.ultimo_sinal > float("-inf")
+
+
+def test_controle_segura_quem_passa_da_janela():
+    c = Controle("h", teto=1000, rajada=1000, janela=1)
+    c.entra()
+    segundo = threading.Thread(target=c.entra, daemon=True)
+    segundo.start()
+    segundo.join(0.1)
+    assert segundo.is_alive()
+    c.sai(time.monotonic())
+    segundo.join(1)
+    assert not segundo.is_alive()
@@ -0,0 +1,78 @@
+"""
+Coleta de ponta a ponta pelo motor HTTP contra o portal local
+(`mock_portal`), cada registro conferido com o corpus servido.
+"""
+
+from portal_transparencia_rpa import pipeline
+from portal_transparencia_rpa.mock_portal import Corpus
+from portal_transparencia_rpa.scraper import pagina_resultados, pessoa_id
+
+
+def _coleta(servidor, tmp_path, **opcoes) -> list:
+    """Ids dos beneficiários coletados, cada registro conferido com o corpus."""
+    coletados = []
+    for url, registro in pipeline.coleta(
+        None,
+        False,
+        tmp_path,
+        engine="http",
+        max_results=None,
+        screenshot=None,
+        **opcoes,
+    ):
+        pid = pessoa_id(url)
+        obtido = registro.para_dict()
+        obtido.pop("screenshot", None)
+        assert obtido == servidor.corpus.esperado(
+            servidor.corpus.por_id[pid], servidor.url
+        ), pid
+        coletados.append(pid)
+    return coletados
+
+
+def test_coleta_http_confere_com_o_corpus(portal, tmp_path):
+    servidor = portal(Corpus.sintetico(pessoas=7, beneficios=3, parcelas=24))
+    coletados = _coleta(servidor, tmp_path)
+    assert coletados == [p["id"] for p in servidor.corpus.pessoas]
+
+
+def test_lista_com_pagina_limitada_pelo_portal(portal, tmp_path):
+    # pede 20 por página, o portal devolve no máximo 10: segue até o fim
+    servidor = portal(Corpus.sintetico(pessoas=30), max_lista=10)
+    coletados = _coleta(servidor, tmp_path, page_size=20)
+    assert coletados == [p["id"] for p in servidor.corpus.pessoas]
+    assert servidor.estatisticas()["rotas"]["lista"] == {"200": 4}
+
+
+def test_parcelas_com_pagina_limitada_pelo_portal(portal, tmp_path):
+    # 250 parcelas por benefício em páginas de no máximo 100: 3 por benefício
+    corpus = Corpus.sintetico(pessoas=6, beneficios=2, parcelas=250)
+    servidor = portal(corpus, max_parcelas=100)
+    coletados = _coleta(servidor, tmp_path)
+    assert len(coletados) == 6
+    assert servidor.estatisticas()["rotas"]["json"] == {"200": 6 * 2 * 3}
+
+
+
+def _paginas_pedidas(total: int, limite: int, page_size: int) -> list:
+    """Páginas pedidas para listar `total` pessoas, o portal limitando a `limite`."""
+    pedidas = []
+
+    def busca_pagina(pagina):
+        pedidas.append(pagina)
+        tamanho = min(page_size, limite)
+        ids = range((pagina - 1) * tamanho + 1, min(pagina * tamanho, total) + 1)
+        return [f"/busca/pessoa-fisica/{i}-x" for i in ids]
+
+    assert len(list(pagina_resultados(busca_pagina, page_size=page_size))) == total
+    return pedidas
+
+
+def test_lista_para_na_pagina_curta_sem_pedir_a_seguinte():
+    # 1ª página menor que o pedido (até o tamanho da busca do portal): é o fim
+    assert _paginas_pedidas(4, limite=50, page_size=10) == [1]
+    assert _paginas_pedidas(25, limite=50, page_size=10) == [1, 2, 3]
+    assert _paginas_pedidas(4, limite=10, page_size=20) == [1]
+    # 1ª página entre esse tamanho e o pedido: pode ser o limite, a 2ª decide
+    assert _paginas_pedidas(14, limite=12, page_size=20) == [1, 2]
+    assert _paginas_pedidas(12, limite=50, page_size=20) == [1, 2]
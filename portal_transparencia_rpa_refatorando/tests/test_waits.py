@@ -0,0 +1,115 @@
+"""Esperas por evento (`waits`) com um driver falso: MutationObserver e polling."""
+
+import itertools, time
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from portal_transparencia_rpa import waits
+
+
+class DriverFalso:
+    """
+    `execute_async_script` devolve os `eventos` em sequência (exceção é
+    levantada; False espera os ms pedidos, como o `setTimeout` do script).
+    O DOM só "tem" o seletor a partir da `aparece`-ésima consulta do polling.
+    """
+
+    def __init__(self, eventos=(), aparece=1, estados=()):
+        self.eventos = iter(eventos)
+        self.aparece = aparece
+        self.estados = list(estados)
+        self.scripts = []
+        self.consultas = 0
+
+    def execute_async_script(self, js, arg, ms):
+        self.scripts.append((arg, ms))
+        evento = next(self.eventos)
+        if isinstance(evento, Exception):
+            raise evento
+        if not evento:
+            time.sleep(ms / 1000)
+        return evento
+
+    def find_elements(self, by, css):
+        self.consultas += 1
+        return ["tr"] if self.consultas >= self.aparece else []
+
+    def execute_script(self, js):
+        return self.estados.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def latencias_zeradas(monkeypatch):
+    monkeypatch.setattr(waits, "_latencias", {})
+
+
+class Relogio:
+    """Relógio falso para o `waits`: `sleep` só avança o tempo e é anotado."""
+
+    def __init__(self):
+        self.agora = 0.0
+        self.pausas = []
+
+    def monotonic(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        self.pausas.append(segundos)
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(waits, "time", relogio)
+    return relogio
+
+
+def test_evento_devolve_sem_polling():
+    driver = DriverFalso(eventos=[True])
+    assert waits.espera_seletor(driver, "table tbody tr", 10, "lista")
+    assert driver.consultas == 0
+    (css, ms), = driver.scripts
+    assert css == "table tbody tr" and 9000 < ms <= 10000
+    assert waits.latencias()["lista"]["expiradas"] == 0
+
+
+def test_evento_expira_em_fatias(monkeypatch):
+    monkeypatch.setattr(waits, "_FATIA_JS", 0.1)
+    driver = DriverFalso(eventos=itertools.repeat(False))
+    assert not waits.espera_seletor(driver, "tr", 0.25, "lista", obrigatorio=False)
+    assert [ms for _, ms in driver.scripts][:2] == [100, 100]
+    assert driver.consultas == 0
+    assert waits.latencias()["lista"]["expiradas"] == 1
+    with pytest.raises(TimeoutException):
+        waits.espera_seletor(DriverFalso(eventos=itertools.repeat(False)), "tr", 0.1)
+
+
+@pytest.mark.parametrize(
+    "falha",
+    [WebDriverException("no such window"), TimeoutException("script timeout")],
+)
+def test_sem_evento_cai_no_polling_adaptativo(relogio, falha):
+    driver = DriverFalso(eventos=[falha], aparece=8)
+    assert waits.espera_seletor(driver, "tr", 30, "lista")
+    assert driver.consultas == 8
+    # 50 ms dobrando até o teto de 1 s
+    assert relogio.pausas == [0.05, 0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+
+
+def test_polling_respeita_o_prazo(relogio):
+    driver = DriverFalso(eventos=[WebDriverException("js")], aparece=99)
+    assert not waits.espera_seletor(driver, "tr", 2, obrigatorio=False)
+    # a última pausa é cortada no que resta do prazo
+    assert relogio.pausas == [0.05, 0.1, 0.2, 0.4, 0.8, pytest.approx(0.45)]
+    assert relogio.agora == pytest.approx(2)
+
+
+def test_carga_cai_no_polling_do_ready_state(relogio):
+    driver = DriverFalso(
+        eventos=[WebDriverException("js")], estados=["loading", "complete"]
+    )
+    waits.espera_carga(driver, 5)
+    assert relogio.pausas == [0.05]
+    assert waits.latencias()["carga"]["esperas"] == 1